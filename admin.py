@@ -1,10 +1,33 @@
+import os
+import tempfile
+import time
 from aiogram import Router, types, F
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError
+from aiogram.types import FSInputFile, InlineKeyboardMarkup, InlineKeyboardButton
 from config import ADMINS
-from database import add_schedule, get_schedules, delete_schedule, update_schedule_details, get_schedule_by_id, delete_schedule_by_id, get_all_schedules
+import database
+import schedule_io
+import settings
+from catalog import catalog
+from broadcast import broadcaster, format_report
+from registrations import notify_seat_available
+from reminders import reminders
+from support import send_reply
+from analytics import format_top
+from event_time import INPUT_HINT, parse_period, format_period
+from sections import BY_NAME, get_section_name
+from callbacks import Op, callback_router, encode
+import metrics
+from keyboards import (
+    get_admin_main_keyboard,
+    get_sections_keyboard,
+    START_KEYBOARD,
+    ADMIN_CANCEL_KEYBOARD,
+    CONFIRM_DELETE_KEYBOARD
+)
 
 admin_router = Router()
 
@@ -12,58 +35,15 @@ class AdminStates(StatesGroup):
     ADD_SCHEDULE = State()
     EDIT_DETAILS = State()
     CONFIRM_DELETE = State()
+    SET_CAPACITY = State()
+    ADD_SCHEDULE_TIME = State()
+    EDIT_TIME = State()
+    SEARCH = State()
+    IMPORT = State()
 
 def is_admin(user_id: int) -> bool:
     return user_id in ADMINS
 
-def get_admin_main_keyboard():
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="📝 Добавить расписание")],
-            [KeyboardButton(text="✏️ Управление расписаниями")],
-            [KeyboardButton(text="🗑 Удалить расписание")],
-            [KeyboardButton(text="🔙 В главное меню")]
-        ],
-        resize_keyboard=True
-    )
-
-def get_sections_keyboard(action: str):
-    sections = [
-        ("📅 Ближайшие мероприятия", "events"),
-        ("🎓 Образовательные программы", "edu"),
-        ("👥 Группы специалистов", "groups"),
-        ("🏫 Курсы для всех", "courses"),
-        ("🎤 Лекторий", "lectures"),
-        ("🎬 Киноклуб", "films"),
-        ("💬 Псих. консультации", "consult"),
-        ("🌐 Конференции", "conf"),
-        ("🚀 Проекты академии", "projects"),
-        ("📚 Библиотека материалов", "library")
-    ]
-    
-    buttons = [
-        [InlineKeyboardButton(text=name, callback_data=f"admin_{action}:{section}")]
-        for name, section in sections
-    ]
-    buttons.append([InlineKeyboardButton(text="🔙 Назад", callback_data="admin_back")])
-    
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
-
-def get_section_name(section_code: str) -> str:
-    section_map = {
-        "events": "ближайшие_мероприятия",
-        "edu": "образовательные_программы",
-        "groups": "группы_специалистов",
-        "courses": "курсы_для_всех",
-        "lectures": "лекторий",
-        "films": "киноклуб",
-        "consult": "псих_консультации",
-        "conf": "конференции",
-        "projects": "проекты_академии",
-        "library": "библиотека_материалов"
-    }
-    return section_map.get(section_code, section_code)
-
 @admin_router.message(Command("admin"))
 async def admin_panel(message: types.Message):
     if not is_admin(message.from_user.id):
@@ -75,50 +55,162 @@ async def admin_panel(message: types.Message):
         reply_markup=get_admin_main_keyboard()
     )
 
+async def support_ticket_reply(message: types.Message):
+    """Фильтр: администратор ответил на пересланное обращение; передаёт ticket=(ticket_id, chat_id)"""
+    if message.reply_to_message is None or not is_admin(message.from_user.id):
+        return False
+    ticket = await database.get_forwarded_ticket(message.chat.id, message.reply_to_message.message_id)
+    return {"ticket": ticket} if ticket else False
+
+@admin_router.message(support_ticket_reply)
+async def admin_support_reply(message: types.Message, ticket: tuple):
+    ticket_id, chat_id = ticket
+    try:
+        await send_reply(message.bot, chat_id, message)
+    except TelegramForbiddenError:
+        await message.answer(f"⚠️ Пользователь обращения #{ticket_id} заблокировал бота, ответ не доставлен.")
+        return
+    except TelegramAPIError as error:
+        await message.answer(f"⚠️ Ответ в обращение #{ticket_id} не доставлен: {error.message}")
+        return
+    await message.answer(f"✅ Ответ отправлен в обращение #{ticket_id}")
+
+def _ms(seconds: float) -> str:
+    return "∞" if seconds == float("inf") else f"{seconds * 1000:.0f}"
+
+def format_stats(top: int = 15) -> str:
+    uptime = int(time.time() - metrics.started_at)
+    lines = [f"📊 Статистика за {uptime // 3600} ч {uptime % 3600 // 60} мин\n"]
+    handlers = sorted(metrics.handlers.items(), key=lambda item: item[1].count, reverse=True)[:top]
+    if handlers:
+        lines.append("Обработчик: вызовов (ошибок), p50/p99 мс, среднее мс = БД + API + код")
+    for name, stats in handlers:
+        count = stats.count
+        lines.append(
+            f"• {name}: {count} ({stats.errors}), {_ms(stats.quantile(0.5))}/{_ms(stats.quantile(0.99))}, "
+            f"{stats.total / count * 1000:.1f} = {stats.db / count * 1000:.1f} + "
+            f"{stats.api / count * 1000:.1f} + {stats.own / count * 1000:.1f}"
+        )
+    if metrics.swallowed:
+        lines.append("\nПодавленные исключения:")
+        lines.extend(f"• {where}: {count}" for where, count in metrics.swallowed.most_common())
+    for source, values in metrics.collect().items():
+        summary = ", ".join(f"{key}={value:.3g}" if isinstance(value, float) else f"{key}={value}" for key, value in values.items())
+        lines.append(f"\n{source}: {summary}")
+    return "\n".join(lines)[:4000]
+
+@admin_router.message(Command("stats"))
+async def admin_stats(message: types.Message):
+    if not is_admin(message.from_user.id):
+        await message.answer("⛔ Доступ запрещен")
+        return
+    
+    await message.answer(format_stats())
+
+@admin_router.message(Command("broadcasts"))
+async def admin_broadcasts(message: types.Message):
+    if not is_admin(message.from_user.id):
+        await message.answer("⛔ Доступ запрещен")
+        return
+    
+    await message.answer(await format_report())
+
+@admin_router.message(Command("top"))
+async def admin_top(message: types.Message, command: CommandObject):
+    if not is_admin(message.from_user.id):
+        await message.answer("⛔ Доступ запрещен")
+        return
+    
+    args = (command.args or "").strip()
+    days = int(args) if args.isdigit() and int(args) > 0 else 7
+    await message.answer(await format_top(days, settings.ANALYTICS_TOP))
+
+def _section_title(section_name: str) -> str:
+    section = BY_NAME.get(section_name)
+    return section.title if section else section_name
+
 @admin_router.message(F.text == "🔙 В главное меню")
 async def back_to_main(message: types.Message, state: FSMContext):
     await state.clear()
-    await message.answer("Главное меню", reply_markup=ReplyKeyboardMarkup(keyboard=[[KeyboardButton(text="/start")]], resize_keyboard=True))
+    await message.answer("Главное меню", reply_markup=START_KEYBOARD)
 
 @admin_router.message(F.text == "📝 Добавить расписание")
 async def add_schedule_handler(message: types.Message):
     await message.answer(
         "Выберите раздел для добавления расписания:",
-        reply_markup=get_sections_keyboard("add")
+        reply_markup=get_sections_keyboard(Op.ADMIN_ADD)
     )
 
 @admin_router.message(F.text == "✏️ Управление расписаниями")
 async def manage_schedules_handler(message: types.Message):
     await message.answer(
         "Выберите раздел для управления расписаниями:",
-        reply_markup=get_sections_keyboard("manage")
+        reply_markup=get_sections_keyboard(Op.ADMIN_MANAGE)
     )
 
+def _short(text: str) -> str:
+    return text[:30] + "..." if len(text) > 30 else text
+
+def _manage_row(schedule_id: int, label: str) -> list:
+    return [
+        InlineKeyboardButton(text=f"🗑️ {label}", callback_data=encode(Op.ADMIN_DELETE, schedule_id)),
+        InlineKeyboardButton(text="✏️ Подробнее", callback_data=encode(Op.ADMIN_EDIT, schedule_id)),
+        InlineKeyboardButton(text="👥 Места", callback_data=encode(Op.ADMIN_CAPACITY, schedule_id)),
+        InlineKeyboardButton(text="🕒 Дата", callback_data=encode(Op.ADMIN_TIME, schedule_id))
+    ]
+
+async def _fetch_page(fetch, *args, before_id: str = None):
+    """(строки страницы, курсор следующей страницы или None); fetch — database.get_schedule_page или search_schedules"""
+    before_id = int(before_id) if before_id else database.FIRST_PAGE
+    rows = await fetch(*args, before_id, settings.ADMIN_PAGE_SIZE + 1)
+    if len(rows) > settings.ADMIN_PAGE_SIZE:
+        rows = rows[:settings.ADMIN_PAGE_SIZE]
+        return rows, rows[-1][0]
+    return rows, None
+
+def _paged_markup(buttons: list, page_op: str, page_args: tuple, first_page: bool, next_id) -> InlineKeyboardMarkup:
+    """Добавляет под списком кнопки листания и «Назад»"""
+    navigation = []
+    if not first_page:
+        navigation.append(InlineKeyboardButton(text="⏮ В начало", callback_data=encode(page_op, *page_args)))
+    if next_id is not None:
+        navigation.append(InlineKeyboardButton(text="Далее ➡️", callback_data=encode(page_op, *page_args, next_id)))
+    if navigation:
+        buttons.append(navigation)
+    buttons.append([InlineKeyboardButton(text="🔙 Назад", callback_data=encode(Op.ADMIN_BACK))])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+async def _delete_list(before_id: str = None):
+    rows, next_id = await _fetch_page(database.get_schedule_page, None, before_id=before_id)
+    buttons = [
+        [InlineKeyboardButton(
+            text=f"{section_name}: {_short(schedule_text)}",
+            callback_data=encode(Op.ADMIN_PICK_DELETE, schedule_id)
+        )]
+        for schedule_id, section_name, schedule_text in rows
+    ]
+    return rows, _paged_markup(buttons, Op.ADMIN_DELETE_LIST, (), before_id is None, next_id)
+
 @admin_router.message(F.text == "🗑 Удалить расписание")
 async def delete_schedule_handler(message: types.Message, state: FSMContext):
-    schedules = get_all_schedules()
-    if not schedules:
+    rows, markup = await _delete_list()
+    if not rows:
         await message.answer("Нет доступных расписаний для удаления.")
         return
     
-    buttons = []
-    for schedule_id, section_name, schedule_text in schedules:
-        short_text = schedule_text[:30] + "..." if len(schedule_text) > 30 else schedule_text
-        buttons.append(
-            [InlineKeyboardButton(
-                text=f"{section_name}: {short_text}", 
-                callback_data=f"delete_{schedule_id}"
-            )]
-        )
-    
-    buttons.append([InlineKeyboardButton(text="🔙 Назад", callback_data="admin_back")])
+    await message.answer("Выберите расписание для удаления:", reply_markup=markup)
+
+@callback_router.handler(Op.ADMIN_DELETE_LIST)
+async def delete_schedule_page(callback: types.CallbackQuery, state: FSMContext, before_id: str = None):
+    rows, markup = await _delete_list(before_id)
+    if not rows:
+        await callback.answer("Больше расписаний нет")
+        return
     
-    await message.answer(
-        "Выберите расписание для удаления:",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons)
-    )
+    await callback.message.edit_text("Выберите расписание для удаления:", reply_markup=markup)
+    await callback.answer()
 
-@admin_router.callback_query(F.data == "admin_back")
+@callback_router.handler(Op.ADMIN_BACK)
 async def admin_back(callback: types.CallbackQuery, state: FSMContext):
     await state.clear()
     await callback.message.answer(
@@ -127,13 +219,13 @@ async def admin_back(callback: types.CallbackQuery, state: FSMContext):
     )
     try:
         await callback.message.delete()
-    except:
-        pass
+    except Exception:
+        # Старое сообщение могло быть уже удалено или слишком старым для удаления
+        metrics.swallowed_exception("admin_back.delete")
     await callback.answer()
 
-@admin_router.callback_query(F.data.startswith("admin_add:"))
-async def admin_add_schedule_section(callback: types.CallbackQuery, state: FSMContext):
-    section_code = callback.data.split(":")[1]
+@callback_router.handler(Op.ADMIN_ADD)
+async def admin_add_schedule_section(callback: types.CallbackQuery, state: FSMContext, section_code: str):
     section_name = get_section_name(section_code)
     
     await state.set_state(AdminStates.ADD_SCHEDULE)
@@ -141,54 +233,190 @@ async def admin_add_schedule_section(callback: types.CallbackQuery, state: FSMCo
     
     await callback.message.edit_text(
         f"Введите текст расписания для раздела {section_name}:",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🔙 Отмена", callback_data="admin_back")]
-        ])
+        reply_markup=ADMIN_CANCEL_KEYBOARD
     )
     await callback.answer()
 
 @admin_router.message(AdminStates.ADD_SCHEDULE)
+async def admin_schedule_text(message: types.Message, state: FSMContext):
+    await state.set_state(AdminStates.ADD_SCHEDULE_TIME)
+    await state.update_data(schedule_text=message.text)
+    
+    await message.answer(
+        f"Когда проходит мероприятие? После окончания оно уйдёт в архив.\n\n{INPUT_HINT}",
+        reply_markup=ADMIN_CANCEL_KEYBOARD
+    )
+
+@admin_router.message(AdminStates.ADD_SCHEDULE_TIME)
 async def admin_save_schedule(message: types.Message, state: FSMContext):
+    try:
+        starts_at, ends_at = parse_period(message.text or "")
+    except ValueError as error:
+        await message.answer(f"⚠️ {error}.\n\n{INPUT_HINT}", reply_markup=ADMIN_CANCEL_KEYBOARD)
+        return
+    if ends_at is not None and ends_at <= time.time():
+        await message.answer("⚠️ Мероприятие уже закончилось, укажите будущую дату.", reply_markup=ADMIN_CANCEL_KEYBOARD)
+        return
+    
     data = await state.get_data()
     section_name = data.get("section_name")
+    schedule_text = data.get("schedule_text")
     
-    add_schedule(section_name, message.text)
+    schedule_id = await catalog.add_schedule(section_name, schedule_text, starts_at=starts_at, ends_at=ends_at)
+    text = f"🔔 Новое расписание в разделе «{_section_title(section_name)}»:\n\n{schedule_text}"
+    if starts_at is not None:
+        text = f"{text}\n\n🗓 {format_period(starts_at, ends_at)}"
+    await broadcaster.enqueue(section_name, schedule_id, text)
     await message.answer("✅ Расписание успешно добавлено!", reply_markup=get_admin_main_keyboard())
     await state.clear()
 
-@admin_router.callback_query(F.data.startswith("admin_manage:"))
-async def admin_show_schedules(callback: types.CallbackQuery, state: FSMContext):
-    section_code = callback.data.split(":")[1]
+MANAGE_LEGEND = (
+    "🗑️ - удалить расписание\n"
+    "✏️ - редактировать 'Подробнее'\n"
+    "👥 - количество мест и записи\n"
+    "🕒 - дата и время проведения"
+)
+
+@callback_router.handler(Op.ADMIN_MANAGE)
+async def admin_show_schedules(callback: types.CallbackQuery, state: FSMContext, section_code: str, before_id: str = None):
     section_name = get_section_name(section_code)
-    schedules = get_schedules(section_name)
+    rows, next_id = await _fetch_page(database.get_schedule_page, section_name, before_id=before_id)
     
-    if not schedules:
-        await callback.answer("Нет расписаний для этого раздела")
+    if not rows:
+        await callback.answer("Нет расписаний для этого раздела" if before_id is None else "Больше расписаний нет")
         return
     
-    buttons = []
-    for schedule_id, schedule_text, details_text in schedules:
-        short_text = schedule_text[:30] + "..." if len(schedule_text) > 30 else schedule_text
-        row = [
-            InlineKeyboardButton(text=f"🗑️ {short_text}", callback_data=f"admin_delete:{schedule_id}"),
-            InlineKeyboardButton(text="✏️ Подробнее", callback_data=f"admin_edit:{schedule_id}")
-        ]
-        buttons.append(row)
-    
-    buttons.append([InlineKeyboardButton(text="🔙 Назад", callback_data="admin_back")])
+    buttons = [_manage_row(schedule_id, _short(schedule_text)) for schedule_id, _, schedule_text in rows]
+    markup = _paged_markup(buttons, Op.ADMIN_MANAGE, (section_code,), before_id is None, next_id)
     
     await callback.message.edit_text(
-        f"Управление расписаниями для раздела {section_name}:\n\n"
-        "🗑️ - удалить расписание\n"
-        "✏️ - редактировать 'Подробнее'",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons)
+        f"Управление расписаниями для раздела {section_name}:\n\n{MANAGE_LEGEND}",
+        reply_markup=markup
     )
     await callback.answer()
 
-@admin_router.callback_query(F.data.startswith("admin_edit:"))
-async def admin_edit_details(callback: types.CallbackQuery, state: FSMContext):
-    schedule_id = int(callback.data.split(":")[1])
-    schedule = get_schedule_by_id(schedule_id)
+async def _search_results(query: str, before_id: str = None):
+    """(текст, клавиатура) страницы результатов поиска или None, если ничего не найдено"""
+    rows, next_id = await _fetch_page(database.search_schedules, query, before_id=before_id)
+    if not rows:
+        return None
+    buttons = [
+        _manage_row(schedule_id, f"{_section_title(section_name)}: {_short(schedule_text)}")
+        for schedule_id, section_name, schedule_text in rows
+    ]
+    markup = _paged_markup(buttons, Op.ADMIN_SEARCH_PAGE, (), before_id is None, next_id)
+    return f"🔎 Расписания по запросу «{query}»:\n\n{MANAGE_LEGEND}", markup
+
+async def _answer_search(message: types.Message, state: FSMContext, query: str):
+    results = await _search_results(query)
+    if results is None:
+        await state.set_state(AdminStates.SEARCH)
+        await message.answer("Ничего не найдено. Попробуйте другие слова:", reply_markup=ADMIN_CANCEL_KEYBOARD)
+        return
+    
+    # Запрос нужен для следующих страниц: в callback_data он может не поместиться
+    await state.set_state(None)
+    await state.update_data(search_query=query)
+    text, markup = results
+    await message.answer(text, reply_markup=markup)
+
+SEARCH_PROMPT = "Введите слова из текста расписания или его «Подробнее»:"
+
+@admin_router.message(Command("find"))
+async def admin_find(message: types.Message, state: FSMContext, command: CommandObject):
+    if not is_admin(message.from_user.id):
+        await message.answer("⛔ Доступ запрещен")
+        return
+    
+    if command.args:
+        await _answer_search(message, state, command.args.strip())
+        return
+    await state.set_state(AdminStates.SEARCH)
+    await message.answer(SEARCH_PROMPT, reply_markup=ADMIN_CANCEL_KEYBOARD)
+
+@admin_router.message(F.text == "🔎 Найти расписание")
+async def search_schedule_handler(message: types.Message, state: FSMContext):
+    await state.set_state(AdminStates.SEARCH)
+    await message.answer(SEARCH_PROMPT, reply_markup=ADMIN_CANCEL_KEYBOARD)
+
+@admin_router.message(AdminStates.SEARCH)
+async def admin_search(message: types.Message, state: FSMContext):
+    await _answer_search(message, state, (message.text or "").strip())
+
+@callback_router.handler(Op.ADMIN_SEARCH_PAGE)
+async def admin_search_page(callback: types.CallbackQuery, state: FSMContext, before_id: str = None):
+    query = (await state.get_data()).get("search_query")
+    results = await _search_results(query, before_id) if query else None
+    if results is None:
+        await callback.answer("Результаты поиска устарели, повторите поиск")
+        return
+    
+    text, markup = results
+    await callback.message.edit_text(text, reply_markup=markup)
+    await callback.answer()
+
+IMPORT_HINT = (
+    "Пришлите файл .csv, .jsonl (объект JSON на строку) или .json (массив объектов) "
+    "с расписаниями. Колонки (ключи JSON):\n"
+    "• section — раздел (например, лекторий)\n"
+    "• schedule_text — текст расписания\n"
+    "• details_text — «Подробнее», можно оставить пустым\n"
+    "• date — дата проведения, пусто или «-» — без даты\n\n"
+    "Файл загружается целиком или не загружается вовсе. "
+    "Пример файла можно получить командой /export.\n\n"
+    f"{INPUT_HINT}"
+)
+
+@admin_router.message(Command("import"))
+async def admin_import(message: types.Message, state: FSMContext):
+    if not is_admin(message.from_user.id):
+        await message.answer("⛔ Доступ запрещен")
+        return
+
+    await state.set_state(AdminStates.IMPORT)
+    await message.answer(IMPORT_HINT, reply_markup=ADMIN_CANCEL_KEYBOARD)
+
+@admin_router.message(AdminStates.IMPORT, F.document)
+async def admin_import_file(message: types.Message, state: FSMContext):
+    document = message.document
+    if document.file_size and document.file_size > schedule_io.MAX_FILE_SIZE:
+        await message.answer("⚠️ Файл больше 20 МБ: Telegram не даёт боту его скачать.", reply_markup=ADMIN_CANCEL_KEYBOARD)
+        return
+
+    with tempfile.TemporaryFile() as stream:
+        await message.bot.download(document, destination=stream)
+        reader = schedule_io.ScheduleReader(stream, schedule_io.detect_format(document.file_name))
+        try:
+            added = await schedule_io.import_schedules(reader)
+        except ValueError:
+            await message.answer(reader.report(), reply_markup=ADMIN_CANCEL_KEYBOARD)
+            return
+
+    # Подписчикам о загруженных пачкой расписаниях не рассылается
+    await message.answer(f"✅ Загружено расписаний: {added}", reply_markup=get_admin_main_keyboard())
+    await state.clear()
+
+@admin_router.message(AdminStates.IMPORT)
+async def admin_import_not_file(message: types.Message):
+    await message.answer("Пришлите файл .csv, .jsonl или .json документом.", reply_markup=ADMIN_CANCEL_KEYBOARD)
+
+@admin_router.message(Command("export"))
+async def admin_export(message: types.Message, command: CommandObject):
+    if not is_admin(message.from_user.id):
+        await message.answer("⛔ Доступ запрещен")
+        return
+
+    file_format = "json" if (command.args or "").strip().lower() in ("json", "jsonl") else "csv"
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"schedules.{'jsonl' if file_format == 'json' else 'csv'}")
+        with open(path, "wb") as stream:
+            count = await schedule_io.export_schedules(stream, file_format)
+        await message.answer_document(FSInputFile(path), caption=f"📤 Расписаний: {count}")
+
+@callback_router.handler(Op.ADMIN_EDIT)
+async def admin_edit_details(callback: types.CallbackQuery, state: FSMContext, schedule_id: str):
+    schedule_id = int(schedule_id)
+    schedule = await catalog.get_schedule_by_id(schedule_id)
     
     if not schedule:
         await callback.answer("Расписание не найдено")
@@ -209,9 +437,7 @@ async def admin_edit_details(callback: types.CallbackQuery, state: FSMContext):
     
     await callback.message.edit_text(
         message_text,
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🔙 Отмена", callback_data=f"admin_back")]
-        ])
+        reply_markup=ADMIN_CANCEL_KEYBOARD
     )
     await callback.answer()
 
@@ -221,38 +447,131 @@ async def admin_save_details(message: types.Message, state: FSMContext):
     schedule_id = data.get("schedule_id")
     new_details = message.text if message.text != "-" else None
     
-    update_schedule_details(schedule_id, new_details)
+    await catalog.update_schedule_details(schedule_id, new_details)
+    entry = catalog.get_entry(schedule_id)
+    if entry is not None:
+        section_name, schedule_text, _ = entry
+        text = f"🔔 Обновлено расписание в разделе «{_section_title(section_name)}»:\n\n{schedule_text}"
+        if new_details:
+            text += f"\n\n{new_details}"
+        await broadcaster.enqueue(section_name, schedule_id, text)
     await message.answer("✅ 'Подробнее' успешно обновлены!", reply_markup=get_admin_main_keyboard())
     await state.clear()
 
-@admin_router.callback_query(F.data.startswith("admin_delete:"))
-async def admin_delete_schedule(callback: types.CallbackQuery):
-    schedule_id = int(callback.data.split(":")[1])
-    delete_schedule(schedule_id)
+@callback_router.handler(Op.ADMIN_CAPACITY)
+async def admin_edit_capacity(callback: types.CallbackQuery, state: FSMContext, schedule_id: str):
+    schedule_id = int(schedule_id)
+    summary = await database.get_registration_summary(schedule_id)
+    
+    if not summary:
+        await callback.answer("Расписание не найдено")
+        return
+    
+    capacity, booked, waiting = summary
+    await state.set_state(AdminStates.SET_CAPACITY)
+    await state.update_data(schedule_id=schedule_id)
+    
+    await callback.message.edit_text(
+        f"Мест: {capacity if capacity is not None else 'без ограничений'}\n"
+        f"Записано: {booked}\n"
+        f"В листе ожидания: {waiting}\n\n"
+        "Введите новое количество мест или отправьте '-' чтобы снять ограничение:",
+        reply_markup=ADMIN_CANCEL_KEYBOARD
+    )
+    await callback.answer()
+
+@admin_router.message(AdminStates.SET_CAPACITY)
+async def admin_save_capacity(message: types.Message, state: FSMContext):
+    text = (message.text or "").strip()
+    if text == "-":
+        capacity = None
+    elif text.isdigit():
+        capacity = int(text)
+    else:
+        await message.answer("Введите целое число мест или '-'", reply_markup=ADMIN_CANCEL_KEYBOARD)
+        return
+    
+    data = await state.get_data()
+    schedule_id = data.get("schedule_id")
+    promoted = await database.set_capacity(schedule_id, capacity)
+    notify_seat_available(message.bot, schedule_id, promoted)
+    
+    answer = "✅ Количество мест обновлено!"
+    if promoted:
+        answer += f"\nИз листа ожидания записано: {len(promoted)}"
+    await message.answer(answer, reply_markup=get_admin_main_keyboard())
+    await state.clear()
+
+@callback_router.handler(Op.ADMIN_TIME)
+async def admin_edit_time(callback: types.CallbackQuery, state: FSMContext, schedule_id: str):
+    schedule_id = int(schedule_id)
+    entry = catalog.get_entry(schedule_id)
+    
+    if entry is None:
+        await callback.answer("Расписание не найдено")
+        return
+    
+    period = catalog.get_period(schedule_id)
+    await state.set_state(AdminStates.EDIT_TIME)
+    await state.update_data(schedule_id=schedule_id)
+    
+    current = format_period(*period) if period else "без даты"
+    await callback.message.edit_text(
+        f"Текущее расписание:\n\n{entry[1]}\n\n🗓 {current}\n\n"
+        f"Введите новую дату проведения.\n\n{INPUT_HINT}",
+        reply_markup=ADMIN_CANCEL_KEYBOARD
+    )
+    await callback.answer()
+
+@admin_router.message(AdminStates.EDIT_TIME)
+async def admin_save_time(message: types.Message, state: FSMContext):
+    try:
+        starts_at, ends_at = parse_period(message.text or "")
+    except ValueError as error:
+        await message.answer(f"⚠️ {error}.\n\n{INPUT_HINT}", reply_markup=ADMIN_CANCEL_KEYBOARD)
+        return
+    
+    data = await state.get_data()
+    schedule_id = data.get("schedule_id")
+    await catalog.update_schedule_time(schedule_id, starts_at, ends_at)
+    # Строки напоминаний уже пересчитаны в базе, в куче — только новые сроки
+    reminders.track(schedule_id)
+    
+    answer = "✅ Дата обновлена!"
+    if ends_at is not None and ends_at <= time.time():
+        answer += "\nМероприятие уже закончилось и будет перенесено в архив."
+    await message.answer(answer, reply_markup=get_admin_main_keyboard())
+    await state.clear()
+
+@callback_router.handler(Op.ADMIN_DELETE)
+async def admin_delete_schedule(callback: types.CallbackQuery, state: FSMContext, schedule_id: str):
+    schedule_id = int(schedule_id)
+    await catalog.delete_schedule(schedule_id)
     await callback.message.edit_text("✅ Расписание успешно удалено!")
     await callback.answer()
 
-@admin_router.callback_query(F.data.startswith("delete_"))
-async def select_schedule_to_delete(callback: types.CallbackQuery, state: FSMContext):
-    schedule_id = int(callback.data.split("_")[1])
+@callback_router.handler(Op.ADMIN_PICK_DELETE)
+async def select_schedule_to_delete(callback: types.CallbackQuery, state: FSMContext, schedule_id: str):
+    schedule_id = int(schedule_id)
     await state.set_state(AdminStates.CONFIRM_DELETE)
     await state.update_data(schedule_id=schedule_id)
     
     await callback.message.edit_text(
         "Вы уверены, что хотите удалить это расписание?",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="✅ Да", callback_data="confirm_delete")],
-            [InlineKeyboardButton(text="❌ Нет", callback_data="admin_back")]
-        ])
+        reply_markup=CONFIRM_DELETE_KEYBOARD
     )
     await callback.answer()
 
-@admin_router.callback_query(F.data == "confirm_delete", AdminStates.CONFIRM_DELETE)
+@callback_router.handler(Op.ADMIN_CONFIRM_DELETE)
 async def confirm_delete(callback: types.CallbackQuery, state: FSMContext):
+    if await state.get_state() != AdminStates.CONFIRM_DELETE.state:
+        await callback.answer()
+        return
+    
     data = await state.get_data()
     schedule_id = data.get("schedule_id")
     
-    delete_schedule_by_id(schedule_id)
+    await catalog.delete_schedule(schedule_id)
     await callback.message.edit_text("✅ Расписание успешно удалено!")
     await state.clear()
     await callback.answer()
\ No newline at end of file
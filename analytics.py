@@ -0,0 +1,217 @@
+"""Статистика просмотров: разделы, расписания, «Подробнее», записи.
+
+Middleware по самому обновлению (текст кнопки раздела или callback_data)
+определяет, что смотрел пользователь, и кладёт короткую запись в кольцевой
+буфер в памяти — обработчик не ждёт базу. Просмотр расписания по
+callback_data не определить (листание хранит курсор в FSM), поэтому его
+учитывает сам обработчик через record_view после отрисовки. Фоновая задача раз в
+flush_interval секунд (или при накоплении batch_size записей) пишет пачку
+одной транзакцией: сырые события и приращения дневных счётчиков
+analytics_daily, поэтому отчёт «топ» читает готовые суммы, а не события.
+Если база не успевает и буфер переполнен, теряются самые старые записи.
+"""
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+
+from aiogram import BaseMiddleware, types
+
+import database
+import settings
+from callbacks import Op, decode
+from catalog import catalog
+from config import ADMINS
+from event_time import TIMEZONE
+from sections import BY_CODE, BY_TITLE
+
+logger = logging.getLogger(__name__)
+
+# Виды событий
+SECTION = "section"
+SCHEDULE = "schedule"
+DETAILS = "details"
+SIGN_UP = "sign_up"
+
+# Кнопка -> вид события; аргумент callback_data (ID расписания) становится ключом
+_CALLBACK_KINDS = {
+    Op.DETAILS: DETAILS,
+    Op.SIGN_UP: SIGN_UP
+}
+
+
+def classify(update: types.Update):
+    """(вид, ключ) для обновления или None, если его не нужно учитывать"""
+    if update.message is not None:
+        section = BY_TITLE.get(update.message.text)
+        return (SECTION, section.code) if section else None
+    if update.callback_query is not None:
+        callback = decode(update.callback_query.data)
+        kind = _CALLBACK_KINDS.get(callback.op) if callback else None
+        if kind is not None and callback.args:
+            return kind, callback.args[0]
+    return None
+
+
+class Analytics:
+    def __init__(self, buffer_size: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 5.0, retention: float = 90 * 24 * 3600):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention = retention
+        # Кольцевой буфер (ts, вид, ключ, user_id): при переполнении вытесняется старое
+        self._buffer = deque(maxlen=buffer_size)
+        self._flush_requested = asyncio.Event()
+        self._task = None
+        # Границы текущих суток в TIMEZONE: день события без datetime на каждую запись
+        self._day = (0.0, 0.0, "")
+        # Метрики
+        self.recorded = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.flush_max = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def record(self, kind: str, key: str, user_id: int):
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append((time.time(), kind, key, user_id))
+        self.recorded += 1
+        if len(self._buffer) >= self.batch_size:
+            self._flush_requested.set()
+
+    def _day_of(self, ts: float) -> str:
+        start, end, day = self._day
+        if not start <= ts < end:
+            local = datetime.fromtimestamp(ts, TIMEZONE)
+            midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+            start = midnight.timestamp()
+            end = (midnight + timedelta(days=1)).timestamp()
+            day = midnight.date().isoformat()
+            self._day = (start, end, day)
+        return day
+
+    async def flush(self):
+        """Записывает накопленные события и дневные суммы одной транзакцией"""
+        if not self._buffer:
+            return
+        events = list(self._buffer)
+        self._buffer.clear()
+        rollups = Counter((kind, self._day_of(ts), key) for ts, kind, key, _ in events)
+        started = time.perf_counter()
+        try:
+            await database.save_analytics(events, [(*key, views) for key, views in rollups.items()])
+        except Exception:
+            # Вернём события в начало буфера; не поместившиеся пропадут
+            space = self._buffer.maxlen - len(self._buffer)
+            self.dropped += max(0, len(events) - space)
+            self._buffer.extendleft(reversed(events[-space:] if space else []))
+            raise
+        self.flushed += len(events)
+        self.flush_max = max(self.flush_max, time.perf_counter() - started)
+
+    async def _flush_loop(self):
+        last_purge = 0.0
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+                if time.monotonic() - last_purge > 3600:
+                    last_purge = time.monotonic()
+                    now = time.time()
+                    await database.purge_analytics(now - self.retention, self._day_of(now - self.retention))
+            except Exception:
+                logger.exception("Не удалось сохранить статистику просмотров")
+
+    async def top(self, kind: str, days: int, limit: int) -> list:
+        """[(ключ, просмотров), ...] за последние days дней, включая ещё не записанные"""
+        await self.flush()
+        since = self._day_of(time.time() - (days - 1) * 86400)
+        return await database.get_analytics_top(kind, since, limit)
+
+    def stats(self) -> dict:
+        return {
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "buffered": len(self._buffer),
+            "dropped": self.dropped,
+            "flush_max": self.flush_max
+        }
+
+
+def record_view(kind: str, key, user_id: int):
+    """Учитывает просмотр из обработчика — то, что бот действительно показал"""
+    if user_id not in ADMINS:
+        analytics.record(kind, str(key), user_id)
+
+
+class AnalyticsMiddleware(BaseMiddleware):
+    """Внешний middleware для dp.update: учитывает просмотр до обработчика"""
+
+    def __init__(self, recorder: Analytics):
+        self.recorder = recorder
+
+    async def __call__(self, handler, event, data):
+        event_user = data.get("event_from_user")
+        if event_user is not None and event_user.id not in ADMINS:
+            kind = classify(event)
+            if kind is not None:
+                self.recorder.record(*kind, event_user.id)
+        return await handler(event, data)
+
+
+def _section_label(code: str) -> str:
+    section = BY_CODE.get(code)
+    return section.title if section else code
+
+
+def _schedule_label(key: str) -> str:
+    entry = catalog.get_entry(int(key)) if key.isdigit() else None
+    if entry is None:
+        return f"#{key} (прошло или удалено)"
+    text = entry[1].split("\n", 1)[0]
+    return text[:40] + "..." if len(text) > 40 else text
+
+
+# Разделы отчёта: вид события, заголовок, подпись ключа
+_REPORT = (
+    (SECTION, "Открытия разделов", _section_label),
+    (SCHEDULE, "Просмотры расписаний", _schedule_label),
+    (DETAILS, "Просмотры «Подробнее»", _schedule_label),
+    (SIGN_UP, "Записи на мероприятия", _schedule_label)
+)
+
+
+async def format_top(days: int, limit: int) -> str:
+    """Отчёт /top: самые популярные разделы и мероприятия за days дней"""
+    lines = [f"📈 Популярное за {days} дн."]
+    for kind, title, label in _REPORT:
+        rows = await analytics.top(kind, days, limit)
+        lines.append(f"\n{title}:")
+        lines.extend(f"{index}. {label(key)} — {views}" for index, (key, views) in enumerate(rows, 1))
+        if not rows:
+            lines.append("нет данных")
+    return "\n".join(lines)[:4000]
+
+
+analytics = Analytics(
+    settings.ANALYTICS_BUFFER,
+    settings.ANALYTICS_BATCH,
+    settings.ANALYTICS_FLUSH_INTERVAL,
+    settings.ANALYTICS_RETENTION_DAYS * 24 * 3600
+)
@@ -0,0 +1,91 @@
+"""Списки расписаний в админ-панели на большом каталоге.
+
+Сравнивает прежний список «всё одним сообщением» (get_all_schedules) со
+страницами по ключу (get_schedule_page): первая, средняя и последняя
+страница должны стоить одинаково. Отдельно — поиск FTS5 по частому и
+редкому слову и по началу слова.
+Запуск: python -m benchmarks.bench_admin_lists [--rows N]
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import time
+
+from benchmarks.common import describe, use_config
+
+config = use_config()
+
+import database  # noqa: E402
+from sections import SECTIONS  # noqa: E402
+
+WORDS = ["лекция", "семинар", "супервизия", "тренинг", "интервизия", "встреча", "практикум", "курс"]
+
+
+def fill(rows: int):
+    conn = sqlite3.connect(config.DATABASE_NAME)
+    rng = random.Random(5)
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO sections (name) VALUES (?)", ((section.name,) for section in SECTIONS))
+        section_ids = [row[0] for row in conn.execute("SELECT id FROM sections")]
+        conn.executemany(
+            "INSERT INTO schedules (section_id, schedule_text, details_text) VALUES (?, ?, ?)",
+            (
+                (
+                    rng.choice(section_ids),
+                    f"{rng.choice(WORDS).capitalize()} №{index}: " + "описание " * 8,
+                    "ведущий Соколов" if index == rows // 2 else None if index % 3 else "подробности " * 10
+                )
+                for index in range(rows)
+            )
+        )
+    conn.close()
+
+
+async def timed_async(func, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    await database.init_db()
+    started = time.perf_counter()
+    fill(args.rows)
+    print(f"Расписаний: {args.rows}, вставка с индексом FTS5: {time.perf_counter() - started:.1f} с")
+
+    full = await timed_async(database.get_all_schedules, 5)
+    print(f"\nВесь список одним запросом ({args.rows} кнопок в одном сообщении): {describe(full)}")
+
+    section = SECTIONS[0].name
+    cursors = {"первая": database.FIRST_PAGE}
+    ids = sorted((row[0] for row in await database.get_all_schedules()), reverse=True)
+    cursors["средняя"] = ids[len(ids) // 2]
+    cursors["последняя"] = ids[-11]
+    for name, before_id in cursors.items():
+        samples = await timed_async(lambda: database.get_schedule_page(None, before_id, 11), args.repeat)
+        print(f"  {name} страница всех разделов:  {describe(samples)}")
+        samples = await timed_async(lambda: database.get_schedule_page(section, before_id, 11), args.repeat)
+        print(f"  {name} страница раздела:        {describe(samples)}")
+
+    print()
+    for query in ("семинар", "соколов", "супер", "лекция описание"):
+        found = len(await database.search_schedules(query, database.FIRST_PAGE, 11))
+        samples = await timed_async(lambda: database.search_schedules(query, database.FIRST_PAGE, 11), args.repeat)
+        print(f"  поиск «{query}» (на странице {found}): {describe(samples)}")
+    deep = await timed_async(lambda: database.search_schedules("семинар", cursors["средняя"], 11), args.repeat)
+    print(f"  поиск «семинар», страница с середины: {describe(deep)}")
+
+    await database.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
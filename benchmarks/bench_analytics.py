@@ -0,0 +1,148 @@
+"""Статистика просмотров: цена для обработчика, запись пачками и отчёт.
+
+1. Сколько middleware добавляет к каждому обновлению и сколько стоила бы
+   синхронная запись события в базу прямо в обработчике.
+2. Поток событий быстрее записи: скорость фоновой записи пачками и потери
+   при переполнении кольцевого буфера.
+3. Отчёт «топ за 7 и 90 дней» по дневным суммам против GROUP BY по сырым
+   событиям на истории в несколько миллионов событий.
+Запуск: python -m benchmarks.bench_analytics [--events N] [--history N]
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import time
+from datetime import datetime
+
+from benchmarks.common import describe, use_config
+
+config = use_config(ANALYTICS_FLUSH_INTERVAL=0.5)
+
+from aiogram.types import Update  # noqa: E402
+
+import database  # noqa: E402
+from analytics import DETAILS, SECTION, Analytics, AnalyticsMiddleware  # noqa: E402
+from benchmarks.updates import generate  # noqa: E402
+from event_time import TIMEZONE  # noqa: E402
+
+
+async def noop(event, data):
+    return None
+
+
+async def middleware_cost(updates: list) -> tuple:
+    recorder = Analytics(buffer_size=len(updates) + 1, batch_size=len(updates) + 1)
+    middleware = AnalyticsMiddleware(recorder)
+    started = time.perf_counter()
+    for update in updates:
+        await middleware(noop, update, {"event_from_user": (update.message or update.callback_query).from_user})
+    per_update = (time.perf_counter() - started) / len(updates) * 1e6
+    return per_update, recorder.recorded
+
+
+async def sync_insert_cost(samples: int) -> list:
+    timings = []
+    for index in range(samples):
+        started = time.perf_counter()
+        await database.save_analytics([(time.time(), SECTION, "events", index)], [(SECTION, "2099-01-01", "events", 1)])
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def burst(events: int, rate: float, buffer_size: int, batch_size: int) -> dict:
+    """events событий с темпом rate в секунду (0 — без пауз, быстрее записи)"""
+    recorder = Analytics(buffer_size=buffer_size, batch_size=batch_size, flush_interval=0.5)
+    recorder.start()
+    started = time.perf_counter()
+    for index in range(events):
+        recorder.record(DETAILS, str(index % 2000), index)
+        # Обработчики уступают event loop между обновлениями
+        if index % 100 == 0:
+            delay = started + index / rate - time.perf_counter() if rate else 0
+            await asyncio.sleep(max(0, delay))
+    produced = time.perf_counter() - started
+    await recorder.close()
+    elapsed = time.perf_counter() - started
+    return {**recorder.stats(), "produced": produced, "elapsed": elapsed}
+
+
+def fill_history(events: int, days: int):
+    """Сырые события и согласованные с ними дневные суммы за days дней"""
+    rng = random.Random(3)
+    conn = sqlite3.connect(config.DATABASE_NAME)
+    now = time.time()
+    daily = {}
+    with conn:
+        rows = []
+        for index in range(events):
+            ts = now - rng.random() * days * 86400
+            key = str(int(rng.paretovariate(1.2)) % 3000)
+            day = datetime.fromtimestamp(ts, TIMEZONE).date().isoformat()
+            rows.append((ts, DETAILS, key, index % 50000))
+            daily[(DETAILS, day, key)] = daily.get((DETAILS, day, key), 0) + 1
+            if len(rows) == 100000:
+                conn.executemany("INSERT INTO analytics_events VALUES (?, ?, ?, ?)", rows)
+                rows = []
+        conn.executemany("INSERT INTO analytics_events VALUES (?, ?, ?, ?)", rows)
+        conn.executemany(
+            "INSERT INTO analytics_daily VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (kind, day, key) DO UPDATE SET views = views + excluded.views",
+            ((kind, day, key, views) for (kind, day, key), views in daily.items())
+        )
+    conn.close()
+    return len(daily)
+
+
+async def timed_async(func, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--history", type=int, default=3000000)
+    args = parser.parse_args()
+
+    await database.init_db()
+
+    updates = [Update.model_validate(raw) for raw in generate(args.updates, schedule_ids=range(1, 500))]
+    per_update, recorded = await middleware_cost(updates)
+    print(f"Middleware: {per_update:.2f} мкс на обновление ({recorded} событий из {len(updates)} обновлений)")
+    print(f"Синхронная запись события в обработчике: {describe(await sync_insert_cost(500))}")
+
+    for rate, buffer_size in ((20000, 10000), (0, 10000), (0, 1000)):
+        result = await burst(args.events, rate, buffer_size, 500)
+        print(f"\nПоток {args.events} событий ({f'{rate} в секунду' if rate else 'без пауз'}), буфер {buffer_size}: "
+              f"выдано за {result['produced']:.2f} с, "
+              f"записано {result['flushed']} за {result['elapsed']:.2f} с "
+              f"({result['flushed'] / result['elapsed']:.0f} событий/с), потеряно {result['dropped']}, "
+              f"самая долгая пачка {result['flush_max'] * 1000:.1f} мс")
+
+    started = time.perf_counter()
+    rollup_rows = fill_history(args.history, 90)
+    print(f"\nИстория: {args.history} событий за 90 дней, дневных сумм {rollup_rows} "
+          f"(заполнение {time.perf_counter() - started:.0f} с)")
+    recorder = Analytics()
+    for days in (7, 90):
+        since = time.time() - days * 86400
+        rollup = await timed_async(lambda: recorder.top(DETAILS, days, 10), 20)
+        raw = await timed_async(lambda: database._run(database._fetchall, '''
+            SELECT key, COUNT(*) AS total FROM analytics_events
+            WHERE kind = ? AND ts >= ?
+            GROUP BY key ORDER BY total DESC LIMIT 10
+        ''', (DETAILS, since)), 3)
+        print(f"  топ за {days} дн. по дневным суммам: {describe(rollup)}")
+        print(f"  топ за {days} дн. по сырым событиям: {describe(raw)}")
+
+    await database.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
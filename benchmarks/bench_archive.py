@@ -0,0 +1,112 @@
+"""Листание расписаний при растущей истории прошедших мероприятий.
+
+В базу добавляются всё новые завершившиеся мероприятия при неизменном числе
+предстоящих. Для каждого объёма истории измеряется выборка раздела из базы
+до архивации (история ещё в schedules) и после неё, время самой архивации
+и листание через каталог. После архивации стоимость не должна зависеть
+от объёма истории.
+Запуск: python -m benchmarks.bench_archive [--history 0,10000,100000] [--upcoming N]
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import time
+
+from benchmarks.common import describe, percentile, use_config
+
+config = use_config()
+
+import database  # noqa: E402
+from catalog import catalog  # noqa: E402
+from sections import SECTIONS  # noqa: E402
+
+DAY = 86400
+
+
+def insert_events(count: int, now: float, past: bool, offset: int):
+    """Добавляет count мероприятий, завершившихся (past) или предстоящих"""
+    conn = sqlite3.connect(config.DATABASE_NAME)
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO sections (name) VALUES (?)", ((section.name,) for section in SECTIONS))
+    section_ids = [row[0] for row in conn.execute("SELECT id FROM sections")]
+    rng = random.Random(offset)
+    rows = []
+    for index in range(count):
+        starts_at = now + (-1 if past else 1) * rng.uniform(DAY, 365 * DAY)
+        rows.append((
+            rng.choice(section_ids),
+            f"Мероприятие №{offset + index}: " + "описание " * 10,
+            None if index % 3 else "подробности " * 20,
+            starts_at,
+            starts_at + 2 * 3600
+        ))
+    with conn:
+        conn.executemany(
+            "INSERT INTO schedules (section_id, schedule_text, details_text, starts_at, ends_at) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+    conn.close()
+
+
+async def timed_async(func, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", default="0,10000,100000", help="объёмы истории через запятую")
+    parser.add_argument("--upcoming", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    await database.init_db()
+    now = time.time()
+    insert_events(args.upcoming, now, past=False, offset=0)
+
+    section_names = [section.name for section in SECTIONS]
+    added = 0
+    for history in map(int, args.history.split(",")):
+        insert_events(history - added, now, past=True, offset=args.upcoming + added)
+        added = history
+
+        before = await timed_async(lambda: database.get_schedules(random.choice(section_names)), args.repeat)
+
+        started = time.perf_counter()
+        archived = 0
+        while True:
+            moved = await database.archive_finished(time.time())
+            if not moved:
+                break
+            archived += moved
+        archive_seconds = time.perf_counter() - started
+
+        after = await timed_async(lambda: database.get_schedules(random.choice(section_names)), args.repeat)
+
+        await catalog.load()
+        paging = []
+        for _ in range(args.repeat):
+            section_name = random.choice(section_names)
+            started = time.perf_counter()
+            position = await catalog.locate(section_name)
+            if position is not None:
+                await catalog.locate(section_name, position[2][0], 1)
+            paging.append((time.perf_counter() - started) * 1000)
+
+        print(f"\nИстория: {history} прошедших, предстоящих: {args.upcoming}, в архиве: {await database.count_archived()}")
+        print(f"  выборка раздела из базы до архивации:   {describe(before)}")
+        print(f"  архивация {archived} строк: {archive_seconds:.2f} с")
+        print(f"  выборка раздела из базы после архивации: {describe(after)}")
+        print(f"  листание через каталог: p50={percentile(paging, 0.5) * 1000:.1f} мкс "
+              f"p99={percentile(paging, 0.99) * 1000:.1f} мкс")
+
+    await database.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
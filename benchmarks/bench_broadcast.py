@@ -0,0 +1,93 @@
+"""Рассылка подписчикам через поддельный Bot API с лимитами Telegram.
+
+Поддельный сервер отвечает 429 при превышении лимита и 403 для части
+пользователей («заблокировали бота»). Посередине рассылки движок
+останавливается, как при падении процесса, и новый экземпляр продолжает
+задание из базы. Отчёт: скорость относительно лимита, число 429, повторы
+после перезапуска и удалённые подписки заблокировавших.
+Запуск: python -m benchmarks.bench_broadcast [--subscribers N] [--rate R]
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+from benchmarks.common import use_config
+from benchmarks.fake_bot_api import FakeBotAPI
+
+
+async def wait_done(database, job_id: int):
+    while True:
+        job = next(job for job in await database.get_broadcast_jobs(10) if job[0] == job_id)
+        if job[2] == "done":
+            return job
+        await asyncio.sleep(0.1)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--rate", type=int, default=300, help="общий лимит сообщений в секунду")
+    parser.add_argument("--blocked-every", type=int, default=20, help="каждый N-й подписчик заблокировал бота")
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    user_ids = list(range(1, args.subscribers + 1))
+    blocked = set(user_ids[::args.blocked_every])
+    api = FakeBotAPI(
+        latency=args.latency,
+        enforce_limits=True,
+        global_rate=args.rate,
+        blocked_chats=blocked
+    )
+    api_url = await api.start()
+    use_config(BOT_API_URL=api_url, RATE_LIMIT_GLOBAL=args.rate)
+
+    import database
+    import main as bot_main
+    from broadcast import BroadcastEngine, format_report
+    from sections import SECTIONS
+
+    section_name = SECTIONS[0].name
+    await database.init_db()
+    await database.add_subscriptions(section_name, user_ids)
+
+    engine = BroadcastEngine(batch_size=100, poll_interval=0.2)
+    engine.start(bot_main.bot)
+    started = time.monotonic()
+    job_id = await engine.enqueue(section_name, None, "🔔 Новое расписание: бенчмарк рассылки")
+
+    # «Падение» на середине: задача отменяется, прогресс последней пачки теряется
+    while api.count("sendMessage") < args.subscribers // 2:
+        await asyncio.sleep(0.05)
+    await engine.close()
+    restarted = BroadcastEngine(batch_size=100, poll_interval=0.2)
+    restarted.start(bot_main.bot)
+    job = await wait_done(database, job_id)
+    elapsed = time.monotonic() - started
+    await restarted.close()
+
+    deliveries = Counter(
+        request.chat_id for request in api.requests
+        if request.method == "sendMessage" and request.chat_id not in blocked
+    )
+    duplicates = sum(count - 1 for count in deliveries.values())
+    remaining = await database.count_subscribers(section_name)
+
+    print(f"Подписчиков: {args.subscribers}, заблокировали бота: {len(blocked)}, лимит: {args.rate} сообщ./с")
+    print(f"Время: {elapsed:.1f} с, {sum(deliveries.values()) / elapsed:.0f} сообщ./с "
+          f"(потолок с учётом 403: {args.rate * (1 - 1 / args.blocked_every):.0f})")
+    print(f"Доставлено уникальным: {len(deliveries)} из {args.subscribers - len(blocked)}, "
+          f"повторов после перезапуска: {duplicates}")
+    print(f"Ответов 429: {api.rejected}, подписок осталось: {remaining}")
+    print(f"Счётчики задания: отправлено {job[4]}, ошибок {job[5]}, заблокировали {job[6]}")
+    print()
+    print(await format_report())
+
+    await bot_main.bot.session.close()
+    await database.close()
+    await api.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
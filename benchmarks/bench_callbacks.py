@@ -0,0 +1,127 @@
+"""Диспетчеризация inline-кнопок: цепочка фильтров startswith против таблицы.
+
+Синтетические callback_query прогоняются через настоящий aiogram Dispatcher
+с пустыми обработчиками, так что замеряется только выбор обработчика.
+Запуск: python -m benchmarks.bench_callbacks [количество]
+"""
+import asyncio
+import random
+import sys
+import time
+
+from benchmarks.common import use_config
+
+use_config()
+
+from aiogram import Bot, Dispatcher, F, Router  # noqa: E402
+from aiogram.fsm.state import State, StatesGroup  # noqa: E402
+from aiogram.types import Update  # noqa: E402
+
+from callbacks import CallbackRouter, Op, encode  # noqa: E402
+from sections import SECTIONS  # noqa: E402
+
+
+class ConfirmState(StatesGroup):
+    CONFIRM_DELETE = State()
+
+
+async def noop(callback, *args, **kwargs):
+    return None
+
+
+def legacy_dispatcher() -> Dispatcher:
+    """Фильтры в том порядке, в каком они были зарегистрированы до кодека"""
+    dp = Dispatcher()
+    admin = Router()
+    admin.callback_query.register(noop, F.data == "admin_back")
+    admin.callback_query.register(noop, F.data.startswith("admin_add:"))
+    admin.callback_query.register(noop, F.data.startswith("admin_manage:"))
+    admin.callback_query.register(noop, F.data.startswith("admin_edit:"))
+    admin.callback_query.register(noop, F.data.startswith("admin_delete:"))
+    admin.callback_query.register(noop, F.data.startswith("delete_"))
+    admin.callback_query.register(noop, F.data == "confirm_delete", ConfirmState.CONFIRM_DELETE)
+    dp.include_router(admin)
+    dp.callback_query.register(noop, F.data.startswith("schedule_"))
+    dp.callback_query.register(noop, F.data.startswith("nav_"))
+    dp.callback_query.register(noop, F.data.startswith("view_details_"))
+    dp.callback_query.register(noop, F.data == "back_to_schedule")
+    dp.callback_query.register(noop, F.data.startswith("nav_back_"))
+    dp.callback_query.register(noop, F.data.startswith("back_to_"))
+    return dp
+
+
+def table_dispatcher() -> Dispatcher:
+    router = CallbackRouter()
+    for op in vars(Op).values():
+        if isinstance(op, str) and len(op) == 1:
+            router.handler(op)(noop)
+    dp = Dispatcher()
+    dp.callback_query.register(router.dispatch)
+    return dp
+
+
+def legacy_data(rng: random.Random) -> str:
+    section = rng.choice(SECTIONS).name
+    schedule_id = rng.randrange(1, 10_000)
+    return rng.choice([
+        f"schedule_{section}", f"nav_next_{section}", f"nav_prev_{section}", f"nav_next_{section}",
+        f"view_details_{schedule_id}", "back_to_schedule", f"back_to_{section}",
+        f"admin_manage:{section}", f"delete_{schedule_id}",
+    ])
+
+
+def table_data(rng: random.Random) -> str:
+    code = rng.choice(SECTIONS).code
+    schedule_id = rng.randrange(1, 10_000)
+    return rng.choice([
+        encode(Op.SCHEDULE, code), encode(Op.NEXT, code), encode(Op.PREV, code), encode(Op.NEXT, code),
+        encode(Op.DETAILS, schedule_id), encode(Op.BACK_TO_SCHEDULE), encode(Op.BACK_TO_SECTION, code),
+        encode(Op.ADMIN_MANAGE, code), encode(Op.ADMIN_PICK_DELETE, schedule_id),
+    ])
+
+
+def make_updates(make_data, count: int) -> list:
+    rng = random.Random(7)
+    updates = []
+    for update_id in range(count):
+        user_id = rng.randrange(1, 1000)
+        updates.append(Update.model_validate({
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": {"id": user_id, "is_bot": False, "first_name": "U"},
+                "chat_instance": "bench",
+                "data": make_data(rng),
+                "message": {
+                    "message_id": 1,
+                    "date": 0,
+                    "chat": {"id": user_id, "type": "private"},
+                    "text": "x"
+                }
+            }
+        }))
+    return updates
+
+
+async def measure(title: str, dp: Dispatcher, updates: list, bot: Bot):
+    started = time.perf_counter()
+    for update in updates:
+        await dp.feed_update(bot, update)
+    elapsed = time.perf_counter() - started
+    print(f"{title}: {elapsed / len(updates) * 1e6:.1f} мкс/callback, {len(updates) / elapsed:.0f} callback/с")
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    bot = Bot(token="123456:BENCHMARK-TOKEN")
+    try:
+        for data in (table_data(random.Random(i)) for i in range(100)):
+            assert len(data.encode("utf-8")) <= 64
+        await measure("Цепочка startswith", legacy_dispatcher(), make_updates(legacy_data, count), bot)
+        await measure("Таблица операций  ", table_dispatcher(), make_updates(table_data, count), bot)
+    finally:
+        await bot.session.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+"""Масштабирование режима с несколькими воркерами (cluster.py).
+
+Для каждого числа воркеров поднимается приёмник с воркерами в отдельных
+процессах, на него POST-запросами отправляются одни и те же обновления,
+а запросы бота к Bot API принимает поддельный сервер. Пропускная способность
+считается от первого отправленного обновления до последнего запроса к API.
+Прирост упирается в число ядер: на одном ядре воркеры только делят его.
+Запуск: python -m benchmarks.bench_cluster [--workers 1 2 4] [--updates N]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import time
+
+from benchmarks.common import write_config
+from benchmarks.fake_bot_api import FakeBotAPI
+
+SECRET = "benchmark-secret"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _run_cluster(workers: int):
+    import main
+    from cluster import run_cluster
+
+    asyncio.run(run_cluster(main.dp, main.bot, workers))
+
+
+async def _wait_idle(api: FakeBotAPI, quiet: float = 1.0):
+    """Ждёт, пока к поддельному API не перестанут приходить запросы"""
+    count = -1
+    while count != len(api.requests):
+        count = len(api.requests)
+        await asyncio.sleep(quiet)
+
+
+async def _post_all(session, url: str, updates: list, concurrency: int):
+    queue = list(reversed(updates))
+
+    async def client():
+        while queue:
+            update = queue.pop()
+            async with session.post(url, json=update, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}) as response:
+                await response.read()
+                assert response.status == 200, response.status
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+
+
+async def _measure(api: FakeBotAPI, workers: int, url: str, warmup: list, updates: list, concurrency: int) -> float:
+    from aiohttp import ClientSession, ClientError
+
+    process = multiprocessing.get_context("spawn").Process(target=_run_cluster, args=(workers,))
+    process.start()
+    try:
+        async with ClientSession() as session:
+            while True:
+                try:
+                    await _post_all(session, url, warmup, 1)
+                    break
+                except ClientError:
+                    await asyncio.sleep(0.2)
+            # Прогрев: воркеры запустились и обработали первые обновления
+            await _wait_idle(api)
+
+            first = len(api.requests)
+            started = time.monotonic()
+            await _post_all(session, url, updates, concurrency)
+            await _wait_idle(api, quiet=0.5)
+            finished = api.requests[-1].at if len(api.requests) > first else time.monotonic()
+            return len(updates) / (finished - started)
+    finally:
+        process.terminate()
+        await asyncio.get_running_loop().run_in_executor(None, process.join)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--updates", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    api = FakeBotAPI()
+    api_url = await api.start()
+    port = _free_port()
+    write_config(
+        BOT_API_URL=api_url,
+        RATE_LIMIT_GLOBAL=1e6,
+        RATE_LIMIT_CHAT=1e6,
+        WEBHOOK_URL=f"http://127.0.0.1:{port}",
+        WEBHOOK_SECRET=SECRET,
+        WEBAPP_HOST="127.0.0.1",
+        WEBAPP_PORT=port
+    )
+
+    import database
+    import settings
+    from benchmarks import updates as update_generator
+
+    await database.init_db()
+    schedule_ids = await update_generator.seed_catalog()
+    await database.close()
+
+    # Прогрев затрагивает пользователей из основной выборки, чтобы все шарды были заняты
+    warmup = update_generator.generate(200, users=100, schedule_ids=schedule_ids, seed=2)
+    updates = update_generator.generate(args.updates, users=1000, schedule_ids=schedule_ids)
+    url = f"http://127.0.0.1:{port}{settings.WEBHOOK_PATH}"
+
+    print(f"Обновлений: {len(updates)}, параллельных клиентов: {args.concurrency}, ядер: {os.cpu_count()}")
+    baseline = None
+    for workers in args.workers:
+        throughput = await _measure(api, workers, url, warmup, updates, args.concurrency)
+        baseline = baseline or throughput
+        print(f"Воркеров: {workers:2d}  {throughput:7.0f} обновлений/с  x{throughput / baseline:.2f}")
+
+    await api.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
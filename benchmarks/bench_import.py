@@ -0,0 +1,122 @@
+"""Загрузка расписаний файлом против добавления по одному.
+
+По одному — как в админ-панели: catalog.add_schedule, отдельный коммит и
+новый снимок каталога на каждую строку. Файлом — schedule_io: потоковое
+чтение CSV/JSON Lines, executemany в одной транзакции, один load каталога.
+Отдельно — файл с ошибкой в последней строке (откат всей загрузки) и выгрузка.
+Запуск: python -m benchmarks.bench_import [--rows N] [--single N]
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import random
+import tempfile
+import time
+
+from benchmarks.common import use_config
+
+use_config()
+
+import database  # noqa: E402
+import schedule_io  # noqa: E402
+from catalog import catalog  # noqa: E402
+from sections import SECTIONS  # noqa: E402
+
+
+def make_rows(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        day = 1 + index % 28
+        month = 1 + index // 28 % 12
+        rows.append({
+            "section": rng.choice(SECTIONS).name,
+            "schedule_text": f"Лекция №{index}: " + "описание " * 8,
+            "details_text": "" if index % 3 else "подробности " * 10,
+            "date": f"{day:02}.{month:02}.2099 {10 + index % 8}:00-{12 + index % 8}:00" if index % 5 else "-"
+        })
+    return rows
+
+
+def write_file(rows: list, file_format: str):
+    stream = tempfile.TemporaryFile()
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if file_format == "csv":
+        writer = csv.DictWriter(text, schedule_io.FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        text.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+    text.flush()
+    text.detach()
+    stream.seek(0)
+    return stream
+
+
+async def count_schedules() -> int:
+    return (await database._run(database._fetchone, "SELECT COUNT(*) FROM schedules"))[0]
+
+
+async def import_file(rows: list, file_format: str) -> tuple:
+    stream = write_file(rows, file_format)
+    reader = schedule_io.ScheduleReader(stream, file_format)
+    started = time.perf_counter()
+    try:
+        added = await schedule_io.import_schedules(reader)
+    except ValueError:
+        added = 0
+    return added, time.perf_counter() - started, reader
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--single", type=int, default=2000, help="сколько строк добавлять по одному")
+    args = parser.parse_args()
+
+    await database.init_db()
+    await catalog.load()
+
+    rows = make_rows(args.rows, 1)
+    started = time.perf_counter()
+    for row in rows[:args.single]:
+        starts_at, ends_at = schedule_io.parse_period(row["date"])
+        await catalog.add_schedule(row["section"], row["schedule_text"], row["details_text"] or None, starts_at, ends_at)
+    single = time.perf_counter() - started
+    print(f"По одному (catalog.add_schedule): {args.single} строк за {single:.2f} с, "
+          f"{args.single / single:.0f} строк/с")
+
+    for file_format in ("csv", "json"):
+        before = await count_schedules()
+        added, elapsed, _ = await import_file(rows, file_format)
+        assert await count_schedules() == before + added == before + args.rows
+        print(f"Файлом {file_format}: {added} строк за {elapsed:.2f} с, {added / elapsed:.0f} строк/с "
+              f"(×{added / elapsed / (args.single / single):.1f}), версия каталога {catalog.version}")
+
+    broken = make_rows(args.rows, 2)
+    broken[-1]["section"] = "нет_такого"
+    before = await count_schedules()
+    added, elapsed, reader = await import_file(broken, "csv")
+    assert await count_schedules() == before and not added
+    print(f"Файл с ошибкой в последней строке: откат за {elapsed:.2f} с, в базе без изменений; {reader.errors}")
+
+    total = await count_schedules()
+    for file_format in ("csv", "json"):
+        with tempfile.TemporaryFile() as stream:
+            started = time.perf_counter()
+            count = await schedule_io.export_schedules(stream, file_format)
+            elapsed = time.perf_counter() - started
+            size = stream.tell()
+            # Выгрузка загружается обратно без ошибок
+            stream.seek(0)
+            reader = schedule_io.ScheduleReader(stream, file_format)
+            assert sum(1 for _ in reader) == count == total
+        print(f"Выгрузка {file_format}: {count} строк, {size / 1024:.0f} КБ за {elapsed:.2f} с")
+
+    await database.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,148 @@
+"""Встроенный поиск (@бот слова) на 100 000 расписаний.
+
+Запросы проходят через настоящий обработчик (Dispatcher, answerInlineQuery
+в поддельный Bot API без задержки), замеряется время обработки одного
+обновления. Сценарии: холодные запросы (кэш пуст), поток популярных
+запросов с распределением Ципфа, пролистывание страниц next_offset и тот
+же поток, когда каталог меняется каждые 100 запросов. Отдельно — сам
+поиск без сборки ответа при промахе и попадании в кэш.
+Запуск: python -m benchmarks.bench_inline [--rows N] [--queries N]
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import sqlite3
+import time
+
+from benchmarks.common import describe, use_config
+from benchmarks.fake_bot_api import FakeBotAPI
+
+WORDS = ["лекция", "семинар", "супервизия", "тренинг", "интервизия", "встреча", "практикум", "курс"]
+TOPICS = ["тревога", "горе", "пары", "дети", "подростки", "выгорание", "травма", "границы", "стыд", "гнев",
+          "зависимость", "самооценка", "кризис", "семья", "одиночество", "страх", "утрата", "сон", "стресс", "работа"]
+HOSTS = ["Соколов", "Иванова", "Петров", "Смирнова", "Кузнецов", "Попова", "Васильев", "Морозова"]
+
+
+def fill(database_name: str, rows: int):
+    rng = random.Random(5)
+    now = time.time()
+    conn = sqlite3.connect(database_name)
+    with conn:
+        section_ids = [row[0] for row in conn.execute("SELECT id FROM sections")]
+        conn.executemany(
+            "INSERT INTO schedules (section_id, schedule_text, details_text, starts_at, ends_at) VALUES (?, ?, ?, ?, ?)",
+            (
+                (
+                    rng.choice(section_ids),
+                    f"{rng.choice(WORDS).capitalize()} «{rng.choice(TOPICS).capitalize()}» №{index}",
+                    f"Ведущий {rng.choice(HOSTS)}. " + "описание " * 6 if index % 3 else None,
+                    start,
+                    start + 7200
+                )
+                for index, start in ((index, now + 86400 + rng.random() * 180 * 86400) for index in range(rows))
+            )
+        )
+    conn.close()
+
+
+def query_pool(rng: random.Random) -> list:
+    """Запросы от узких к широким: тема, тема и формат, ведущий, начало слова"""
+    pool = [topic for topic in TOPICS]
+    pool += [f"{word} {topic}" for word in WORDS for topic in TOPICS]
+    pool += [host.lower() for host in HOSTS]
+    pool += [topic[:3] for topic in TOPICS]
+    rng.shuffle(pool)
+    return pool
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=3000)
+    args = parser.parse_args()
+
+    api = FakeBotAPI(latency=0)
+    api_url = await api.start()
+    config = use_config(BOT_API_URL=api_url, RATE_LIMIT_GLOBAL=100000, RATE_LIMIT_CHAT=100000)
+
+    from aiogram.types import Update
+
+    import database
+    import main as bot_main
+    from catalog import catalog
+    from inline_search import InlineSearch, inline_search
+    from sections import SECTIONS
+
+    bot, dp = bot_main.bot, bot_main.dp
+    await database.init_db()
+    for section in SECTIONS:
+        await database.add_schedule(section.name, "служебное")
+    started = time.perf_counter()
+    fill(config.DATABASE_NAME, args.rows)
+    await catalog.load()
+    print(f"Расписаний: {args.rows}, заполнение с индексом FTS5: {time.perf_counter() - started:.1f} с")
+
+    update_ids = itertools.count(1)
+
+    async def ask(query: str, offset: str = "") -> float:
+        update_id = next(update_ids)
+        raw = {"update_id": update_id, "inline_query": {
+            "id": str(update_id), "from": {"id": 7, "is_bot": False, "first_name": "User"},
+            "query": query, "offset": offset
+        }}
+        started = time.perf_counter()
+        await dp.feed_update(bot, Update.model_validate(raw, context={"bot": bot}))
+        return (time.perf_counter() - started) * 1000
+
+    rng = random.Random(9)
+    pool = query_pool(rng)
+    weights = [1 / rank for rank in range(1, len(pool) + 1)]
+
+    cold = [await ask(query) for query in pool]
+    print(f"\nХолодные запросы ({len(pool)} разных): {describe(cold)}")
+    before = inline_search.stats()
+    warm = [await ask(query) for query in rng.choices(pool, weights, k=args.queries)]
+    after = inline_search.stats()
+    print(f"Поток популярных запросов ({args.queries}): {describe(warm)}, "
+          f"попаданий в кэш {after['hits'] - before['hits']}/{args.queries}")
+
+    # Только поиск, без сборки ответа и запроса к Bot API
+    engine = InlineSearch(cache_size=len(pool), max_results=100)
+    for label in ("промах", "попадание"):
+        samples = []
+        for query in pool:
+            started = time.perf_counter()
+            await engine.search(query)
+            samples.append((time.perf_counter() - started) * 1000)
+        print(f"  inline_search.search, {label} кэша: {describe(samples)}")
+
+    pages = []
+    for query in ("лекция", "описание", "соколов"):
+        offset = ""
+        while True:
+            pages.append(await ask(query, offset))
+            answer = api.requests[-1].params
+            offset = str(answer.get("next_offset") or "")
+            if not offset:
+                break
+    print(f"Пролистывание next_offset ({len(pages)} страниц): {describe(pages)}")
+
+    changing = []
+    before = inline_search.stats()
+    for index, query in enumerate(rng.choices(pool, weights, k=args.queries)):
+        if index % 100 == 0:
+            await catalog.add_schedule(SECTIONS[0].name, f"Новая лекция №{index}", starts_at=time.time() + 3600,
+                                       ends_at=time.time() + 7200)
+        changing.append(await ask(query))
+    after = inline_search.stats()
+    print(f"Каталог меняется каждые 100 запросов: {describe(changing)}, "
+          f"попаданий {after['hits'] - before['hits']}/{args.queries}, сбросов кэша {after['invalidations'] - before['invalidations']}")
+
+    await bot.session.close()
+    await database.close()
+    await api.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""Аллокации и время на сборку клавиатур за одно обновление: до и после кэширования.
+
+Смесь обновлений повторяет типичный сценарий: главное меню, раздел,
+листание расписания. Запуск: python -m benchmarks.bench_keyboards
+"""
+import random
+import time
+import tracemalloc
+
+from benchmarks.common import use_config
+
+use_config()
+
+from aiogram.types import (  # noqa: E402
+    ReplyKeyboardMarkup,
+    KeyboardButton,
+    InlineKeyboardMarkup,
+    InlineKeyboardButton
+)
+
+import keyboards  # noqa: E402
+from sections import SECTIONS  # noqa: E402
+
+UPDATES = 20_000
+
+
+# Сборка клавиатур в том виде, в каком она была до реестра разделов
+def legacy_main_keyboard():
+    buttons = [
+        [
+            KeyboardButton(text="📅 Ближайшие мероприятия"),
+            KeyboardButton(text="🎓 Образовательные программы"),
+            KeyboardButton(text="👥 Группы специалистов")
+        ],
+        [
+            KeyboardButton(text="🏫 Курсы для всех"),
+            KeyboardButton(text="🎤 Лекторий"),
+            KeyboardButton(text="🎬 Киноклуб")
+        ],
+        [
+            KeyboardButton(text="💬 Псих. консультации"),
+            KeyboardButton(text="🌐 Конференции"),
+            KeyboardButton(text="🚀 Проекты академии")
+        ],
+        [
+            KeyboardButton(text="📚 Библиотека материалов"),
+            KeyboardButton(text="📩 Написать администратору 👨💼")
+        ]
+    ]
+    return ReplyKeyboardMarkup(keyboard=buttons, resize_keyboard=True)
+
+
+def legacy_section_keyboard(section_name):
+    buttons = [
+        [InlineKeyboardButton(text="Записаться", callback_data=f"register_{section_name}")],
+        [InlineKeyboardButton(text="Расписание", callback_data=f"schedule_{section_name}")]
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def legacy_schedule_keyboard(section_name, index, total, details_id=None):
+    keyboard_buttons = [
+        [
+            InlineKeyboardButton(text="⬅️", callback_data=f"nav_prev_{section_name}"),
+            InlineKeyboardButton(text=f"{index + 1}/{total}", callback_data="nav_current"),
+            InlineKeyboardButton(text="➡️", callback_data=f"nav_next_{section_name}")
+        ]
+    ]
+    if details_id is not None:
+        keyboard_buttons.append([InlineKeyboardButton(text="🔍 Подробнее", callback_data=f"view_details_{details_id}")])
+    keyboard_buttons.append([InlineKeyboardButton(text="🔙 Назад", callback_data=f"back_to_{section_name}")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
+
+
+def make_updates(seed: int = 1) -> list:
+    rng = random.Random(seed)
+    updates = []
+    for _ in range(UPDATES):
+        kind = rng.random()
+        section = rng.choice(SECTIONS).name
+        if kind < 0.1:
+            updates.append(("main",))
+        elif kind < 0.3:
+            updates.append(("section", section))
+        else:
+            index = rng.randrange(20)
+            updates.append(("schedule", section, index, 20, index if index % 2 else None))
+    return updates
+
+
+def run(updates, main_keyboard, section_keyboard, schedule_keyboard):
+    for update in updates:
+        if update[0] == "main":
+            main_keyboard()
+        elif update[0] == "section":
+            section_keyboard(update[1])
+        else:
+            schedule_keyboard(*update[1:])
+
+
+def allocation_per_update(updates, *builders) -> float:
+    """Средний пик выделенной памяти на одно обновление, байт"""
+    tracemalloc.start()
+    total = 0
+    for update in updates:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        run((update,), *builders)
+        total += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    return total / len(updates)
+
+
+def measure(title, updates, *builders):
+    started = time.perf_counter()
+    run(updates, *builders)
+    elapsed = time.perf_counter() - started
+    allocated = allocation_per_update(updates[:2000], *builders)
+    print(f"{title}: {elapsed / len(updates) * 1e6:.2f} мкс/обновление, {allocated:.0f} Б/обновление")
+
+
+def clear_caches():
+    """Сбрасывает lru_cache всех клавиатур, чтобы первый прогон «после» шёл с холодным кэшем"""
+    for builder in vars(keyboards).values():
+        if hasattr(builder, "cache_clear"):
+            builder.cache_clear()
+
+
+def main():
+    updates = make_updates()
+    measure("До (сборка на каждый вызов)", updates,
+            legacy_main_keyboard, legacy_section_keyboard, legacy_schedule_keyboard)
+    clear_caches()
+    measure("После (холодный кэш)       ", updates,
+            keyboards.get_main_keyboard, keyboards.get_section_keyboard, keyboards.get_schedule_keyboard)
+    measure("После (кэш прогрет)        ", updates,
+            keyboards.get_main_keyboard, keyboards.get_section_keyboard, keyboards.get_schedule_keyboard)
+    info = keyboards.get_schedule_keyboard.cache_info()
+    print(f"Кэш клавиатур расписания: {info.currsize} из {info.maxsize}, попаданий {info.hits}, промахов {info.misses}")
+
+
+if __name__ == "__main__":
+    main()
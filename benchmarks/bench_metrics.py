@@ -0,0 +1,95 @@
+"""Накладные расходы метрик обработчиков (metrics.py).
+
+Одни и те же обновления прогоняются через два диспетчера с одинаковым
+обработчиком (запрос к базе + запрос к Bot API): без middleware метрик и с
+ними. Сеть не участвует — сессия бота отвечает сразу, поэтому разница
+целиком приходится на учёт метрик.
+Запуск: python -m benchmarks.bench_metrics [количество]
+"""
+import asyncio
+import sys
+import time
+
+from benchmarks.common import use_config
+
+use_config()
+
+from aiogram import Bot, Dispatcher  # noqa: E402
+from aiogram.client.session.aiohttp import AiohttpSession  # noqa: E402
+from aiogram.types import Update  # noqa: E402
+
+import database  # noqa: E402
+import metrics  # noqa: E402
+
+
+class InstantSession(AiohttpSession):
+    """Сессия, которая не ходит в сеть и на любой метод отвечает True"""
+
+    async def make_request(self, bot, method, timeout=None):
+        return True
+
+
+async def handle_message(message, bot: Bot):
+    await database.get_schedule_by_id(1)
+    await bot.send_chat_action(message.chat.id, "typing")
+
+
+def make_dispatcher(with_metrics: bool):
+    bot = Bot(token="123456:BENCHMARK-TOKEN", session=InstantSession())
+    dp = Dispatcher()
+    dp.message.register(handle_message)
+    if with_metrics:
+        metrics.setup(dp, bot)
+    return dp, bot
+
+
+def make_updates(count: int) -> list:
+    return [
+        Update.model_validate({
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 0,
+                "chat": {"id": update_id % 1000 + 1, "type": "private"},
+                "text": "Расписание"
+            }
+        })
+        for update_id in range(count)
+    ]
+
+
+async def measure(title: str, with_metrics: bool, updates: list) -> float:
+    dp, bot = make_dispatcher(with_metrics)
+    started = time.perf_counter()
+    for update in updates:
+        await dp.feed_update(bot, update)
+    elapsed = (time.perf_counter() - started) / len(updates) * 1e6
+    print(f"{title}: {elapsed:.1f} мкс/обновление")
+    await bot.session.close()
+    return elapsed
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    await database.init_db()
+    updates = make_updates(count)
+    # Прогрев: кэши aiogram и pydantic
+    await measure("Прогрев     ", True, updates[:1000])
+    metrics.reset()
+
+    without = await measure("Без метрик  ", False, updates)
+    with_metrics = await measure("С метриками ", True, updates)
+    print(f"Накладные расходы: {with_metrics - without:.1f} мкс/обновление ({(with_metrics / without - 1) * 100:.1f}%)")
+
+    started = time.perf_counter()
+    text = metrics.render_prometheus()
+    print(f"render_prometheus: {(time.perf_counter() - started) * 1000:.2f} мс, {len(text)} байт")
+    stats = metrics.handlers["handle_message"]
+    print(f"handle_message: {stats.count} вызовов, "
+          f"БД {stats.db / stats.count * 1e6:.0f} мкс + API {stats.api / stats.count * 1e6:.0f} мкс + "
+          f"код {stats.own / stats.count * 1e6:.0f} мкс")
+    await database.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""Исходящий лимитер против поддельного Bot API, который имитирует лимиты Telegram.
+
+Один и тот же поток сообщений (ответы пользователям и массовая рассылка)
+отправляется без лимитера и с ним. Сервер отвечает 429, как только
+превышены 30 сообщений в секунду или пачка в чат.
+Запуск: python -m benchmarks.bench_ratelimit [сообщений] [чатов]
+"""
+import asyncio
+import sys
+import time
+
+from benchmarks.common import percentile, use_config
+
+use_config()
+
+from aiogram import Bot  # noqa: E402
+from aiogram.client.session.aiohttp import AiohttpSession  # noqa: E402
+from aiogram.client.telegram import TelegramAPIServer  # noqa: E402
+from aiogram.exceptions import TelegramRetryAfter  # noqa: E402
+
+from benchmarks.fake_bot_api import FakeBotAPI  # noqa: E402
+from ratelimit import RateLimiter, bulk_priority  # noqa: E402
+
+
+async def send_all(bot: Bot, messages: int, chats: int) -> dict:
+    latencies = {"interactive": [], "bulk": []}
+    failed = 0
+
+    async def send(index: int, bulk: bool):
+        nonlocal failed
+        started = time.perf_counter()
+        try:
+            if bulk:
+                with bulk_priority():
+                    await bot.send_message(1000 + index % chats, f"Рассылка {index}")
+            else:
+                await bot.send_message(1 + index % chats, f"Ответ {index}")
+        except TelegramRetryAfter:
+            failed += 1
+            return
+        latencies["bulk" if bulk else "interactive"].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    # Каждое пятое сообщение — ответ пользователю, остальные — рассылка
+    await asyncio.gather(*(send(i, i % 5 != 0) for i in range(messages)))
+    return {"elapsed": time.perf_counter() - started, "failed": failed, **latencies}
+
+
+async def run(limited: bool, messages: int, chats: int):
+    server = FakeBotAPI(enforce_limits=True, retry_after=1)
+    url = await server.start()
+    bot = Bot(token="123456:BENCHMARK-TOKEN", session=AiohttpSession(api=TelegramAPIServer.from_base(url)))
+    limiter = RateLimiter()
+    if limited:
+        bot.session.middleware(limiter)
+    try:
+        result = await send_all(bot, messages, chats)
+    finally:
+        await bot.session.close()
+        await server.stop()
+
+    title = "С лимитером " if limited else "Без лимитера"
+    delivered = server.count("sendMessage")
+    print(
+        f"{title}: доставлено {delivered}/{messages} за {result['elapsed']:.1f} с, "
+        f"429 от сервера {server.rejected}, потеряно {result['failed']}, "
+        f"пик {server.peak_rate()} сообщений/с"
+    )
+    for kind in ("interactive", "bulk"):
+        samples = result[kind]
+        if samples:
+            print(f"    {kind:11}: p50={percentile(samples, 0.5):.2f} с p99={percentile(samples, 0.99):.2f} с")
+    if limited:
+        print(f"    лимитер: {limiter.stats()}")
+
+
+async def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    chats = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    await run(False, messages, chats)
+    await run(True, messages, chats)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
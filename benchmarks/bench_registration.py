@@ -0,0 +1,124 @@
+"""Запись на популярное мероприятие: все пользователи нажимают «Записаться» разом.
+
+Несколько процессов (как воркеры cluster.py) одновременно записывают своих
+пользователей на одно мероприятие с ограниченным числом мест, часть
+пользователей нажимает кнопку дважды. Затем половина записавшихся
+отменяет запись, и места переходят к листу ожидания. После каждого этапа
+проверяется, что мест занято не больше вместимости и счётчик совпадает
+с записями.
+Запуск: python -m benchmarks.bench_registration [--users N] [--capacity C] [--processes P]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+import sqlite3
+import time
+from collections import Counter
+
+from benchmarks.common import use_config
+
+
+def _stampede(database_name: str, schedule_id: int, user_ids: list, barrier, results):
+    use_config(database_name=database_name)
+    import database
+
+    async def tap(user_id: int):
+        try:
+            status, _, created = await database.register(schedule_id, user_id)
+        except sqlite3.OperationalError:
+            return "locked"
+        if not created:
+            return "repeat"
+        return status
+
+    async def run():
+        await database.init_db()
+        barrier.wait()
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(tap(user_id) for user_id in user_ids))
+        elapsed = time.perf_counter() - started
+        await database.close()
+        return Counter(outcomes), elapsed
+
+    results.put(asyncio.run(run()))
+
+
+def _check(database_name: str, schedule_id: int, capacity: int) -> str:
+    conn = sqlite3.connect(database_name)
+    booked = conn.execute("SELECT booked FROM schedules WHERE id = ?", (schedule_id,)).fetchone()[0]
+    statuses = dict(conn.execute(
+        "SELECT status, COUNT(*) FROM registrations WHERE schedule_id = ? GROUP BY status", (schedule_id,)
+    ).fetchall())
+    conn.close()
+    confirmed = statuses.get("confirmed", 0)
+    assert confirmed == booked, f"счётчик {booked} не совпадает с записями {confirmed}"
+    assert booked <= capacity, f"перебронирование: {booked} > {capacity}"
+    return f"занято {booked}/{capacity}, в листе ожидания {statuses.get('waitlist', 0)} — без перебронирования"
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--capacity", type=int, default=300)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--double-tap", type=float, default=0.1, help="доля пользователей, нажимающих дважды")
+    args = parser.parse_args()
+
+    config = use_config()
+    import database
+
+    await database.init_db()
+    schedule_id = await database.add_schedule("конференции", "Популярная конференция")
+    await database.set_capacity(schedule_id, args.capacity)
+
+    rng = random.Random(3)
+    taps = list(range(1, args.users + 1))
+    taps += rng.sample(taps, int(args.users * args.double_tap))
+    rng.shuffle(taps)
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(args.processes)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_stampede, args=(config.DATABASE_NAME, schedule_id, taps[index::args.processes], barrier, results))
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = Counter()
+    elapsed = 0.0
+    for _ in processes:
+        counter, seconds = results.get()
+        outcomes.update(counter)
+        elapsed = max(elapsed, seconds)
+    for process in processes:
+        process.join()
+
+    attempts = len(taps)
+    print(f"Нажатий: {attempts} от {args.users} пользователей, мест: {args.capacity}, процессов: {args.processes}")
+    print(f"Время: {elapsed:.2f} с, {attempts / elapsed:.0f} записей/с")
+    print(f"Получили место: {outcomes['confirmed']}, в листе ожидания: {outcomes['waitlist']}, "
+          f"повторные нажатия: {outcomes['repeat']}, ошибок блокировки: {outcomes['locked']}")
+    lost = outcomes["waitlist"] + outcomes["repeat"] + outcomes["locked"]
+    print(f"Доля конфликтов (не получили место): {lost / attempts * 100:.1f}%")
+    print("Проверка:", _check(config.DATABASE_NAME, schedule_id, args.capacity))
+
+    # Половина записавшихся отменяет запись — места уходят листу ожидания
+    conn = sqlite3.connect(config.DATABASE_NAME)
+    confirmed = [row[0] for row in conn.execute(
+        "SELECT user_id FROM registrations WHERE schedule_id = ? AND status = 'confirmed'", (schedule_id,)
+    )]
+    conn.close()
+    cancelling = confirmed[::2]
+    started = time.perf_counter()
+    cancelled = await asyncio.gather(*(database.cancel_registration(schedule_id, user_id) for user_id in cancelling))
+    elapsed = time.perf_counter() - started
+    promoted = sum(len(result[1]) for result in cancelled if result)
+    print(f"\nОтмен: {len(cancelling)} за {elapsed:.2f} с, из листа ожидания записано: {promoted}")
+    print("Проверка:", _check(config.DATABASE_NAME, schedule_id, args.capacity))
+    await database.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
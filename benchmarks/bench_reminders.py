@@ -0,0 +1,139 @@
+"""Напоминания при 1 000 – 200 000 ожидающих строк.
+
+Для каждого объёма измеряется построение кучи при запуске, процессорное
+время простоя планировщика (он должен спать до вершины кучи, а не
+перебирать таблицу — для сравнения показан один полный проход по таблице),
+стоимость переноса мероприятия. В конце наступает волна напоминаний,
+которая отправляется через поддельный Bot API: скорость и опоздание.
+Запуск: python -m benchmarks.bench_reminders [--pending 1000,10000,100000,200000]
+"""
+import argparse
+import asyncio
+import sqlite3
+import time
+
+from benchmarks.common import use_config
+from benchmarks.fake_bot_api import FakeBotAPI
+
+USERS_PER_EVENT = 50
+LEADS = (86400, 3600)
+
+
+def insert_events(database_name: str, count: int, first_id: int, starts_at, leads=LEADS) -> list:
+    """Добавляет count мероприятий по USERS_PER_EVENT подтверждённых участников с напоминаниями"""
+    conn = sqlite3.connect(database_name)
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO sections (name) VALUES ('конференции')")
+        section_id = conn.execute("SELECT id FROM sections WHERE name = 'конференции'").fetchone()[0]
+        schedule_ids = []
+        for index in range(count):
+            schedule_id = first_id + index
+            start = starts_at(index)
+            conn.execute(
+                "INSERT INTO schedules (id, section_id, schedule_text, starts_at, ends_at, booked) VALUES (?, ?, ?, ?, ?, ?)",
+                (schedule_id, section_id, f"Мероприятие №{schedule_id}", start, start + 7200, USERS_PER_EVENT)
+            )
+            users = range(schedule_id * 1000, schedule_id * 1000 + USERS_PER_EVENT)
+            conn.executemany(
+                "INSERT INTO registrations (schedule_id, user_id, status, created_at) VALUES (?, ?, 'confirmed', 0)",
+                ((schedule_id, user_id) for user_id in users)
+            )
+            conn.executemany(
+                "INSERT INTO reminders (schedule_id, user_id, lead_time, due_at) VALUES (?, ?, ?, ?)",
+                ((schedule_id, user_id, lead, start - lead) for user_id in users for lead in leads)
+            )
+            schedule_ids.append(schedule_id)
+    conn.close()
+    return schedule_ids
+
+
+def full_scan_ms(database_name: str) -> float:
+    conn = sqlite3.connect(database_name)
+    started = time.perf_counter()
+    conn.execute("SELECT schedule_id, user_id, due_at FROM reminders").fetchall()
+    elapsed = (time.perf_counter() - started) * 1000
+    conn.close()
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pending", default="1000,10000,100000,200000", help="объёмы ожидающих напоминаний")
+    parser.add_argument("--idle", type=float, default=3.0, help="сколько секунд мерить простой")
+    parser.add_argument("--wave", type=int, default=2000, help="напоминаний в наступающей волне")
+    args = parser.parse_args()
+
+    api = FakeBotAPI(latency=0.01)
+    api_url = await api.start()
+    config = use_config(BOT_API_URL=api_url, RATE_LIMIT_GLOBAL=5000, RATE_LIMIT_CHAT=100)
+
+    import database
+    import main as bot_main
+    from catalog import catalog
+    from reminders import ReminderScheduler
+
+    await database.init_db()
+    now = time.time()
+    next_id = 1
+    pending = 0
+    for target in map(int, args.pending.split(",")):
+        events = (target - pending) // (USERS_PER_EVENT * len(LEADS))
+        # Мероприятия через 2–30 дней: до первых напоминаний далеко
+        ids = insert_events(config.DATABASE_NAME, events, next_id, lambda index: now + 2 * 86400 + index * 60)
+        next_id += len(ids)
+        pending = await database.count_reminders()
+        await catalog.load()
+
+        engine = ReminderScheduler(batch_size=100, poll_interval=1.0)
+        started = time.perf_counter()
+        await engine.start(bot_main.bot)
+        rebuild = time.perf_counter() - started
+
+        cpu = time.process_time()
+        await asyncio.sleep(args.idle)
+        idle_cpu = (time.process_time() - cpu) / args.idle * 1000
+
+        started = time.perf_counter()
+        engine.track(ids[-1])
+        track_us = (time.perf_counter() - started) * 1e6
+        started = time.perf_counter()
+        period = catalog.get_period(ids[-1])
+        await catalog.update_schedule_time(ids[-1], period[0] + 3600, period[1] + 3600)
+        engine.track(ids[-1])
+        reschedule_ms = (time.perf_counter() - started) * 1000
+        await engine.close()
+
+        print(f"\nОжидающих напоминаний: {pending}, групп в куче: {engine.stats()['queued']}")
+        print(f"  построение кучи при запуске: {rebuild * 1000:.1f} мс")
+        print(f"  CPU в простое: {idle_cpu:.2f} мс/с (полный проход по таблице: {full_scan_ms(config.DATABASE_NAME):.1f} мс)")
+        print(f"  track: {track_us:.1f} мкс, перенос мероприятия на {USERS_PER_EVENT} участников: {reschedule_ms:.2f} мс")
+
+    # Волна: напоминания за час наступают через 2 секунды
+    wave_events = args.wave // USERS_PER_EVENT
+    start = time.time() + 3600 + 2
+    insert_events(config.DATABASE_NAME, wave_events, next_id, lambda index: start, leads=(3600,))
+    await catalog.load()
+    engine = ReminderScheduler(batch_size=100, poll_interval=1.0)
+    await engine.start(bot_main.bot)
+    expected = wave_events * USERS_PER_EVENT
+    cpu = time.process_time()
+    while api.count("sendMessage") < expected:
+        await asyncio.sleep(0.01)
+    elapsed = time.time() - (start - 3600)
+    wave_cpu = time.process_time() - cpu
+    await asyncio.sleep(0.2)
+    stats = engine.stats()
+    await engine.close()
+
+    print(f"\nВолна: {expected} напоминаний, отправлено {stats['sent']} за {elapsed:.2f} с после срока "
+          f"({expected / max(elapsed, 1e-6):.0f} сообщ./с), опоздание до {stats['lag_max']:.2f} с")
+    print(f"  CPU на напоминание: {wave_cpu / expected * 1e6:.0f} мкс (вместе с ожиданием волны)")
+    print(f"  осталось напоминаний: {await database.count_reminders()}")
+
+    await bot_main.bot.session.close()
+    await database.close()
+    await api.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
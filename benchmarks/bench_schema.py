@@ -0,0 +1,95 @@
+"""План запроса и задержка выборки расписаний раздела до и после миграций.
+
+После миграций меряется запрос database.get_schedules: незавершившиеся
+мероприятия раздела по индексу (section_id, starts_at, id DESC), ближайшие
+первыми, без сортировки во временном B-дереве.
+
+Запуск: python -m benchmarks.bench_schema [количество_строк]
+"""
+import random
+import sqlite3
+import sys
+import time
+
+from benchmarks.common import describe, timed, use_config
+
+config = use_config()
+
+import database  # noqa: E402
+
+SECTIONS = [
+    "ближайшие_мероприятия", "образовательные_программы", "группы_специалистов",
+    "курсы_для_всех", "лекторий", "киноклуб", "псих_консультации",
+    "конференции", "проекты_академии", "библиотека_материалов"
+]
+
+LEGACY_QUERY = '''
+    SELECT id, schedule_text, details_text FROM schedules
+    WHERE section_name = ?
+    ORDER BY created_at DESC
+'''
+
+def fill_legacy(conn: sqlite3.Connection, rows: int):
+    database.MIGRATIONS[0](conn)
+    conn.execute("PRAGMA user_version = 1")
+    conn.executemany(
+        'INSERT INTO schedules (section_name, schedule_text, details_text, created_at) VALUES (?, ?, ?, ?)',
+        (
+            (
+                random.choice(SECTIONS),
+                f"Мероприятие №{i}: " + "описание " * 10,
+                None if i % 3 else "подробности " * 20,
+                f"2024-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00"
+            )
+            for i in range(rows)
+        )
+    )
+    conn.commit()
+
+
+def fill_times(conn: sqlite3.Connection):
+    """Даты мероприятий после миграций: большинство в ближайшие полгода, часть без даты"""
+    now = time.time()
+    conn.executemany(
+        'UPDATE schedules SET starts_at = ?, ends_at = ? WHERE id = ?',
+        (
+            (starts_at, starts_at + 7200, schedule_id)
+            for schedule_id, starts_at in (
+                (schedule_id, now + random.random() * 180 * 86400)
+                for (schedule_id,) in conn.execute('SELECT id FROM schedules WHERE id % 10 != 0').fetchall()
+            )
+        )
+    )
+    conn.commit()
+
+
+def report(conn: sqlite3.Connection, title: str, query: str, params):
+    """params(раздел) — параметры запроса"""
+    plan = conn.execute("EXPLAIN QUERY PLAN " + query, params("лекторий")).fetchall()
+    samples = timed(lambda: conn.execute(query, params(random.choice(SECTIONS))).fetchall(), 200)
+    print(f"\n{title}")
+    for row in plan:
+        print(f"  plan: {row[-1]}")
+    print(f"  весь раздел: {describe(samples)}")
+    first_page = query + " LIMIT 20"
+    samples = timed(lambda: conn.execute(first_page, params(random.choice(SECTIONS))).fetchall(), 200)
+    print(f"  первые 20:   {describe(samples)}")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    conn = sqlite3.connect(config.DATABASE_NAME)
+    fill_legacy(conn, rows)
+    print(f"Строк: {rows}, база: {config.DATABASE_NAME}")
+    report(conn, "До миграций (section_name TEXT, без индекса)", LEGACY_QUERY, lambda section: (section,))
+
+    database._apply_pragmas(conn)
+    version = database.migrate(conn)
+    fill_times(conn)
+    report(conn, f"После миграций (версия схемы {version})", database._SECTION_SCHEDULES,
+           lambda section: {"section": section, "now": time.time()})
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Обращения «Написать администратору» через поддельный Bot API.
+
+Пользователи нажимают кнопку и отправляют вопрос (настоящие обработчики
+через Dispatcher), очередь пересылает вопросы всем администраторам с
+общим лимитом сообщений. Посередине отправка останавливается, как при
+падении, и возобновляется из базы. Затем администраторы отвечают на часть
+копий, и проверяется, что каждый ответ ушёл в чат автора вопроса.
+Отчёт: задержка обработчика пользователя, скорость пересылки, повторы
+после перезапуска, задержка и точность маршрутизации ответов.
+Запуск: python -m benchmarks.bench_support [--users N] [--admins A] [--rate R]
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import time
+from collections import Counter
+
+from benchmarks.common import percentile, use_config
+from benchmarks.fake_bot_api import FakeBotAPI
+from benchmarks.updates import UpdateFactory
+
+FIRST_USER_ID = 100000
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--admins", type=int, default=3)
+    parser.add_argument("--rate", type=int, default=300, help="общий лимит сообщений в секунду")
+    parser.add_argument("--replies", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    admins = list(range(1, args.admins + 1))
+    # Лимит на чат ослаблен: в Telegram он ~1 сообщение/с на администратора,
+    # здесь меряется собственная пропускная способность очереди
+    api = FakeBotAPI(latency=args.latency, enforce_limits=True, global_rate=args.rate, chat_rate=1000, chat_burst=1000)
+    api_url = await api.start()
+    config = use_config(
+        BOT_API_URL=api_url, ADMINS=admins, RATE_LIMIT_GLOBAL=args.rate, RATE_LIMIT_CHAT=1000,
+        SUPPORT_POLL_INTERVAL=0.2
+    )
+
+    from aiogram.types import Update
+
+    import database
+    import main as bot_main
+    from keyboards import SUPPORT_BUTTON_TEXT
+
+    bot, dp = bot_main.bot, bot_main.dp
+    await dp.emit_startup(bot=bot, dispatcher=dp)
+    factory = UpdateFactory()
+
+    async def feed(raw: dict) -> float:
+        started = time.perf_counter()
+        await dp.feed_update(bot, Update.model_validate(raw, context={"bot": bot}))
+        return time.perf_counter() - started
+
+    async def ask(user_id: int) -> float:
+        await feed(factory.message(user_id, SUPPORT_BUTTON_TEXT))
+        return await feed(factory.message(user_id, f"Вопрос пользователя {user_id}"))
+
+    user_ids = list(range(FIRST_USER_ID, FIRST_USER_ID + args.users))
+    expected = args.users * len(admins)
+    started = time.monotonic()
+    latency = []
+    # Задержка вопроса включает ответ «передано» через общий с пересылкой лимит
+    for index in range(0, len(user_ids), 100):
+        latency += await asyncio.gather(*(ask(user_id) for user_id in user_ids[index:index + 100]))
+    accepted = time.monotonic() - started
+
+    def forwarded() -> list:
+        return [
+            request for request in api.requests
+            if request.method == "sendMessage" and request.chat_id in admins
+        ]
+
+    # «Падение» на середине пересылки: последняя пачка будет отправлена ещё раз
+    while len(forwarded()) < expected // 2:
+        await asyncio.sleep(0.05)
+    await bot_main.support.close()
+    bot_main.support.start(bot)
+    while await database.count_support_queue():
+        await asyncio.sleep(0.05)
+    elapsed = time.monotonic() - started
+
+    copies = Counter((request.chat_id, request.params["text"]) for request in forwarded())
+    duplicates = sum(count - 1 for count in copies.values())
+
+    print(f"Вопросов: {args.users}, администраторов: {len(admins)}, лимит: {args.rate} сообщ./с")
+    print(f"Обработчик вопроса: p50={percentile(latency, 0.5) * 1000:.2f} мс p99={percentile(latency, 0.99) * 1000:.2f} мс "
+          f"(все вопросы приняты за {accepted:.1f} с)")
+    print(f"Пересылка: {len(copies)} из {expected} копий за {elapsed:.1f} с, "
+          f"{sum(copies.values()) / elapsed:.0f} сообщ./с, повторов после перезапуска: {duplicates}, ответов 429: {api.rejected}")
+
+    # Ответы администраторов на случайные копии
+    conn = sqlite3.connect(config.DATABASE_NAME)
+    forwards = conn.execute('''
+        SELECT f.admin_id, f.message_id, t.chat_id FROM support_forwards f
+        JOIN support_tickets t ON t.id = f.ticket_id
+    ''').fetchall()
+    conn.close()
+    sample = random.Random(7).sample(forwards, min(args.replies, len(forwards)))
+    before = len(api.requests)
+    reply_latency = []
+    for admin_id, message_id, chat_id in sample:
+        reply_to = {"message_id": message_id, "date": 0, "chat": {"id": admin_id, "type": "private"}, "text": "…"}
+        reply_latency.append(await feed(factory.message(admin_id, f"Ответ для {chat_id}", reply_to_message=reply_to)))
+    replies = [
+        request for request in api.requests[before:]
+        if request.method == "sendMessage" and request.chat_id not in admins
+    ]
+    routed = sum(1 for request in replies if request.params["text"].endswith(f"Ответ для {request.chat_id}"))
+    print(f"Ответы: {len(sample)}, дошли в нужный чат: {routed}, "
+          f"обработчик p50={percentile(reply_latency, 0.5) * 1000:.2f} мс p99={percentile(reply_latency, 0.99) * 1000:.2f} мс")
+
+    await dp.emit_shutdown(bot=bot, dispatcher=dp)
+    await bot.session.close()
+    await api.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""Нагрузочный прогон webhook: записанные обновления отправляются POST-запросами.
+
+Бот работает с настоящими обработчиками и временной базой, запросы к Bot API
+уходят в поддельный сервер. Отчёт: задержка ответа webhook и задержка
+обработки обновления (p50/p99).
+Запуск: python -m benchmarks.bench_webhook [--updates N] [--concurrency C] [--file updates.json]
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import percentile, use_config
+from benchmarks.fake_bot_api import FakeBotAPI
+
+SECRET = "benchmark-secret"
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--file", help="JSON со списком обновлений вместо сгенерированных")
+    parser.add_argument("--save", help="сохранить сгенерированные обновления в файл")
+    args = parser.parse_args()
+
+    api = FakeBotAPI()
+    api_url = await api.start()
+    # Лимиты Telegram здесь не проверяются: меряем собственную обработку
+    use_config(BOT_API_URL=api_url, RATE_LIMIT_GLOBAL=1e6, RATE_LIMIT_CHAT=1e6)
+
+    from aiohttp import ClientSession, web
+
+    import main as bot_main
+    import webhook
+    from benchmarks import updates as update_generator
+
+    handler_latency = []
+
+    async def timing_middleware(handler, event, data):
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            handler_latency.append(time.perf_counter() - started)
+
+    bot_main.dp.update.outer_middleware(timing_middleware)
+    app = webhook.create_app(bot_main.dp, bot_main.bot, SECRET, bot_main.scheduler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}{bot_main.settings.WEBHOOK_PATH}"
+
+    schedule_ids = await update_generator.seed_catalog()
+    if args.file:
+        updates = update_generator.load(args.file)
+    else:
+        updates = update_generator.generate(args.updates, schedule_ids=schedule_ids)
+        if args.save:
+            update_generator.save(updates, args.save)
+
+    ack_latency = []
+    queue = asyncio.Queue()
+    for update in updates:
+        queue.put_nowait(update)
+
+    async def client(session: ClientSession):
+        while not queue.empty():
+            update = queue.get_nowait()
+            started = time.perf_counter()
+            async with session.post(url, json=update, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}) as response:
+                await response.read()
+                assert response.status == 200, response.status
+            ack_latency.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    async with ClientSession() as session:
+        await asyncio.gather(*(client(session) for _ in range(args.concurrency)))
+    while len(handler_latency) < len(updates):
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    print(f"Обновлений: {len(updates)}, параллельных клиентов: {args.concurrency}")
+    print(f"Пропускная способность: {len(updates) / elapsed:.0f} обновлений/с")
+    print(f"Ответ webhook:      p50={percentile(ack_latency, 0.5) * 1000:.2f} мс p99={percentile(ack_latency, 0.99) * 1000:.2f} мс")
+    print(f"Обработка апдейта:  p50={percentile(handler_latency, 0.5) * 1000:.2f} мс p99={percentile(handler_latency, 0.99) * 1000:.2f} мс")
+    print(f"Запросов к Bot API: {len(api.requests)}")
+    stats = bot_main.scheduler.stats()
+    print(f"Очередь обновлений: ожидание avg={stats['lag_avg'] * 1000:.2f} мс max={stats['lag_max'] * 1000:.2f} мс, "
+          f"упёрлись в лимит очереди {stats['backpressure_waits']} раз")
+
+    await runner.cleanup()
+    await api.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
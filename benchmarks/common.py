@@ -0,0 +1,73 @@
+"""Общие помощники для бенчмарков.
+
+Бенчмарки никогда не работают с боевой базой и токеном: вместо config.py
+подставляется модуль с временной базой и фиктивным токеном.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def use_config(database_name: str = None, **overrides) -> types.ModuleType:
+    """Регистрирует config с временной базой до импорта модулей бота"""
+    if database_name is None:
+        database_name = os.path.join(tempfile.mkdtemp(prefix="psyacademy-bench-"), "bench.db")
+    config = types.ModuleType("config")
+    config.BOT_TOKEN = "123456:BENCHMARK-TOKEN"
+    config.ADMINS = [1]
+    config.DATABASE_NAME = database_name
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    sys.modules["config"] = config
+    return config
+
+
+def write_config(directory: str = None, **overrides) -> types.ModuleType:
+    """Как use_config, но config.py записывается на диск: его видят и дочерние процессы"""
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix="psyacademy-bench-")
+    values = {
+        "BOT_TOKEN": "123456:BENCHMARK-TOKEN",
+        "ADMINS": [1],
+        "DATABASE_NAME": os.path.join(directory, "bench.db"),
+        **overrides
+    }
+    with open(os.path.join(directory, "config.py"), "w", encoding="utf-8") as file:
+        for name, value in values.items():
+            file.write(f"{name} = {value!r}\n")
+    sys.path.insert(0, directory)
+    sys.modules.pop("config", None)
+    import config
+    return config
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def timed(func, repeat: int) -> list:
+    """Время каждого из repeat вызовов func в миллисекундах"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def describe(samples: list) -> str:
+    return (
+        f"p50={percentile(samples, 0.5):.3f} ms "
+        f"p99={percentile(samples, 0.99):.3f} ms "
+        f"mean={statistics.fmean(samples):.3f} ms"
+    )
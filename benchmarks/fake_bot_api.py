@@ -0,0 +1,239 @@
+"""Локальный поддельный сервер Bot API для бенчмарков и нагрузочных прогонов.
+
+Принимает запросы вида /bot<token>/<method>, записывает каждый из них
+и отвечает правдоподобными объектами Telegram. Умеет добавлять задержку,
+имитировать лимиты Telegram (ответ 429 с retry_after) и случайные 429.
+"""
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import defaultdict, deque
+from typing import NamedTuple
+
+from aiohttp import web
+
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "PsyAcademy", "username": "psyacademy_bench_bot"}
+
+
+class RecordedRequest(NamedTuple):
+    at: float
+    method: str
+    chat_id: object
+    params: dict
+
+
+class FakeBotAPI:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        enforce_limits: bool = False,
+        global_rate: int = 30,
+        chat_rate: int = 1,
+        chat_burst: int = 3,
+        error_rate: float = 0.0,
+        retry_after: int = 1,
+        blocked_chats: set = None,
+        seed: int = 0
+    ):
+        self.latency = latency
+        self.enforce_limits = enforce_limits
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.blocked_chats = blocked_chats or set()
+        self.requests = []
+        self.rejected = 0
+        self._random = random.Random(seed)
+        self._message_ids = itertools.count(1000)
+        self._file_ids = itertools.count(1)
+        self._global_window = deque()
+        self._chat_windows = defaultdict(deque)
+        self._updates = asyncio.Queue()
+        self._runner = None
+        self.url = None
+
+    # --- Запуск и остановка ---
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        app.router.add_get("/bot{token}/{method}", self._handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def push_update(self, update: dict):
+        """Обновление, которое получит бот в режиме long polling"""
+        self._updates.put_nowait(update)
+
+    # --- Статистика ---
+
+    def count(self, method: str = None) -> int:
+        return sum(1 for request in self.requests if method is None or request.method == method)
+
+    def peak_rate(self, chat_id=None, window: float = 1.0) -> int:
+        """Максимум запросов (в чат или всего) за любое окно длиной window секунд"""
+        stamps = [r.at for r in self.requests if chat_id is None or r.chat_id == chat_id]
+        peak = 0
+        start = 0
+        for end, stamp in enumerate(stamps):
+            while stamp - stamps[start] >= window:
+                start += 1
+            peak = max(peak, end - start + 1)
+        return peak
+
+    # --- Обработка запросов ---
+
+    async def _params(self, request: web.Request) -> dict:
+        if request.content_type == "application/json":
+            return await request.json()
+        params = {}
+        form = await request.post()
+        for key, value in form.items():
+            if isinstance(value, web.FileField):
+                params[key] = {"uploaded": value.filename}
+                continue
+            if key in ("text", "caption", "query"):
+                params[key] = value
+                continue
+            try:
+                params[key] = json.loads(value)
+            except ValueError:
+                params[key] = value
+        return params
+
+    def _limited(self, chat_id, now: float) -> bool:
+        if not self.enforce_limits or chat_id is None:
+            return False
+        window = self._global_window
+        while window and now - window[0] >= 1.0:
+            window.popleft()
+        chat_window = self._chat_windows[chat_id]
+        while chat_window and now - chat_window[0] >= self.chat_burst / self.chat_rate:
+            chat_window.popleft()
+        if len(window) >= self.global_rate or len(chat_window) >= self.chat_burst:
+            return True
+        window.append(now)
+        chat_window.append(now)
+        return False
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await self._params(request)
+        chat_id = params.get("chat_id")
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method.lower() == "getupdates":
+            return await self._get_updates(params)
+
+        now = time.monotonic()
+        if self._limited(chat_id, now) or (chat_id is not None and self._random.random() < self.error_rate):
+            self.rejected += 1
+            return web.json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after}
+            }, status=429)
+
+        if chat_id in self.blocked_chats:
+            self.requests.append(RecordedRequest(now, method, chat_id, params))
+            return web.json_response({
+                "ok": False,
+                "error_code": 403,
+                "description": "Forbidden: bot was blocked by the user"
+            }, status=403)
+
+        self.requests.append(RecordedRequest(now, method, chat_id, params))
+        return web.json_response({"ok": True, "result": self._result(method, params)})
+
+    async def _get_updates(self, params: dict) -> web.Response:
+        updates = []
+        timeout = float(params.get("timeout") or 0)
+        try:
+            updates.append(await asyncio.wait_for(self._updates.get(), timeout=max(timeout, 0.01)))
+        except asyncio.TimeoutError:
+            pass
+        while not self._updates.empty() and len(updates) < int(params.get("limit") or 100):
+            updates.append(self._updates.get_nowait())
+        return web.json_response({"ok": True, "result": updates})
+
+    def _message(self, params: dict, **fields) -> dict:
+        chat_id = params.get("chat_id", 0)
+        message = {
+            "message_id": params.get("message_id") or next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if isinstance(chat_id, int) and chat_id > 0 else "group"},
+            "from": BOT_USER
+        }
+        if "text" in params:
+            message["text"] = params["text"]
+        if "caption" in params:
+            message["caption"] = params["caption"]
+        # Telegram возвращает в сообщении только inline-клавиатуры
+        if isinstance(params.get("reply_markup"), dict) and "inline_keyboard" in params["reply_markup"]:
+            message["reply_markup"] = params["reply_markup"]
+        message.update(fields)
+        return message
+
+    def _file(self, value) -> dict:
+        # Загруженный файл получает новый file_id, отправленный по file_id сохраняет свой
+        file_id = f"FILE{next(self._file_ids)}" if isinstance(value, dict) else str(value)
+        return {"file_id": file_id, "file_unique_id": f"U{file_id}"}
+
+    def _result(self, method: str, params: dict):
+        method = method.lower()
+        if method == "getme":
+            return BOT_USER
+        if method == "sendphoto":
+            photo = dict(self._file(params.get("photo")), width=640, height=480)
+            return self._message(params, photo=[photo])
+        if method == "senddocument":
+            return self._message(params, document=self._file(params.get("document")))
+        if method in ("sendmessage", "editmessagetext", "copymessage", "forwardmessage"):
+            if method == "copymessage":
+                return {"message_id": next(self._message_ids)}
+            return self._message(params)
+        if method == "getfile":
+            return {"file_id": params.get("file_id"), "file_unique_id": "U", "file_path": "documents/file"}
+        return True
+
+
+async def _main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Поддельный Bot API")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--enforce-limits", action="store_true")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeBotAPI(latency=args.latency, enforce_limits=args.enforce_limits, error_rate=args.error_rate)
+    url = await server.start(port=args.port)
+    print(f"Поддельный Bot API: {url} (BOT_API_URL в config.py)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,232 @@
+"""Прогон обновлений через бота целиком, без Telegram, с отчётом в JSON.
+
+Бот запускается как в продакшене (on_startup, очередь UpdateScheduler,
+настоящие обработчики, временная база), запросы к Bot API уходят в
+поддельный сервер с задержкой и случайными 429. Обновления генерируются
+(пользователи и администраторы) или читаются из файла, сохранённого
+--save, поэтому один и тот же поток можно прогнать до и после изменения.
+
+Отчёт: обновлений в секунду, задержка обработки p50/p99, ожидание в
+очереди, запросов к Bot API на обновление (всего и по обработчикам) и
+пиковый RSS процесса. --out пишет его в JSON, --compare сравнивает с
+прошлым JSON и завершается с кодом 1, если какой-то показатель стал хуже
+больше чем на --threshold процентов.
+Запуск: python -m benchmarks.replay [--updates N] [--latency S] [--error-rate P]
+        [--file updates.json] [--save updates.json] [--out result.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+from benchmarks.common import PROJECT_ROOT, percentile, use_config
+from benchmarks.fake_bot_api import FakeBotAPI
+
+# ID администраторов вне диапазона ID пользователей генератора
+ADMIN_IDS = [1000001, 1000002, 1000003]
+
+# Показатели для --compare: путь в отчёте и направление «лучше»
+COMPARED = (
+    ("updates_per_sec", "больше"),
+    ("latency_ms.p50", "меньше"),
+    ("latency_ms.p99", "меньше"),
+    ("queue_lag_ms.avg", "меньше"),
+    ("api_calls_per_update", "меньше"),
+    ("peak_rss_mb", "меньше"),
+)
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _peak_rss_mb() -> float:
+    # В Linux ru_maxrss в килобайтах, в macOS — в байтах
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _lookup(report: dict, path: str):
+    value = report
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(baseline: dict, report: dict, threshold: float) -> list:
+    """Печатает изменения показателей; возвращает те, что стали хуже больше чем на threshold %"""
+    print(f"\nСравнение с прогоном {baseline.get('commit') or '?'} от {baseline.get('started_at', '?')}:")
+    changed = {name: (value, report["params"].get(name)) for name, value in baseline.get("params", {}).items()
+               if report["params"].get(name) != value}
+    if changed:
+        print("  Параметры прогонов различаются: "
+              + ", ".join(f"{name} {old} -> {new}" for name, (old, new) in changed.items()))
+    worse = []
+    for path, better in COMPARED:
+        old, new = _lookup(baseline, path), _lookup(report, path)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        regression = change < -threshold if better == "больше" else change > threshold
+        if regression:
+            worse.append(path)
+        print(f"  {path:<22} {old:>10.2f} -> {new:>10.2f} ({change:+.1f}%){'  ХУЖЕ' if regression else ''}")
+    return worse
+
+
+async def run(args) -> dict:
+    api = FakeBotAPI(latency=args.latency, error_rate=args.error_rate, retry_after=args.retry_after, seed=args.seed)
+    api_url = await api.start()
+    # Собственные лимиты бота выключены: меряем обработку, а не ожидание токенов
+    use_config(BOT_API_URL=api_url, RATE_LIMIT_GLOBAL=1e6, RATE_LIMIT_CHAT=1e6, ADMINS=ADMIN_IDS)
+    # /start отправляет images/logo.jpg по относительному пути
+    os.chdir(PROJECT_ROOT)
+
+    from aiogram.types import Update
+
+    import main as bot_main
+    import metrics
+    from benchmarks import updates as update_generator
+
+    bot, dp, scheduler = bot_main.bot, bot_main.dp, bot_main.scheduler
+    handler_latency = []
+
+    async def timing_middleware(handler, event, data):
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            handler_latency.append(time.perf_counter() - started)
+
+    dp.update.outer_middleware(timing_middleware)
+    await dp.emit_startup(bot=bot)
+
+    schedule_ids = await update_generator.seed_catalog(args.per_section)
+    if args.file:
+        raw_updates = update_generator.load(args.file)
+    else:
+        raw_updates = update_generator.generate(
+            args.updates, users=args.users, schedule_ids=schedule_ids, seed=args.seed,
+            admins=ADMIN_IDS, admin_share=args.admin_share
+        )
+        if args.save:
+            update_generator.save(raw_updates, args.save)
+    updates = [Update.model_validate(raw, context={"bot": bot}) for raw in raw_updates]
+
+    metrics.reset()
+    api.requests.clear()
+    api.rejected = 0
+    processed_before = scheduler.processed
+    started = time.perf_counter()
+    for index, update in enumerate(updates):
+        if args.rate:
+            await asyncio.sleep(max(0.0, started + index / args.rate - time.perf_counter()))
+        await scheduler.submit(update)
+    while scheduler.processed - processed_before < len(updates):
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - started
+    scheduler_stats = scheduler.stats()
+    api_calls_per_action = metrics.api_calls_per_action()
+
+    report = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "params": {name: value for name, value in vars(args).items() if name not in ("out", "compare", "save")},
+        "updates": len(updates),
+        "elapsed": elapsed,
+        "updates_per_sec": len(updates) / elapsed,
+        "latency_ms": {
+            "p50": percentile(handler_latency, 0.5) * 1000,
+            "p90": percentile(handler_latency, 0.9) * 1000,
+            "p99": percentile(handler_latency, 0.99) * 1000,
+            "max": max(handler_latency, default=0.0) * 1000
+        },
+        "queue_lag_ms": {
+            "avg": scheduler_stats["lag_avg"] * 1000,
+            "max": scheduler_stats["lag_max"] * 1000
+        },
+        "failed": scheduler.failed,
+        "api_calls": len(api.requests),
+        "api_calls_per_update": len(api.requests) / len(updates),
+        "api_rejected_429": api.rejected,
+        "api_methods": dict(Counter(request.method for request in api.requests).most_common()),
+        "handlers": {
+            name: {"updates": count, "api_calls_per_update": round(api_calls_per_action.get(name, 0.0), 3)}
+            for name, count in metrics.actions.most_common()
+        },
+        "peak_rss_mb": _peak_rss_mb()
+    }
+
+    await dp.emit_shutdown(bot=bot)
+    await bot.session.close()
+    await api.stop()
+    return report
+
+
+def print_report(report: dict):
+    latency = report["latency_ms"]
+    print(f"Обновлений: {report['updates']} за {report['elapsed']:.2f} с, "
+          f"{report['updates_per_sec']:.0f} обновлений/с, ошибок обработки {report['failed']}")
+    print(f"Обработка апдейта: p50={latency['p50']:.2f} мс p90={latency['p90']:.2f} мс "
+          f"p99={latency['p99']:.2f} мс max={latency['max']:.2f} мс")
+    print(f"Ожидание в очереди: avg={report['queue_lag_ms']['avg']:.2f} мс max={report['queue_lag_ms']['max']:.2f} мс")
+    print(f"Запросов к Bot API: {report['api_calls']} ({report['api_calls_per_update']:.2f} на обновление), "
+          f"отклонено с 429: {report['api_rejected_429']}")
+    print(f"Пиковый RSS: {report['peak_rss_mb']:.1f} МБ")
+    print("\nОбработчик                          обновлений  запросов API на обновление")
+    for name, handler in report["handlers"].items():
+        print(f"  {name:<34}{handler['updates']:>8}  {handler['api_calls_per_update']:>8.2f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--per-section", type=int, default=20, help="расписаний в каждом разделе")
+    parser.add_argument("--admin-share", type=float, default=0.02, help="доля сессий администраторов")
+    parser.add_argument("--rate", type=float, default=0, help="обновлений в секунду (0 — без пауз)")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка поддельного Bot API, с")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля запросов, получающих 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--file", help="JSON со списком обновлений вместо сгенерированных")
+    parser.add_argument("--save", help="сохранить сгенерированные обновления в файл")
+    parser.add_argument("--out", help="записать отчёт в JSON")
+    parser.add_argument("--compare", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=10.0, help="допустимое ухудшение, %%")
+    args = parser.parse_args()
+    # run() переходит в корень проекта: пути из командной строки считаем от текущего каталога
+    for name in ("file", "save", "out", "compare"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    report = await run(args)
+    print_report(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        worse = compare(baseline, report, args.threshold)
+        if worse:
+            print(f"Хуже, чем в прошлом прогоне: {', '.join(worse)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
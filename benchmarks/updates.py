@@ -0,0 +1,152 @@
+"""Генератор синтетических обновлений Telegram в виде JSON.
+
+Сценарии повторяют реальные действия пользователей: /start, кнопки
+разделов, открытие и листание расписания, «Подробнее», возврат назад.
+Сессии администратора: добавление расписания с датой, правка «Подробнее»,
+поиск, /stats и /top.
+"""
+import itertools
+import json
+import random
+from datetime import date
+
+from callbacks import Op, encode
+from sections import SECTIONS
+
+
+class UpdateFactory:
+    def __init__(self):
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+
+    @staticmethod
+    def _user(user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "language_code": "ru"}
+
+    def message(self, user_id: int, text: str, **fields) -> dict:
+        message = {
+            "message_id": next(self._message_ids),
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id),
+            "text": text
+        }
+        if text.startswith("/"):
+            command = text.split()[0]
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+        message.update(fields)
+        return {"update_id": next(self._update_ids), "message": message}
+
+    def callback(self, user_id: int, data: str, message_id: int = 1, text: str = "…") -> dict:
+        update_id = next(self._update_ids)
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": {
+                    "message_id": message_id,
+                    "date": 0,
+                    "chat": {"id": user_id, "type": "private"},
+                    "text": text
+                }
+            }
+        }
+
+
+def user_session(factory: UpdateFactory, rng: random.Random, user_id: int, schedule_ids: list) -> list:
+    """Одна «сессия» пользователя: от /start до возврата в раздел"""
+    section = rng.choice(SECTIONS)
+    updates = [
+        factory.message(user_id, "/start"),
+        factory.message(user_id, section.title),
+        factory.callback(user_id, encode(Op.SCHEDULE, section.code)),
+    ]
+    for _ in range(rng.randrange(1, 6)):
+        updates.append(factory.callback(user_id, encode(rng.choice((Op.NEXT, Op.NEXT, Op.PREV)), section.code)))
+    if schedule_ids and rng.random() < 0.5:
+        updates.append(factory.callback(user_id, encode(Op.DETAILS, rng.choice(schedule_ids))))
+        updates.append(factory.callback(user_id, encode(Op.BACK_TO_SCHEDULE)))
+    updates.append(factory.callback(user_id, encode(Op.BACK_TO_SECTION, section.code)))
+    return updates
+
+
+def admin_session(factory: UpdateFactory, rng: random.Random, admin_id: int, schedule_ids: list) -> list:
+    """Одна «сессия» администратора: панель и одно-два действия в ней"""
+    section = rng.choice(SECTIONS)
+    updates = [factory.message(admin_id, "/admin")]
+    for flow in rng.sample(("add", "edit", "search", "report"), rng.randrange(1, 3)):
+        if flow == "add":
+            day = date(date.today().year + 1, rng.randrange(1, 13), rng.randrange(1, 29))
+            updates += [
+                factory.message(admin_id, "📝 Добавить расписание"),
+                factory.callback(admin_id, encode(Op.ADMIN_ADD, section.code)),
+                factory.message(admin_id, f"Новое мероприятие раздела «{section.title}»"),
+                factory.message(admin_id, f"{day:%d.%m.%Y} 18:00-20:00")
+            ]
+        elif flow == "edit" and schedule_ids:
+            updates += [
+                factory.message(admin_id, "✏️ Управление расписаниями"),
+                factory.callback(admin_id, encode(Op.ADMIN_MANAGE, section.code)),
+                factory.callback(admin_id, encode(Op.ADMIN_EDIT, rng.choice(schedule_ids))),
+                factory.message(admin_id, f"Обновлённые подробности {rng.randrange(1000)}")
+            ]
+        elif flow == "search":
+            updates += [
+                factory.message(admin_id, "🔎 Найти расписание"),
+                factory.message(admin_id, rng.choice(("мероприятие", "подробности", section.title)))
+            ]
+        else:
+            updates.append(factory.message(admin_id, rng.choice(("/stats", "/top", "/top 30"))))
+    return updates
+
+
+def generate(count: int, users: int = 200, schedule_ids: list = (), seed: int = 1,
+             admins: list = (), admin_share: float = 0.02) -> list:
+    """Не меньше count обновлений от users пользователей, сессии перемешаны.
+
+    Если заданы admins, доля admin_share сессий — сессии администраторов.
+    """
+    rng = random.Random(seed)
+    factory = UpdateFactory()
+    sessions = []
+    total = 0
+    while total < count:
+        if admins and rng.random() < admin_share:
+            session = admin_session(factory, rng, rng.choice(admins), list(schedule_ids))
+        else:
+            session = user_session(factory, rng, rng.randrange(1, users + 1), list(schedule_ids))
+        sessions.append(session)
+        total += len(session)
+    # Перемешиваем сессии, сохраняя порядок действий внутри каждой
+    updates = []
+    while sessions:
+        session = sessions[rng.randrange(len(sessions))]
+        updates.append(session.pop(0))
+        if not session:
+            sessions.remove(session)
+    return updates[:count]
+
+
+def save(updates: list, path: str):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(updates, file, ensure_ascii=False)
+
+
+def load(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+async def seed_catalog(per_section: int = 20) -> list:
+    """Заполняет каталог расписаниями и возвращает их ID"""
+    from catalog import catalog
+
+    schedule_ids = []
+    for section in SECTIONS:
+        for index in range(per_section):
+            details = f"Подробности мероприятия {index}" if index % 2 else None
+            schedule_ids.append(await catalog.add_schedule(section.name, f"{section.title}: мероприятие {index}", details))
+    return schedule_ids
@@ -0,0 +1,149 @@
+"""Рассылка подписчикам раздела о новых и изменённых расписаниях.
+
+Задание рассылки хранится в базе вместе с курсором — последним ID
+пользователя, до которого сообщения уже отправлены. Подписчики выбираются
+пачками по возрастанию ID; пачка отправляется параллельно, а темп задаёт
+RateLimiter (рассылка идёт с низким приоритетом и не задерживает ответы
+пользователям). После каждой пачки курсор и счётчики сохраняются, поэтому
+после падения рассылка продолжается с места остановки: повторно может
+прийти не больше одной пачки. Подписки пользователей, заблокировавших бота,
+удаляются.
+"""
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError
+
+import database
+import settings
+from keyboards import get_broadcast_keyboard
+from ratelimit import bulk_priority
+
+logger = logging.getLogger(__name__)
+
+SENT = "sent"
+FAILED = "failed"
+BLOCKED = "blocked"
+
+
+class BroadcastEngine:
+    def __init__(self, batch_size: int = 100, poll_interval: float = 5.0):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        # В режиме нескольких процессов рассылку ведёт только один воркер
+        self.runner_enabled = True
+        self.bot = None
+        self._wakeup = asyncio.Event()
+        self._task = None
+        # Метрики
+        self.active_job = 0
+        self.sent = 0
+        self.failed = 0
+        self.blocked = 0
+
+    def start(self, bot: Bot):
+        self.bot = bot
+        if self.runner_enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def enqueue(self, section_name: str, schedule_id: int, text: str) -> int:
+        """Ставит рассылку text подписчикам раздела и возвращает ID задания"""
+        # Длиннее 4096 символов Telegram сообщение не примет
+        job_id = await database.create_broadcast_job(section_name, schedule_id, text[:4096])
+        self._wakeup.set()
+        return job_id
+
+    async def _run(self):
+        while True:
+            job = await database.get_next_broadcast_job()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    # Задания из других процессов подхватываются по таймауту
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._deliver(*job)
+            except Exception:
+                logger.exception("Рассылка %s прервана, повтор через %s с", job[0], self.poll_interval)
+                await asyncio.sleep(self.poll_interval)
+            finally:
+                self.active_job = 0
+
+    async def _deliver(self, job_id: int, section_id: int, section_name: str, text: str,
+                       last_user_id: int, sent: int, failed: int, blocked: int):
+        self.active_job = job_id
+        keyboard = get_broadcast_keyboard(section_name)
+        await database.mark_broadcast_started(job_id)
+        while True:
+            user_ids = await database.get_subscriber_batch(section_id, last_user_id, self.batch_size)
+            if not user_ids:
+                await database.save_broadcast_progress(job_id, last_user_id, sent, failed, blocked, finished=True)
+                logger.info("Рассылка %s завершена: отправлено %s, ошибок %s, заблокировали %s",
+                            job_id, sent, failed, blocked)
+                return
+
+            results = await asyncio.gather(*(self._send(user_id, text, keyboard) for user_id in user_ids))
+            blocked_user_ids = [user_id for user_id, result in zip(user_ids, results) if result == BLOCKED]
+            sent += results.count(SENT)
+            failed += results.count(FAILED)
+            blocked += len(blocked_user_ids)
+            last_user_id = user_ids[-1]
+            await database.save_broadcast_progress(job_id, last_user_id, sent, failed, blocked, blocked_user_ids)
+
+    async def _send(self, user_id: int, text: str, keyboard) -> str:
+        with bulk_priority():
+            try:
+                await self.bot.send_message(user_id, text, reply_markup=keyboard)
+            except TelegramForbiddenError:
+                self.blocked += 1
+                return BLOCKED
+            except TelegramAPIError as error:
+                logger.warning("Рассылка пользователю %s: %s", user_id, error)
+                self.failed += 1
+                return FAILED
+        self.sent += 1
+        return SENT
+
+    def stats(self) -> dict:
+        return {
+            "active_job": self.active_job,
+            "sent": self.sent,
+            "failed": self.failed,
+            "blocked": self.blocked
+        }
+
+
+async def format_report(limit: int = 5) -> str:
+    """Прогресс и скорость последних рассылок для админ-панели"""
+    jobs = await database.get_broadcast_jobs(limit)
+    if not jobs:
+        return "Рассылок пока не было."
+    now = time.time()
+    lines = ["📣 Последние рассылки\n"]
+    for job_id, section_name, status, total, sent, failed, blocked, created_at, started_at, finished_at in jobs:
+        done = sent + failed + blocked
+        line = f"#{job_id} {section_name}: {done}/{total}"
+        if started_at:
+            elapsed = max((finished_at or now) - started_at, 1e-6)
+            rate = done / elapsed
+            line += f", {rate:.1f} сообщ./с"
+            if status == "running" and rate and total > done:
+                line += f", осталось ~{(total - done) / rate:.0f} с"
+        line += f"\n   ✅ {sent}  ⚠️ {failed}  🚫 {blocked}"
+        line += "  — завершена" if status == "done" else "  — идёт" if started_at else "  — в очереди"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+broadcaster = BroadcastEngine(settings.BROADCAST_BATCH, settings.BROADCAST_POLL_INTERVAL)
@@ -0,0 +1,107 @@
+"""Компактный формат callback_data и маршрутизация по таблице.
+
+callback_data имеет вид "<версия><код операции>[:<аргумент>...]", например
+"1s:events" или "1d:42". Раздел передаётся коротким кодом из sections.py,
+поэтому строка всегда намного короче лимита Telegram в 64 байта.
+Обработчик выбирается одним поиском в словаре по коду операции.
+"""
+from typing import NamedTuple
+
+from aiogram import types
+from aiogram.fsm.context import FSMContext
+
+import metrics
+
+VERSION = "1"
+SEPARATOR = ":"
+MAX_LENGTH = 64
+
+
+class Op:
+    # Пользовательские кнопки
+    SCHEDULE = "s"
+    PREV = "p"
+    NEXT = "n"
+    POSITION = "c"
+    DETAILS = "d"
+    BACK_TO_SCHEDULE = "b"
+    BACK_TO_SECTION = "x"
+    REGISTER = "r"
+    SUBSCRIBE = "u"
+    SIGN_UP = "g"
+    CANCEL_SIGN_UP = "q"
+    # Админ-панель
+    ADMIN_BACK = "A"
+    ADMIN_ADD = "a"
+    ADMIN_MANAGE = "m"
+    ADMIN_EDIT = "e"
+    ADMIN_DELETE = "D"
+    ADMIN_PICK_DELETE = "k"
+    ADMIN_CONFIRM_DELETE = "y"
+    ADMIN_CAPACITY = "C"
+    ADMIN_TIME = "t"
+    ADMIN_DELETE_LIST = "l"
+    ADMIN_SEARCH_PAGE = "F"
+
+
+class Callback(NamedTuple):
+    op: str
+    args: tuple
+
+
+def encode(op: str, *args) -> str:
+    data = SEPARATOR.join((VERSION + op, *map(str, args)))
+    if len(data.encode("utf-8")) > MAX_LENGTH:
+        raise ValueError(f"callback_data длиннее {MAX_LENGTH} байт: {data!r}")
+    return data
+
+
+def decode(data: str):
+    """Callback или None, если данные в другом формате (например, старые кнопки)"""
+    if not data or not data.startswith(VERSION):
+        return None
+    head, *args = data[len(VERSION):].split(SEPARATOR)
+    if not head:
+        return None
+    return Callback(head, tuple(args))
+
+
+class CallbackRouter:
+    """Таблица "код операции -> обработчик" для всех inline-кнопок бота"""
+
+    def __init__(self):
+        self._handlers = {}
+
+    def handler(self, op: str):
+        """Декоратор: обработчик получает (callback, state, *аргументы из callback_data)"""
+        def register(func):
+            if op in self._handlers:
+                raise ValueError(f"Операция {op!r} уже занята обработчиком {self._handlers[op].__name__}")
+            self._handlers[op] = func
+            return func
+        return register
+
+    def resolve(self, data: str):
+        """(обработчик, аргументы); обработчик None, если операция не зарегистрирована.
+
+        Для callback_data в чужом формате возвращает (None, None).
+        """
+        callback = decode(data)
+        if callback is None:
+            return None, None
+        return self._handlers.get(callback.op), callback.args
+
+    async def dispatch(self, callback: types.CallbackQuery, state: FSMContext):
+        handler, args = self.resolve(callback.data)
+        if args is None:
+            metrics.name_action("outdated_button")
+            await callback.answer("Кнопка устарела. Откройте раздел заново.")
+            return
+        if handler is None:
+            await callback.answer()
+            return
+        metrics.name_action(handler.__name__)
+        await handler(callback, state, *args)
+
+
+callback_router = CallbackRouter()
@@ -0,0 +1,307 @@
+import asyncio
+import logging
+import math
+import time
+from bisect import bisect_left
+from typing import NamedTuple
+
+import database
+
+logger = logging.getLogger(__name__)
+
+
+class _Snapshot(NamedTuple):
+    version: int
+    # section_name -> ((id, schedule_text, details_text), ...) в порядке _sort_key
+    by_section: dict
+    # id -> (section_name, schedule_text, details_text)
+    by_id: dict
+    # id -> позиция расписания внутри своего раздела
+    positions: dict
+    # id -> (starts_at, ends_at) для расписаний с датой
+    times: dict
+    # Ближайшее окончание мероприятия: до него снимок не устаревает
+    expires_at: float
+
+
+def _sort_key(schedule_id: int, period) -> tuple:
+    """Порядок database.get_schedules: ближайшие первыми, без даты — в конце, новые первыми"""
+    if period is None:
+        return (1, 0, -schedule_id)
+    return (0, period[0], -schedule_id)
+
+
+class ScheduleCatalog:
+    """Каталог расписаний в памяти процесса.
+
+    Читатели берут текущий снимок одной ссылкой, поэтому никогда не видят
+    наполовину обновлённый список. Запись идёт в базу, после чего строится
+    новый снимок (copy-on-write) и атомарно подменяет старый. В снимке только
+    незавершившиеся мероприятия, поэтому листание не зависит от объёма архива.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._write_lock = asyncio.Lock()
+        self._listeners = []
+        self.hits = 0
+        self.misses = 0
+        self.archived = 0
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version if self._snapshot else 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    async def load(self):
+        """Полностью перечитывает каталог из базы"""
+        rows = await database.get_catalog_rows()
+        by_section = {}
+        by_id = {}
+        times = {}
+        for schedule_id, section_name, schedule_text, details_text, starts_at, ends_at in rows:
+            by_section.setdefault(section_name, []).append((schedule_id, schedule_text, details_text))
+            by_id[schedule_id] = (section_name, schedule_text, details_text)
+            if starts_at is not None:
+                times[schedule_id] = (starts_at, ends_at)
+        self._snapshot = _build(self.version + 1, by_section, by_id, times)
+
+    def on_change(self, callback):
+        """callback() вызывается после каждой записи через каталог (не после load)"""
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in self._listeners:
+            callback()
+
+    async def _current(self) -> _Snapshot:
+        if self._snapshot is None:
+            await self.load()
+        # Закончившееся мероприятие пропадает из списка сразу, не дожидаясь архивации
+        self.expire(time.time())
+        return self._snapshot
+
+    async def get_schedules(self, section_name: str) -> tuple:
+        """Расписания раздела в том же виде, что и database.get_schedules"""
+        if self._snapshot is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        snapshot = await self._current()
+        return snapshot.by_section.get(section_name, ())
+
+    async def get_schedule_by_id(self, schedule_id: int):
+        """(schedule_text, details_text) или None, как database.get_schedule_by_id"""
+        snapshot = await self._current()
+        entry = snapshot.by_id.get(schedule_id)
+        if entry is None:
+            self.misses += 1
+            return await database.get_schedule_by_id(schedule_id)
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def get_entry(self, schedule_id: int):
+        """(section_name, schedule_text, details_text) из текущего снимка или None"""
+        return self._snapshot.by_id.get(schedule_id) if self._snapshot else None
+
+    async def locate(self, section_name: str, schedule_id: int = None, step: int = 0):
+        """Находит расписание по курсору и сдвигает его на step позиций по кругу.
+
+        Возвращает (index, total, (id, schedule_text, details_text)) или None,
+        если раздел пуст. Если расписание с таким ID уже удалено, курсор
+        встаёт на первое расписание раздела.
+        """
+        if self._snapshot is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        snapshot = await self._current()
+        section_rows = snapshot.by_section.get(section_name)
+        if not section_rows:
+            return None
+        index = snapshot.positions.get(schedule_id, 0)
+        if snapshot.by_id.get(schedule_id, (None,))[0] != section_name:
+            index = 0
+        total = len(section_rows)
+        index = (index + step) % total
+        return index, total, section_rows[index]
+
+    def arrange(self, schedule_ids) -> list:
+        """Те из schedule_ids, что есть в текущем снимке, в порядке database.get_schedules"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return []
+        found = [schedule_id for schedule_id in schedule_ids if schedule_id in snapshot.by_id]
+        return sorted(found, key=lambda schedule_id: _sort_key(schedule_id, snapshot.times.get(schedule_id)))
+
+    def get_period(self, schedule_id: int):
+        """(starts_at, ends_at) расписания или None, если у него нет даты"""
+        return self._snapshot.times.get(schedule_id) if self._snapshot else None
+
+    async def add_schedule(self, section_name: str, schedule_text: str, details_text: str = None,
+                           starts_at: float = None, ends_at: float = None) -> int:
+        async with self._write_lock:
+            schedule_id = await database.add_schedule(section_name, schedule_text, details_text, starts_at, ends_at)
+            period = (starts_at, ends_at) if starts_at is not None else None
+            self._patch(schedule_id, (section_name, schedule_text, details_text), period)
+            self._notify()
+            return schedule_id
+
+    async def import_schedules(self, rows, section_names: list) -> int:
+        """Добавляет расписания пачкой (см. database.import_schedules)"""
+        async with self._write_lock:
+            added = await database.import_schedules(rows, section_names)
+            # Один новый снимок на всю загрузку вместо _patch на каждую строку
+            await self.load()
+            self._notify()
+            return added
+
+    async def update_schedule_details(self, schedule_id: int, details_text: str):
+        async with self._write_lock:
+            await database.update_schedule_details(schedule_id, details_text)
+            entry = self._snapshot.by_id.get(schedule_id) if self._snapshot else None
+            if entry is None:
+                await self.load()
+            else:
+                self._patch(schedule_id, (entry[0], entry[1], details_text), self.get_period(schedule_id))
+            self._notify()
+
+    async def update_schedule_time(self, schedule_id: int, starts_at: float, ends_at: float):
+        async with self._write_lock:
+            await database.update_schedule_time(schedule_id, starts_at, ends_at)
+            entry = self._snapshot.by_id.get(schedule_id) if self._snapshot else None
+            if entry is None:
+                await self.load()
+            elif ends_at is not None and ends_at <= time.time():
+                # Уже завершилось: из каталога сразу, в архив — при следующем проходе
+                self._patch(schedule_id, None)
+            else:
+                self._patch(schedule_id, entry, (starts_at, ends_at) if starts_at is not None else None)
+            self._notify()
+
+    async def delete_schedule(self, schedule_id: int):
+        async with self._write_lock:
+            await database.delete_schedule(schedule_id)
+            self._patch(schedule_id, None)
+            self._notify()
+
+    def _patch(self, schedule_id: int, entry, period=None):
+        """Строит новый снимок с изменённой (entry) или удалённой (None) записью"""
+        old = self._snapshot
+        if old is None:
+            return
+        by_section = dict(old.by_section)
+        by_id = dict(old.by_id)
+        positions = dict(old.positions)
+        times = dict(old.times)
+
+        previous = by_id.pop(schedule_id, None)
+        previous_period = times.pop(schedule_id, None)
+        if period is not None:
+            times[schedule_id] = period
+        if previous is not None:
+            section_rows = by_section[previous[0]]
+            position = old.positions[schedule_id]
+            if entry is not None and entry[0] == previous[0] and period == previous_period:
+                # Изменение на месте: порядок в разделе сохраняется
+                row = (schedule_id, entry[1], entry[2])
+                by_section[previous[0]] = section_rows[:position] + (row,) + section_rows[position + 1:]
+                by_id[schedule_id] = entry
+                self._snapshot = old._replace(version=old.version + 1, by_section=by_section, by_id=by_id, times=times)
+                return
+            positions.pop(schedule_id, None)
+            by_section[previous[0]] = section_rows[:position] + section_rows[position + 1:]
+            _reindex(positions, by_section[previous[0]])
+            if not by_section[previous[0]]:
+                del by_section[previous[0]]
+
+        expires_at = old.expires_at
+        if entry is not None:
+            # Вставка на своё место по времени начала, без пересортировки раздела
+            section_rows = by_section.get(entry[0], ())
+            # bisect с key= есть только с Python 3.10, поэтому ключи считаем заранее
+            sort_keys = [_sort_key(row[0], times.get(row[0])) for row in section_rows]
+            position = bisect_left(sort_keys, _sort_key(schedule_id, period))
+            row = (schedule_id, entry[1], entry[2])
+            by_section[entry[0]] = section_rows[:position] + (row,) + section_rows[position:]
+            by_id[schedule_id] = entry
+            _reindex(positions, by_section[entry[0]])
+            if period is not None and period[1] is not None:
+                expires_at = min(expires_at, period[1])
+
+        self._snapshot = _Snapshot(old.version + 1, by_section, by_id, positions, times, expires_at)
+
+    def expire(self, now: float) -> int:
+        """Убирает из снимка завершившиеся к now мероприятия, базу не трогает.
+
+        Пока не наступило ближайшее окончание, это одно сравнение.
+        """
+        old = self._snapshot
+        if old is None or now < old.expires_at:
+            return 0
+        finished = {schedule_id for schedule_id, (_, ends_at) in old.times.items()
+                    if ends_at is not None and ends_at <= now}
+        by_section = {}
+        for section_name, section_rows in old.by_section.items():
+            kept = [row for row in section_rows if row[0] not in finished]
+            if kept:
+                by_section[section_name] = kept
+        by_id = {schedule_id: entry for schedule_id, entry in old.by_id.items() if schedule_id not in finished}
+        times = {schedule_id: period for schedule_id, period in old.times.items() if schedule_id not in finished}
+        self._snapshot = _build(old.version + 1, by_section, by_id, times)
+        return len(finished)
+
+    async def archive_loop(self, interval: float):
+        """Фоновая задача: переносит завершившиеся мероприятия в архив и убирает их из каталога.
+
+        В режиме нескольких процессов работает в каждом: перенос идёт в одной
+        транзакции, и второй процесс просто не найдёт уже перенесённых строк.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            now = time.time()
+            try:
+                archived = await database.archive_finished(now)
+            except Exception:
+                logger.exception("Не удалось перенести прошедшие мероприятия в архив")
+                continue
+            self.archived += archived
+            expired = self.expire(now)
+            if archived or expired:
+                logger.info("В архив перенесено мероприятий: %s, убрано из каталога: %s", archived, expired)
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "schedules": len(snapshot.by_id) if snapshot else 0,
+            "sections": len(snapshot.by_section) if snapshot else 0,
+            "archived": self.archived
+        }
+
+
+def _build(version: int, by_section: dict, by_id: dict, times: dict) -> _Snapshot:
+    positions = {}
+    for items in by_section.values():
+        _reindex(positions, items)
+    ends = [ends_at for _, ends_at in times.values() if ends_at is not None]
+    return _Snapshot(
+        version=version,
+        by_section={name: tuple(items) for name, items in by_section.items()},
+        by_id=by_id,
+        positions=positions,
+        times=times,
+        expires_at=min(ends, default=math.inf)
+    )
+
+
+def _reindex(positions: dict, section_rows: tuple):
+    positions.update((row[0], index) for index, row in enumerate(section_rows))
+
+
+catalog = ScheduleCatalog()
@@ -0,0 +1,192 @@
+"""Режим нескольких процессов: один приёмник webhook и N воркеров.
+
+Приёмник (ingress) не разбирает обновления и не запускает обработчики: он
+проверяет секрет, по chat_id выбирает воркер и кладёт обновление в его
+очередь. Обновления одного чата всегда попадают в один воркер, поэтому его
+FSM-состояние и порядок обработки остаются внутри одного процесса.
+
+Воркеры — обычные экземпляры бота из main.py с общей базой SQLite. Каталог
+каждый воркер держит в памяти; после записи через админ-панель воркер
+рассылает остальным уведомление, и они перечитывают каталог.
+"""
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import secrets
+import signal
+import zlib
+from queue import Empty, Full
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+import database
+import settings
+from webhook import serve, set_webhook_on_startup
+
+logger = logging.getLogger(__name__)
+
+# Сообщения в служебной очереди воркера
+CATALOG_CHANGED = "catalog"
+STOP = None
+
+
+def shard_key(data: dict):
+    """ID чата (или пользователя) из необработанного обновления — как scheduler.chat_key"""
+    for event in data.values():
+        if not isinstance(event, dict):
+            continue
+        chat = event.get("chat") or (event.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+        user = event.get("from")
+        if user:
+            return user["id"]
+    return data.get("update_id", 0)
+
+
+def shard_of(data: dict, workers: int) -> int:
+    key = shard_key(data)
+    if not isinstance(key, int):
+        key = zlib.crc32(str(key).encode())
+    return key % workers
+
+
+def _take(queue, limit: int = 100) -> list:
+    """Забирает из очереди до limit сообщений; пустой список, если за секунду ничего не пришло"""
+    try:
+        items = [queue.get(timeout=1.0)]
+    except Empty:
+        return []
+    while len(items) < limit:
+        try:
+            items.append(queue.get_nowait())
+        except Empty:
+            break
+    return items
+
+
+# --- Воркер ---
+
+def _worker_main(index: int, workers: int, module: str, updates, inboxes):
+    # Остановкой управляет приёмник: он дослал все обновления и пришлёт STOP
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    asyncio.run(_run_worker(index, workers, module, updates, inboxes))
+
+
+async def _listen(inbox, catalog):
+    loop = asyncio.get_running_loop()
+    while True:
+        messages = await loop.run_in_executor(None, _take, inbox)
+        if STOP in messages:
+            return
+        # Несколько уведомлений подряд схлопываются в одно перечитывание
+        if CATALOG_CHANGED in messages:
+            await catalog.load()
+
+
+async def _run_worker(index: int, workers: int, module: str, updates, inboxes):
+    # При запуске `python main.py` модуль уже загружен в воркере как __mp_main__
+    bot_main = importlib.import_module("__mp_main__" if module == "__main__" else module)
+    dp, bot, scheduler = bot_main.dp, bot_main.bot, bot_main.scheduler
+    # Лимит Telegram на бота общий, поэтому делится между воркерами.
+    # Лимиты чатов делить не нужно: каждый чат живёт в одном воркере.
+    bot_main.rate_limiter.set_global_rate(settings.RATE_LIMIT_GLOBAL / workers)
+    if settings.METRICS_PORT:
+        settings.METRICS_PORT += index + 1
+    # Рассылки, напоминания и обращения общие для всех, а отправляет их один воркер
+    bot_main.broadcaster.runner_enabled = index == 0
+    bot_main.reminders.runner_enabled = index == 0
+    bot_main.support.runner_enabled = index == 0
+
+    workflow_data = {"dispatcher": dp, "bot": bot, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(**workflow_data)
+
+    peers = [inbox for number, inbox in enumerate(inboxes) if number != index]
+    bot_main.catalog.on_change(lambda: [peer.put(CATALOG_CHANGED) for peer in peers])
+    listener = asyncio.create_task(_listen(inboxes[index], bot_main.catalog))
+
+    parent = multiprocessing.parent_process()
+    loop = asyncio.get_running_loop()
+    try:
+        running = True
+        while running:
+            batch = await loop.run_in_executor(None, _take, updates)
+            if not batch and not parent.is_alive():
+                logger.error("Приёмник завершился без команды остановки")
+                break
+            for data in batch:
+                if data is STOP:
+                    running = False
+                    break
+                await scheduler.submit(Update.model_validate(data, context={"bot": bot}))
+    finally:
+        await scheduler.close()
+        if not listener.done():
+            inboxes[index].put(STOP)
+        await asyncio.gather(listener, return_exceptions=True)
+        await dp.emit_shutdown(**workflow_data)
+        await bot.session.close()
+
+
+# --- Приёмник ---
+
+async def run_cluster(dp: Dispatcher, bot: Bot, workers: int, module: str = "main"):
+    """Запускает workers процессов с ботом из модуля module и принимает webhook.
+
+    dp и bot нужны приёмнику только для регистрации webhook.
+    """
+    if not settings.WEBHOOK_URL:
+        raise RuntimeError("Режим с несколькими воркерами работает только через webhook (WEBHOOK_URL)")
+
+    # Миграции выполняются один раз, до запуска воркеров
+    await database.init_db()
+    await database.close()
+
+    context = multiprocessing.get_context("spawn")
+    updates = [context.Queue(maxsize=settings.UPDATE_QUEUE_LIMIT) for _ in range(workers)]
+    inboxes = [context.Queue() for _ in range(workers)]
+    processes = [
+        context.Process(
+            target=_worker_main,
+            args=(index, workers, module, updates[index], inboxes),
+            name=f"bot-worker-{index}"
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    secret_token = settings.WEBHOOK_SECRET or secrets.token_urlsafe(32)
+    loop = asyncio.get_running_loop()
+
+    async def ingress(request: web.Request) -> web.Response:
+        if not secrets.compare_digest(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), secret_token):
+            return web.Response(body="Unauthorized", status=401)
+        data = await request.json()
+        queue = updates[shard_of(data, workers)]
+        try:
+            queue.put_nowait(data)
+        except Full:
+            # Воркер не успевает: Telegram подождёт ответа и притормозит доставку
+            await loop.run_in_executor(None, queue.put, data)
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_post(settings.WEBHOOK_PATH, ingress)
+    set_webhook_on_startup(app, dp, bot, secret_token)
+    logger.info("Запущено воркеров: %s", workers)
+    try:
+        await serve(app)
+    finally:
+        for queue in updates + inboxes:
+            await loop.run_in_executor(None, queue.put, STOP)
+        for process in processes:
+            await loop.run_in_executor(None, process.join, 30)
+            if process.is_alive():
+                logger.warning("Воркер %s не остановился вовремя", process.name)
+                process.terminate()
+        await bot.session.close()
@@ -1,11 +1,60 @@
+import asyncio
+import re
 import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
 from config import DATABASE_NAME
+import metrics
+import settings
 
-def create_tables():
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
+# Одно долгоживущее соединение и один поток для всех запросов:
+# обработчики ждут результат через await и не блокируют event loop,
+# а sqlite3 переиспользует подготовленные выражения из своего кэша.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="database")
+_connection = None
+
+def _get_connection() -> sqlite3.Connection:
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(
+            DATABASE_NAME,
+            check_same_thread=False,
+            cached_statements=256
+        )
+        _apply_pragmas(_connection)
+    return _connection
+
+def _apply_pragmas(conn: sqlite3.Connection):
+    conn.execute("PRAGMA journal_mode=WAL")
+    # В режиме WAL NORMAL не теряет целостность, но не делает fsync на каждый коммит
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA foreign_keys=ON")
+
+async def _run(func, *args):
+    """Выполняет функцию с соединением в потоке базы данных"""
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    try:
+        return await loop.run_in_executor(_executor, func, _get_connection(), *args)
+    finally:
+        # Время с ожиданием очереди к потоку базы — столько его и ждёт обработчик
+        metrics.add_db_time(time.perf_counter() - started)
+
+def _fetchall(conn: sqlite3.Connection, query: str, params: tuple = ()) -> list:
+    return conn.execute(query, params).fetchall()
+
+def _fetchone(conn: sqlite3.Connection, query: str, params: tuple = ()):
+    return conn.execute(query, params).fetchone()
+
+def _execute(conn: sqlite3.Connection, query: str, params: tuple = ()) -> int:
+    with conn:
+        cursor = conn.execute(query, params)
+    return cursor.lastrowid
+
+def _migration_create_schedules(conn: sqlite3.Connection):
+    conn.execute('''
     CREATE TABLE IF NOT EXISTS schedules (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         section_name TEXT NOT NULL,
@@ -14,78 +63,893 @@ def create_tables():
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     ''')
-    
-    conn.commit()
-    conn.close()
-
-def add_schedule(section_name: str, schedule_text: str, details_text: str = None):
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO schedules (section_name, schedule_text, details_text)
-        VALUES (?, ?, ?)
-    ''', (section_name, schedule_text, details_text))
-    conn.commit()
-    conn.close()
-
-def update_schedule_details(schedule_id: int, details_text: str):
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute('''
+
+def _migration_sections(conn: sqlite3.Connection):
+    """Выносит названия разделов в отдельную таблицу и индексирует выборку по разделу"""
+    conn.execute('''
+    CREATE TABLE sections (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )
+    ''')
+    conn.execute('INSERT INTO sections (name) SELECT DISTINCT section_name FROM schedules')
+    conn.execute('''
+    CREATE TABLE schedules_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        section_id INTEGER NOT NULL REFERENCES sections (id),
+        schedule_text TEXT NOT NULL,
+        details_text TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    conn.execute('''
+    INSERT INTO schedules_new (id, section_id, schedule_text, details_text, created_at)
+    SELECT s.id, sec.id, s.schedule_text, s.details_text, s.created_at
+    FROM schedules s JOIN sections sec ON sec.name = s.section_name
+    ''')
+    conn.execute('DROP TABLE schedules')
+    conn.execute('ALTER TABLE schedules_new RENAME TO schedules')
+    conn.execute('CREATE INDEX idx_schedules_section_created ON schedules (section_id, created_at)')
+
+def _migration_media_files(conn: sqlite3.Connection):
+    conn.execute('''
+    CREATE TABLE media_files (
+        path TEXT PRIMARY KEY,
+        sha256 TEXT NOT NULL,
+        file_id TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+def _migration_fsm_storage(conn: sqlite3.Connection):
+    conn.execute('''
+    CREATE TABLE fsm_storage (
+        key TEXT PRIMARY KEY,
+        state TEXT,
+        data TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    ''')
+    conn.execute('CREATE INDEX idx_fsm_storage_updated ON fsm_storage (updated_at)')
+
+def _migration_broadcasts(conn: sqlite3.Connection):
+    """Подписки на разделы и задания рассылки с сохранённым прогрессом"""
+    conn.execute('''
+    CREATE TABLE subscriptions (
+        section_id INTEGER NOT NULL REFERENCES sections (id),
+        user_id INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (section_id, user_id)
+    ) WITHOUT ROWID
+    ''')
+    # Для удаления всех подписок заблокировавшего бота пользователя
+    conn.execute('CREATE INDEX idx_subscriptions_user ON subscriptions (user_id)')
+    conn.execute('''
+    CREATE TABLE broadcast_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        section_id INTEGER NOT NULL REFERENCES sections (id),
+        schedule_id INTEGER,
+        text TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'running',
+        last_user_id INTEGER NOT NULL DEFAULT 0,
+        total INTEGER NOT NULL DEFAULT 0,
+        sent INTEGER NOT NULL DEFAULT 0,
+        failed INTEGER NOT NULL DEFAULT 0,
+        blocked INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        finished_at REAL
+    )
+    ''')
+    conn.execute('CREATE INDEX idx_broadcast_jobs_status ON broadcast_jobs (status, id)')
+
+def _migration_registrations(conn: sqlite3.Connection):
+    """Места на мероприятиях: вместимость и счётчик занятых мест в schedules, записи отдельно"""
+    conn.execute('ALTER TABLE schedules ADD COLUMN capacity INTEGER')
+    conn.execute('ALTER TABLE schedules ADD COLUMN booked INTEGER NOT NULL DEFAULT 0')
+    conn.execute('''
+    CREATE TABLE registrations (
+        schedule_id INTEGER NOT NULL REFERENCES schedules (id) ON DELETE CASCADE,
+        user_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (schedule_id, user_id)
+    ) WITHOUT ROWID
+    ''')
+    # Очередь ожидания раздаётся в порядке записи
+    conn.execute('CREATE INDEX idx_registrations_queue ON registrations (schedule_id, status, created_at)')
+    conn.execute('CREATE INDEX idx_registrations_user ON registrations (user_id)')
+
+def _migration_schedule_times(conn: sqlite3.Connection):
+    """Время начала и окончания мероприятий (unix time, NULL — без даты) и архив прошедших"""
+    conn.execute('ALTER TABLE schedules ADD COLUMN starts_at REAL')
+    conn.execute('ALTER TABLE schedules ADD COLUMN ends_at REAL')
+    # Список раздела читается по индексу в порядке начала мероприятий
+    conn.execute('CREATE INDEX idx_schedules_section_starts ON schedules (section_id, starts_at)')
+    # Архивация находит завершившиеся мероприятия, не просматривая бессрочные
+    conn.execute('CREATE INDEX idx_schedules_ends ON schedules (ends_at) WHERE ends_at IS NOT NULL')
+    conn.execute('''
+    CREATE TABLE schedules_archive (
+        id INTEGER PRIMARY KEY,
+        section_id INTEGER NOT NULL REFERENCES sections (id),
+        schedule_text TEXT NOT NULL,
+        details_text TEXT,
+        created_at TIMESTAMP,
+        starts_at REAL,
+        ends_at REAL,
+        capacity INTEGER,
+        booked INTEGER NOT NULL DEFAULT 0,
+        archived_at REAL NOT NULL
+    )
+    ''')
+
+def _migration_reminders(conn: sqlite3.Connection):
+    """Напоминания участникам до начала мероприятия: строка на пользователя и срок"""
+    conn.execute('''
+    CREATE TABLE reminders (
+        schedule_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        lead_time INTEGER NOT NULL,
+        due_at REAL NOT NULL,
+        PRIMARY KEY (schedule_id, user_id, lead_time),
+        FOREIGN KEY (schedule_id, user_id) REFERENCES registrations (schedule_id, user_id) ON DELETE CASCADE
+    ) WITHOUT ROWID
+    ''')
+    # Поиск ставших срочными напоминаний читает только их, а не всю таблицу
+    conn.execute('CREATE INDEX idx_reminders_due ON reminders (due_at)')
+    now = time.time()
+    for (schedule_id,) in conn.execute('SELECT DISTINCT schedule_id FROM registrations').fetchall():
+        _fill_reminders(conn, schedule_id, now)
+
+def _migration_schedule_search(conn: sqlite3.Connection):
+    """Полнотекстовый поиск по расписаниям и индекс для постраничных списков админ-панели"""
+    conn.execute('CREATE INDEX idx_schedules_section_id ON schedules (section_id, id)')
+    # Индекс без копии текстов (content='schedules'), синхронизируется триггерами
+    conn.execute('''
+    CREATE VIRTUAL TABLE schedules_fts USING fts5 (
+        schedule_text, details_text,
+        content='schedules', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    ''')
+    conn.execute('''
+    CREATE TRIGGER schedules_fts_insert AFTER INSERT ON schedules BEGIN
+        INSERT INTO schedules_fts (rowid, schedule_text, details_text)
+        VALUES (new.id, new.schedule_text, new.details_text);
+    END
+    ''')
+    conn.execute('''
+    CREATE TRIGGER schedules_fts_delete AFTER DELETE ON schedules BEGIN
+        INSERT INTO schedules_fts (schedules_fts, rowid, schedule_text, details_text)
+        VALUES ('delete', old.id, old.schedule_text, old.details_text);
+    END
+    ''')
+    # Только при смене текстов: запись на мероприятие меняет booked и не трогает индекс
+    conn.execute('''
+    CREATE TRIGGER schedules_fts_update AFTER UPDATE OF schedule_text, details_text ON schedules BEGIN
+        INSERT INTO schedules_fts (schedules_fts, rowid, schedule_text, details_text)
+        VALUES ('delete', old.id, old.schedule_text, old.details_text);
+        INSERT INTO schedules_fts (rowid, schedule_text, details_text)
+        VALUES (new.id, new.schedule_text, new.details_text);
+    END
+    ''')
+    conn.execute("INSERT INTO schedules_fts (schedules_fts) VALUES ('rebuild')")
+
+def _migration_support(conn: sqlite3.Connection):
+    """Обращения к администраторам: очередь на пересылку и карта пересланных сообщений"""
+    # Одно обращение на чат: все вопросы пользователя — одна переписка
+    conn.execute('''
+    CREATE TABLE support_tickets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        chat_id INTEGER NOT NULL UNIQUE,
+        user_id INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    ''')
+    conn.execute('''
+    CREATE TABLE support_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticket_id INTEGER NOT NULL REFERENCES support_tickets (id),
+        chat_id INTEGER NOT NULL,
+        message_id INTEGER NOT NULL,
+        header TEXT NOT NULL,
+        text TEXT,
+        media INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL
+    )
+    ''')
+    # Ответ администратора находит обращение по сообщению, на которое он ответил
+    conn.execute('''
+    CREATE TABLE support_forwards (
+        admin_id INTEGER NOT NULL,
+        message_id INTEGER NOT NULL,
+        ticket_id INTEGER NOT NULL REFERENCES support_tickets (id),
+        created_at REAL NOT NULL,
+        PRIMARY KEY (admin_id, message_id)
+    ) WITHOUT ROWID
+    ''')
+
+def _migration_analytics(conn: sqlite3.Connection):
+    """Сырые события просмотров и дневные суммы по ним для отчётов"""
+    conn.execute('''
+    CREATE TABLE analytics_events (
+        ts REAL NOT NULL,
+        kind TEXT NOT NULL,
+        key TEXT NOT NULL,
+        user_id INTEGER NOT NULL
+    )
+    ''')
+    conn.execute('CREATE INDEX idx_analytics_events_ts ON analytics_events (ts)')
+    # Отчёт «топ за N дней» читает суммы одного вида по диапазону дней
+    conn.execute('''
+    CREATE TABLE analytics_daily (
+        kind TEXT NOT NULL,
+        day TEXT NOT NULL,
+        key TEXT NOT NULL,
+        views INTEGER NOT NULL,
+        PRIMARY KEY (kind, day, key)
+    ) WITHOUT ROWID
+    ''')
+
+def _migration_schedule_order(conn: sqlite3.Connection):
+    """Индекс в порядке списка раздела вместо неиспользуемых (section_id, created_at) и (section_id, starts_at)"""
+    conn.execute('DROP INDEX idx_schedules_section_created')
+    conn.execute('DROP INDEX idx_schedules_section_starts')
+    conn.execute('CREATE INDEX idx_schedules_section_order ON schedules (section_id, starts_at, id DESC)')
+
+# Порядок менять нельзя: номер миграции хранится в PRAGMA user_version
+MIGRATIONS = [
+    _migration_create_schedules,
+    _migration_sections,
+    _migration_media_files,
+    _migration_fsm_storage,
+    _migration_broadcasts,
+    _migration_registrations,
+    _migration_schedule_times,
+    _migration_reminders,
+    _migration_schedule_search,
+    _migration_support,
+    _migration_analytics,
+    _migration_schedule_order,
+]
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Применяет недостающие миграции и возвращает итоговую версию схемы"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    conn.execute("PRAGMA optimize")
+    return len(MIGRATIONS)
+
+async def init_db() -> int:
+    """Создаёт или обновляет схему базы при запуске бота"""
+    return await _run(migrate)
+
+def _add_schedule(conn: sqlite3.Connection, section_name: str, schedule_text: str, details_text: str,
+                  starts_at: float, ends_at: float) -> int:
+    with conn:
+        conn.execute('INSERT OR IGNORE INTO sections (name) VALUES (?)', (section_name,))
+        cursor = conn.execute('''
+            INSERT INTO schedules (section_id, schedule_text, details_text, starts_at, ends_at)
+            VALUES ((SELECT id FROM sections WHERE name = ?), ?, ?, ?, ?)
+        ''', (section_name, schedule_text, details_text, starts_at, ends_at))
+    return cursor.lastrowid
+
+async def add_schedule(section_name: str, schedule_text: str, details_text: str = None,
+                       starts_at: float = None, ends_at: float = None) -> int:
+    """Добавляет расписание и возвращает его ID; расписание без дат не уходит в архив"""
+    return await _run(_add_schedule, section_name, schedule_text, details_text, starts_at, ends_at)
+
+def _import_schedules(conn: sqlite3.Connection, rows, section_names: list) -> int:
+    conn.executemany('INSERT OR IGNORE INTO sections (name) VALUES (?)', ((name,) for name in section_names))
+    section_ids = dict(conn.execute('SELECT name, id FROM sections'))
+    cursor = conn.executemany('''
+        INSERT INTO schedules (section_id, schedule_text, details_text, starts_at, ends_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', ((section_ids[section_name], *values) for section_name, *values in rows))
+    return cursor.rowcount
+
+async def import_schedules(rows, section_names: list) -> int:
+    """Добавляет расписания из итератора (section_name, schedule_text, details_text, starts_at, ends_at)
+    одной транзакцией и возвращает их число; исключение итератора откатывает всю загрузку.
+
+    Итератор читается в потоке базы; разделы берутся из section_names.
+    """
+    return await _run(_immediate, _import_schedules, rows, section_names)
+
+async def export_schedules(write_rows):
+    """Передаёт write_rows(rows) курсор по незавершившимся расписаниям в потоке базы и возвращает его результат.
+
+    Строки (section_name, schedule_text, details_text, starts_at, ends_at)
+    читаются по мере записи, таблица целиком в память не загружается.
+    Завершившиеся мероприятия не выгружаются, как и в каталоге: импорт их не примет.
+    """
+    def export(conn: sqlite3.Connection, now: float):
+        return write_rows(conn.execute(f'''
+            SELECT sec.name, s.schedule_text, s.details_text, s.starts_at, s.ends_at FROM schedules s
+            JOIN sections sec ON sec.id = s.section_id
+            WHERE {_NOT_FINISHED}
+            ORDER BY s.id
+        ''', (now,)))
+    return await _run(export, time.time())
+
+def _update_schedule_time(conn: sqlite3.Connection, schedule_id: int, starts_at: float, ends_at: float, now: float):
+    conn.execute('UPDATE schedules SET starts_at = ?, ends_at = ? WHERE id = ?', (starts_at, ends_at, schedule_id))
+    # Напоминания пересчитываются от новой даты, в том числе уже отправленные
+    conn.execute('DELETE FROM reminders WHERE schedule_id = ?', (schedule_id,))
+    _fill_reminders(conn, schedule_id, now)
+
+async def update_schedule_time(schedule_id: int, starts_at: float, ends_at: float):
+    """Меняет даты мероприятия и пересчитывает напоминания его участникам"""
+    await _run(_immediate, _update_schedule_time, schedule_id, starts_at, ends_at, time.time())
+
+async def update_schedule_details(schedule_id: int, details_text: str):
+    await _run(_execute, '''
         UPDATE schedules SET details_text = ?
         WHERE id = ?
     ''', (details_text, schedule_id))
-    conn.commit()
-    conn.close()
-
-def get_schedules(section_name: str) -> list:
-    """Получаем все расписания для раздела, отсортированные по дате"""
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT id, schedule_text, details_text FROM schedules 
-        WHERE section_name = ?
-        ORDER BY created_at DESC
-    ''', (section_name,))
-    results = cursor.fetchall()
-    conn.close()
-    return results
 
-def get_schedule_by_id(schedule_id: int) -> tuple:
+# Ближайшие мероприятия первыми, расписания без даты — после них, новые первыми
+_SCHEDULE_ORDER = 's.starts_at IS NULL, s.starts_at, s.id DESC'
+# Завершившиеся, но ещё не перенесённые в архив мероприятия не показываются
+_NOT_FINISHED = '(s.ends_at IS NULL OR s.ends_at > ?)'
+
+# Список раздела: мероприятия с датой по индексу (section_id, starts_at, id DESC),
+# затем расписания без даты по тому же индексу, новые первыми. Одним ORDER BY
+# с «starts_at IS NULL» индекс не обходится, и SQLite сортирует весь раздел.
+_SECTION_SCHEDULES = '''
+    SELECT id, schedule_text, details_text FROM (
+        SELECT s.id, s.schedule_text, s.details_text FROM schedules s
+        WHERE s.section_id = (SELECT id FROM sections WHERE name = :section)
+            AND s.starts_at IS NOT NULL AND (s.ends_at IS NULL OR s.ends_at > :now)
+        ORDER BY s.starts_at, s.id DESC
+    )
+    UNION ALL
+    SELECT id, schedule_text, details_text FROM (
+        SELECT s.id, s.schedule_text, s.details_text FROM schedules s
+        WHERE s.section_id = (SELECT id FROM sections WHERE name = :section)
+            AND s.starts_at IS NULL AND (s.ends_at IS NULL OR s.ends_at > :now)
+        ORDER BY s.id DESC
+    )
+'''
+
+async def get_schedules(section_name: str) -> list:
+    """Получаем незавершившиеся расписания раздела, ближайшие первыми"""
+    return await _run(_fetchall, _SECTION_SCHEDULES, {"section": section_name, "now": time.time()})
+
+async def get_schedule_by_id(schedule_id: int) -> tuple:
     """Получаем конкретное расписание по ID"""
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT schedule_text, details_text FROM schedules 
+    return await _run(_fetchone, '''
+        SELECT schedule_text, details_text FROM schedules
         WHERE id = ?
     ''', (schedule_id,))
-    result = cursor.fetchone()
-    conn.close()
-    return result
 
-def delete_schedule(schedule_id: int):
+async def delete_schedule(schedule_id: int):
     """Удаляем расписание по ID"""
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM schedules WHERE id = ?', (schedule_id,))
-    conn.commit()
-    conn.close()
-    
-def delete_schedule_by_id(schedule_id: int):
+    await _run(_execute, 'DELETE FROM schedules WHERE id = ?', (schedule_id,))
+
+async def delete_schedule_by_id(schedule_id: int):
     """Удаляет расписание по его ID"""
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM schedules WHERE id = ?', (schedule_id,))
-    conn.commit()
-    conn.close()
-
-def get_all_schedules():
-    """Получает все расписания из базы"""
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, section_name, schedule_text FROM schedules ORDER BY created_at DESC')
-    results = cursor.fetchall()
-    conn.close()
-    return results
-
-create_tables()
\ No newline at end of file
+    await delete_schedule(schedule_id)
+
+async def get_all_schedules():
+    """Получает все незавершившиеся расписания из базы"""
+    return await _run(_fetchall, f'''
+        SELECT s.id, sec.name, s.schedule_text FROM schedules s
+        JOIN sections sec ON sec.id = s.section_id
+        WHERE {_NOT_FINISHED}
+        ORDER BY {_SCHEDULE_ORDER}
+    ''', (time.time(),))
+
+# Курсор первой страницы: больше любого ID
+FIRST_PAGE = 2 ** 63 - 1
+
+async def get_schedule_page(section_name: str = None, before_id: int = FIRST_PAGE, limit: int = 10) -> list:
+    """Страница незавершившихся расписаний для админ-панели: [(id, section_name, schedule_text), ...].
+
+    Новые первыми; следующая страница запрашивается с before_id = ID последней
+    строки, поэтому стоимость не зависит от номера страницы.
+    """
+    if section_name is None:
+        return await _run(_fetchall, f'''
+            SELECT s.id, sec.name, s.schedule_text FROM schedules s
+            JOIN sections sec ON sec.id = s.section_id
+            WHERE s.id < ? AND {_NOT_FINISHED}
+            ORDER BY s.id DESC
+            LIMIT ?
+        ''', (before_id, time.time(), limit))
+    return await _run(_fetchall, f'''
+        SELECT s.id, sec.name, s.schedule_text FROM schedules s
+        JOIN sections sec ON sec.id = s.section_id
+        WHERE sec.name = ? AND s.id < ? AND {_NOT_FINISHED}
+        ORDER BY s.id DESC
+        LIMIT ?
+    ''', (section_name, before_id, time.time(), limit))
+
+def _fts_query(text: str) -> str:
+    """Слова администратора -> запрос FTS5: все слова, каждое как начало слова"""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+async def search_schedules(text: str, before_id: int = FIRST_PAGE, limit: int = 10) -> list:
+    """Страница расписаний, в тексте или «Подробнее» которых есть все слова text; формат get_schedule_page"""
+    query = _fts_query(text)
+    if not query:
+        return []
+    return await _run(_fetchall, f'''
+        SELECT s.id, sec.name, s.schedule_text FROM schedules_fts f
+        JOIN schedules s ON s.id = f.rowid
+        JOIN sections sec ON sec.id = s.section_id
+        WHERE schedules_fts MATCH ? AND f.rowid < ? AND {_NOT_FINISHED}
+        ORDER BY f.rowid DESC
+        LIMIT ?
+    ''', (query, before_id, time.time(), limit))
+
+async def get_catalog_rows() -> list:
+    """Получает незавершившиеся расписания со всеми полями для построения каталога"""
+    return await _run(_fetchall, f'''
+        SELECT s.id, sec.name, s.schedule_text, s.details_text, s.starts_at, s.ends_at FROM schedules s
+        JOIN sections sec ON sec.id = s.section_id
+        WHERE {_NOT_FINISHED}
+        ORDER BY {_SCHEDULE_ORDER}
+    ''', (time.time(),))
+
+async def get_media_file(path: str):
+    """(sha256, file_id) загруженного в Telegram файла или None"""
+    return await _run(_fetchone, 'SELECT sha256, file_id FROM media_files WHERE path = ?', (path,))
+
+async def save_media_file(path: str, sha256: str, file_id: str):
+    await _run(_execute, '''
+        INSERT INTO media_files (path, sha256, file_id) VALUES (?, ?, ?)
+        ON CONFLICT (path) DO UPDATE SET
+            sha256 = excluded.sha256,
+            file_id = excluded.file_id,
+            updated_at = CURRENT_TIMESTAMP
+    ''', (path, sha256, file_id))
+
+async def get_fsm_record(key: str):
+    """(state, data_json) сохранённого состояния FSM или None"""
+    return await _run(_fetchone, 'SELECT state, data FROM fsm_storage WHERE key = ?', (key,))
+
+def _save_fsm_records(conn: sqlite3.Connection, upserts: list, deletes: list):
+    with conn:
+        conn.executemany('''
+            INSERT INTO fsm_storage (key, state, data, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                state = excluded.state,
+                data = excluded.data,
+                updated_at = excluded.updated_at
+        ''', upserts)
+        conn.executemany('DELETE FROM fsm_storage WHERE key = ?', deletes)
+
+async def save_fsm_records(upserts: list, deletes: list):
+    """Пачка изменений FSM одной транзакцией: upserts — (key, state, data_json, updated_at)"""
+    await _run(_save_fsm_records, upserts, [(key,) for key in deletes])
+
+async def purge_fsm_records(updated_before: float) -> int:
+    """Удаляет состояния, не менявшиеся с момента updated_before"""
+    def purge(conn: sqlite3.Connection) -> int:
+        with conn:
+            return conn.execute('DELETE FROM fsm_storage WHERE updated_at < ?', (updated_before,)).rowcount
+    return await _run(purge)
+
+def _toggle_subscription(conn: sqlite3.Connection, user_id: int, section_name: str, now: float) -> bool:
+    with conn:
+        conn.execute('INSERT OR IGNORE INTO sections (name) VALUES (?)', (section_name,))
+        deleted = conn.execute('''
+            DELETE FROM subscriptions
+            WHERE section_id = (SELECT id FROM sections WHERE name = ?) AND user_id = ?
+        ''', (section_name, user_id)).rowcount
+        if not deleted:
+            conn.execute('''
+                INSERT INTO subscriptions (section_id, user_id, created_at)
+                VALUES ((SELECT id FROM sections WHERE name = ?), ?, ?)
+            ''', (section_name, user_id, now))
+    return not deleted
+
+async def toggle_subscription(user_id: int, section_name: str) -> bool:
+    """Подписывает или отписывает пользователя; True — если теперь подписан"""
+    return await _run(_toggle_subscription, user_id, section_name, time.time())
+
+def _add_subscriptions(conn: sqlite3.Connection, section_name: str, user_ids: list, now: float):
+    with conn:
+        conn.execute('INSERT OR IGNORE INTO sections (name) VALUES (?)', (section_name,))
+        section_id = conn.execute('SELECT id FROM sections WHERE name = ?', (section_name,)).fetchone()[0]
+        conn.executemany(
+            'INSERT OR IGNORE INTO subscriptions (section_id, user_id, created_at) VALUES (?, ?, ?)',
+            ((section_id, user_id, now) for user_id in user_ids)
+        )
+
+async def add_subscriptions(section_name: str, user_ids: list):
+    """Подписывает пачку пользователей одной транзакцией"""
+    await _run(_add_subscriptions, section_name, user_ids, time.time())
+
+async def count_subscribers(section_name: str) -> int:
+    row = await _run(_fetchone, '''
+        SELECT COUNT(*) FROM subscriptions
+        WHERE section_id = (SELECT id FROM sections WHERE name = ?)
+    ''', (section_name,))
+    return row[0]
+
+def _create_broadcast_job(conn: sqlite3.Connection, section_name: str, schedule_id: int, text: str, now: float) -> int:
+    with conn:
+        conn.execute('INSERT OR IGNORE INTO sections (name) VALUES (?)', (section_name,))
+        cursor = conn.execute('''
+            INSERT INTO broadcast_jobs (section_id, schedule_id, text, total, created_at)
+            SELECT sec.id, ?, ?, (SELECT COUNT(*) FROM subscriptions WHERE section_id = sec.id), ?
+            FROM sections sec WHERE sec.name = ?
+        ''', (schedule_id, text, now, section_name))
+    return cursor.lastrowid
+
+async def create_broadcast_job(section_name: str, schedule_id: int, text: str) -> int:
+    """Создаёт задание рассылки подписчикам раздела и возвращает его ID"""
+    return await _run(_create_broadcast_job, section_name, schedule_id, text, time.time())
+
+async def get_next_broadcast_job():
+    """Самое старое незавершённое задание:
+    (id, section_id, section_name, text, last_user_id, sent, failed, blocked) или None
+    """
+    return await _run(_fetchone, '''
+        SELECT j.id, j.section_id, sec.name, j.text, j.last_user_id, j.sent, j.failed, j.blocked
+        FROM broadcast_jobs j JOIN sections sec ON sec.id = j.section_id
+        WHERE j.status = 'running'
+        ORDER BY j.id
+        LIMIT 1
+    ''')
+
+async def mark_broadcast_started(job_id: int):
+    await _run(_execute, '''
+        UPDATE broadcast_jobs SET started_at = COALESCE(started_at, ?) WHERE id = ?
+    ''', (time.time(), job_id))
+
+async def get_subscriber_batch(section_id: int, after_user_id: int, limit: int) -> list:
+    """ID подписчиков раздела больше after_user_id по возрастанию — курсор рассылки"""
+    rows = await _run(_fetchall, '''
+        SELECT user_id FROM subscriptions
+        WHERE section_id = ? AND user_id > ?
+        ORDER BY user_id
+        LIMIT ?
+    ''', (section_id, after_user_id, limit))
+    return [row[0] for row in rows]
+
+def _save_broadcast_progress(conn: sqlite3.Connection, job_id: int, last_user_id: int, sent: int, failed: int,
+                             blocked: int, blocked_user_ids: list, finished_at: float):
+    with conn:
+        conn.execute('''
+            UPDATE broadcast_jobs
+            SET last_user_id = ?, sent = ?, failed = ?, blocked = ?,
+                status = CASE WHEN ? IS NULL THEN status ELSE 'done' END,
+                finished_at = ?
+            WHERE id = ?
+        ''', (last_user_id, sent, failed, blocked, finished_at, finished_at, job_id))
+        conn.executemany('DELETE FROM subscriptions WHERE user_id = ?', ((user_id,) for user_id in blocked_user_ids))
+
+async def save_broadcast_progress(job_id: int, last_user_id: int, sent: int, failed: int, blocked: int,
+                                  blocked_user_ids: list = (), finished: bool = False):
+    """Сохраняет курсор и счётчики задания и удаляет подписки заблокировавших бота"""
+    await _run(
+        _save_broadcast_progress, job_id, last_user_id, sent, failed, blocked,
+        list(blocked_user_ids), time.time() if finished else None
+    )
+
+async def get_broadcast_jobs(limit: int = 5) -> list:
+    """Последние задания: (id, section_name, status, total, sent, failed, blocked,
+    created_at, started_at, finished_at)
+    """
+    return await _run(_fetchall, '''
+        SELECT j.id, sec.name, j.status, j.total, j.sent, j.failed, j.blocked,
+               j.created_at, j.started_at, j.finished_at
+        FROM broadcast_jobs j JOIN sections sec ON sec.id = j.section_id
+        ORDER BY j.id DESC
+        LIMIT ?
+    ''', (limit,))
+
+CONFIRMED = "confirmed"
+WAITLIST = "waitlist"
+
+def _immediate(conn: sqlite3.Connection, func, *args):
+    """Выполняет func в транзакции BEGIN IMMEDIATE: блокировка на запись берётся
+    до первого чтения, поэтому проверка мест и запись не разделяются другим процессом
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        result = func(conn, *args)
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+
+def _waitlist_position(conn: sqlite3.Connection, schedule_id: int, created_at: float, user_id: int) -> int:
+    return conn.execute('''
+        SELECT COUNT(*) FROM registrations
+        WHERE schedule_id = ? AND status = 'waitlist' AND (created_at, user_id) <= (?, ?)
+    ''', (schedule_id, created_at, user_id)).fetchone()[0]
+
+def _register(conn: sqlite3.Connection, schedule_id: int, user_id: int, now: float):
+    if conn.execute('SELECT 1 FROM schedules WHERE id = ?', (schedule_id,)).fetchone() is None:
+        return None
+    existing = conn.execute(
+        'SELECT status, created_at FROM registrations WHERE schedule_id = ? AND user_id = ?',
+        (schedule_id, user_id)
+    ).fetchone()
+    if existing is not None:
+        status, created_at = existing
+        position = _waitlist_position(conn, schedule_id, created_at, user_id) if status == WAITLIST else 0
+        return status, position, False
+    # Место занимается одним условным UPDATE: счётчик не может превысить вместимость
+    seated = conn.execute('''
+        UPDATE schedules SET booked = booked + 1
+        WHERE id = ? AND (capacity IS NULL OR booked < capacity)
+    ''', (schedule_id,)).rowcount
+    status = CONFIRMED if seated else WAITLIST
+    conn.execute(
+        'INSERT INTO registrations (schedule_id, user_id, status, created_at) VALUES (?, ?, ?, ?)',
+        (schedule_id, user_id, status, now)
+    )
+    if status == CONFIRMED:
+        _add_reminders(conn, schedule_id, [user_id], now)
+    position = _waitlist_position(conn, schedule_id, now, user_id) if status == WAITLIST else 0
+    return status, position, True
+
+async def register(schedule_id: int, user_id: int):
+    """Записывает пользователя на мероприятие.
+
+    Возвращает (status, позиция в очереди ожидания или 0, создана ли запись сейчас)
+    или None, если расписания нет.
+    """
+    return await _run(_immediate, _register, schedule_id, user_id, time.time())
+
+def _promote(conn: sqlite3.Connection, schedule_id: int, limit: int) -> list:
+    """Переводит до limit первых ожидающих в подтверждённые и возвращает их ID"""
+    rows = conn.execute('''
+        SELECT user_id FROM registrations
+        WHERE schedule_id = ? AND status = 'waitlist'
+        ORDER BY created_at, user_id
+        LIMIT ?
+    ''', (schedule_id, limit)).fetchall()
+    conn.executemany(
+        "UPDATE registrations SET status = 'confirmed' WHERE schedule_id = ? AND user_id = ?",
+        ((schedule_id, row[0]) for row in rows)
+    )
+    user_ids = [row[0] for row in rows]
+    _add_reminders(conn, schedule_id, user_ids, time.time())
+    return user_ids
+
+def _cancel_registration(conn: sqlite3.Connection, schedule_id: int, user_id: int):
+    row = conn.execute(
+        'SELECT status FROM registrations WHERE schedule_id = ? AND user_id = ?',
+        (schedule_id, user_id)
+    ).fetchone()
+    if row is None:
+        return None
+    conn.execute('DELETE FROM registrations WHERE schedule_id = ? AND user_id = ?', (schedule_id, user_id))
+    promoted = []
+    if row[0] == CONFIRMED:
+        seats = conn.execute('SELECT capacity, booked FROM schedules WHERE id = ?', (schedule_id,)).fetchone()
+        # Освободившееся место сразу отдаётся первому в очереди ожидания, но только
+        # если оно действительно свободно: после уменьшения вместимости записей
+        # может быть больше мест, и тогда отмена лишь уменьшает счётчик
+        if seats is not None and (seats[0] is None or seats[1] - 1 < seats[0]):
+            promoted = _promote(conn, schedule_id, 1)
+        if not promoted:
+            conn.execute('UPDATE schedules SET booked = booked - 1 WHERE id = ?', (schedule_id,))
+    return row[0], promoted
+
+async def cancel_registration(schedule_id: int, user_id: int):
+    """Отменяет запись: (прежний status, [ID получивших место]) или None, если записи не было"""
+    return await _run(_immediate, _cancel_registration, schedule_id, user_id)
+
+def _set_capacity(conn: sqlite3.Connection, schedule_id: int, capacity):
+    row = conn.execute('SELECT booked FROM schedules WHERE id = ?', (schedule_id,)).fetchone()
+    if row is None:
+        return []
+    conn.execute('UPDATE schedules SET capacity = ? WHERE id = ?', (capacity, schedule_id))
+    # Уже подтверждённые записи при уменьшении вместимости не отменяются
+    if capacity is not None and capacity <= row[0]:
+        return []
+    # LIMIT -1 в SQLite — без ограничения
+    promoted = _promote(conn, schedule_id, -1 if capacity is None else capacity - row[0])
+    conn.execute('UPDATE schedules SET booked = booked + ? WHERE id = ?', (len(promoted), schedule_id))
+    return promoted
+
+async def set_capacity(schedule_id: int, capacity) -> list:
+    """Меняет вместимость (None — без ограничений) и возвращает ID получивших место из очереди"""
+    return await _run(_immediate, _set_capacity, schedule_id, capacity)
+
+async def get_registration_summary(schedule_id: int):
+    """(capacity, booked, число ожидающих) или None"""
+    return await _run(_fetchone, '''
+        SELECT capacity, booked,
+               (SELECT COUNT(*) FROM registrations WHERE schedule_id = s.id AND status = 'waitlist')
+        FROM schedules s WHERE id = ?
+    ''', (schedule_id,))
+
+def _add_reminders(conn: sqlite3.Connection, schedule_id: int, user_ids: list, now: float):
+    """Ставит подтверждённым участникам напоминания за REMINDER_OFFSETS до начала"""
+    row = conn.execute('SELECT starts_at FROM schedules WHERE id = ?', (schedule_id,)).fetchone()
+    if row is None or row[0] is None:
+        return
+    conn.executemany(
+        'INSERT OR IGNORE INTO reminders (schedule_id, user_id, lead_time, due_at) VALUES (?, ?, ?, ?)',
+        (
+            (schedule_id, user_id, lead_time, row[0] - lead_time)
+            for lead_time in settings.REMINDER_OFFSETS if row[0] - lead_time > now
+            for user_id in user_ids
+        )
+    )
+
+def _fill_reminders(conn: sqlite3.Connection, schedule_id: int, now: float):
+    """Напоминания всем подтверждённым участникам мероприятия"""
+    for lead_time in settings.REMINDER_OFFSETS:
+        conn.execute('''
+            INSERT OR IGNORE INTO reminders (schedule_id, user_id, lead_time, due_at)
+            SELECT r.schedule_id, r.user_id, ?, s.starts_at - ?
+            FROM registrations r JOIN schedules s ON s.id = r.schedule_id
+            WHERE r.schedule_id = ? AND r.status = 'confirmed' AND s.starts_at - ? > ?
+        ''', (lead_time, lead_time, schedule_id, lead_time, now))
+
+async def get_reminder_queue() -> list:
+    """(schedule_id, due_at) всех ожидающих групп напоминаний — для построения кучи при запуске"""
+    return await _run(_fetchall, 'SELECT DISTINCT schedule_id, due_at FROM reminders')
+
+async def get_reminders_due_before(moment: float) -> list:
+    """(schedule_id, due_at) групп со сроком до moment; читает только их по индексу due_at"""
+    return await _run(_fetchall, '''
+        SELECT DISTINCT schedule_id, due_at FROM reminders
+        WHERE due_at <= ?
+    ''', (moment,))
+
+async def get_due_reminders(schedule_id: int, now: float, limit: int, after: tuple = (-1, -1)) -> list:
+    """Пачка наступивших напоминаний мероприятия после курсора after: [(user_id, lead_time), ...]"""
+    return await _run(_fetchall, '''
+        SELECT user_id, lead_time FROM reminders
+        WHERE schedule_id = ? AND (user_id, lead_time) > (?, ?) AND due_at <= ?
+        ORDER BY user_id, lead_time
+        LIMIT ?
+    ''', (schedule_id, *after, now, limit))
+
+def _delete_reminders(conn: sqlite3.Connection, schedule_id: int, reminders: list):
+    with conn:
+        conn.executemany(
+            'DELETE FROM reminders WHERE schedule_id = ? AND user_id = ? AND lead_time = ?',
+            ((schedule_id, user_id, lead_time) for user_id, lead_time in reminders)
+        )
+
+async def delete_reminders(schedule_id: int, reminders: list):
+    """Удаляет отправленные напоминания [(user_id, lead_time), ...]"""
+    await _run(_delete_reminders, schedule_id, reminders)
+
+async def drop_due_reminders(schedule_id: int, now: float) -> int:
+    """Удаляет наступившие напоминания, которые уже не нужны (мероприятие началось или удалено)"""
+    def drop(conn: sqlite3.Connection) -> int:
+        with conn:
+            return conn.execute(
+                'DELETE FROM reminders WHERE schedule_id = ? AND due_at <= ?', (schedule_id, now)
+            ).rowcount
+    return await _run(drop)
+
+async def count_reminders() -> int:
+    return (await _run(_fetchone, 'SELECT COUNT(*) FROM reminders'))[0]
+
+def _enqueue_support_message(conn: sqlite3.Connection, chat_id: int, user_id: int, message_id: int,
+                             header: str, text: str, media: bool, now: float):
+    with conn:
+        conn.execute('''
+            INSERT INTO support_tickets (chat_id, user_id, created_at, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (chat_id) DO UPDATE SET updated_at = excluded.updated_at
+        ''', (chat_id, user_id, now, now))
+        ticket_id = conn.execute('SELECT id FROM support_tickets WHERE chat_id = ?', (chat_id,)).fetchone()[0]
+        conn.execute('''
+            INSERT INTO support_queue (ticket_id, chat_id, message_id, header, text, media, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (ticket_id, chat_id, message_id, header, text, int(media), now))
+    return ticket_id
+
+async def enqueue_support_message(chat_id: int, user_id: int, message_id: int,
+                                  header: str, text: str, media: bool) -> int:
+    """Ставит сообщение пользователя в очередь пересылки и возвращает номер обращения;
+    header — подпись об отправителе для администраторов
+    """
+    return await _run(_enqueue_support_message, chat_id, user_id, message_id, header, text, media, time.time())
+
+async def get_support_batch(limit: int) -> list:
+    """Первые в очереди сообщения: [(id, ticket_id, chat_id, message_id, header, text, media, created_at), ...]"""
+    return await _run(_fetchall, '''
+        SELECT id, ticket_id, chat_id, message_id, header, text, media, created_at
+        FROM support_queue ORDER BY id LIMIT ?
+    ''', (limit,))
+
+def _finish_support_batch(conn: sqlite3.Connection, queue_ids: list, forwards: list, now: float):
+    with conn:
+        conn.executemany(
+            'INSERT OR REPLACE INTO support_forwards (admin_id, message_id, ticket_id, created_at) VALUES (?, ?, ?, ?)',
+            ((admin_id, message_id, ticket_id, now) for admin_id, message_id, ticket_id in forwards)
+        )
+        conn.executemany('DELETE FROM support_queue WHERE id = ?', ((queue_id,) for queue_id in queue_ids))
+
+async def finish_support_batch(queue_ids: list, forwards: list):
+    """Запоминает пересланные копии [(admin_id, message_id, ticket_id), ...] и убирает сообщения из очереди"""
+    await _run(_finish_support_batch, queue_ids, forwards, time.time())
+
+async def get_forwarded_ticket(admin_id: int, message_id: int):
+    """(ticket_id, chat_id) обращения, копию которого admin_id получил как message_id, или None"""
+    return await _run(_fetchone, '''
+        SELECT t.id, t.chat_id FROM support_forwards f
+        JOIN support_tickets t ON t.id = f.ticket_id
+        WHERE f.admin_id = ? AND f.message_id = ?
+    ''', (admin_id, message_id))
+
+async def count_support_queue() -> int:
+    return (await _run(_fetchone, 'SELECT COUNT(*) FROM support_queue'))[0]
+
+def _save_analytics(conn: sqlite3.Connection, events: list, rollups: list):
+    with conn:
+        conn.executemany('INSERT INTO analytics_events (ts, kind, key, user_id) VALUES (?, ?, ?, ?)', events)
+        conn.executemany('''
+            INSERT INTO analytics_daily (kind, day, key, views) VALUES (?, ?, ?, ?)
+            ON CONFLICT (kind, day, key) DO UPDATE SET views = views + excluded.views
+        ''', rollups)
+
+async def save_analytics(events: list, rollups: list):
+    """Записывает события [(ts, kind, key, user_id), ...] и прибавляет rollups
+    [(kind, day, key, views), ...] к дневным суммам одной транзакцией
+    """
+    await _run(_save_analytics, events, rollups)
+
+async def purge_analytics(before: float, before_day: str):
+    """Удаляет события старше before и дневные суммы раньше before_day"""
+    def purge(conn: sqlite3.Connection):
+        with conn:
+            conn.execute('DELETE FROM analytics_events WHERE ts < ?', (before,))
+            conn.execute('DELETE FROM analytics_daily WHERE day < ?', (before_day,))
+    await _run(purge)
+
+async def get_analytics_top(kind: str, since_day: str, limit: int) -> list:
+    """[(key, views), ...] по дневным суммам начиная с since_day, популярные первыми"""
+    return await _run(_fetchall, '''
+        SELECT key, SUM(views) AS total FROM analytics_daily
+        WHERE kind = ? AND day >= ?
+        GROUP BY key
+        ORDER BY total DESC, key
+        LIMIT ?
+    ''', (kind, since_day, limit))
+
+def _archive_finished(conn: sqlite3.Connection, now: float, limit: int) -> int:
+    ids = [row[0] for row in conn.execute(
+        'SELECT id FROM schedules WHERE ends_at <= ? ORDER BY ends_at LIMIT ?', (now, limit)
+    )]
+    if not ids:
+        return 0
+    placeholders = ", ".join("?" * len(ids))
+    conn.execute(f'''
+        INSERT OR REPLACE INTO schedules_archive
+            (id, section_id, schedule_text, details_text, created_at, starts_at, ends_at, capacity, booked, archived_at)
+        SELECT id, section_id, schedule_text, details_text, created_at, starts_at, ends_at, capacity, booked, ?
+        FROM schedules WHERE id IN ({placeholders})
+    ''', (now, *ids))
+    # Записи на мероприятие удаляются каскадом, в архиве остаётся число занятых мест
+    conn.execute(f'DELETE FROM schedules WHERE id IN ({placeholders})', ids)
+    return len(ids)
+
+async def archive_finished(now: float, limit: int = 500) -> int:
+    """Переносит до limit завершившихся к now мероприятий в schedules_archive, возвращает их число"""
+    return await _run(_immediate, _archive_finished, now, limit)
+
+async def count_archived() -> int:
+    return (await _run(_fetchone, 'SELECT COUNT(*) FROM schedules_archive'))[0]
+
+async def close():
+    """Закрывает соединение с базой при остановке бота"""
+    global _connection
+    if _connection is not None:
+        await _run(lambda conn: conn.close())
+        _connection = None
+    _executor.shutdown(wait=True)
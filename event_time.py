@@ -0,0 +1,86 @@
+"""Даты мероприятий: разбор ввода администратора и вывод для пользователей.
+
+В базе время хранится как unix timestamp (секунды), администратор вводит и
+пользователи видят его в часовом поясе settings.TIMEZONE.
+"""
+import re
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import settings
+
+try:
+    TIMEZONE = ZoneInfo(settings.TIMEZONE)
+except ZoneInfoNotFoundError:
+    # В Windows своей базы часовых поясов нет, её ставит пакет tzdata из requirements.txt
+    raise RuntimeError(
+        f"Часовой пояс {settings.TIMEZONE!r} не найден: проверьте TIMEZONE в config.py "
+        "и установите пакет tzdata (pip install tzdata)"
+    ) from None
+
+INPUT_HINT = (
+    "Форматы:\n"
+    "• 25.12.2025 18:00 — начало, длительность по умолчанию\n"
+    "• 25.12.2025 18:00-20:00\n"
+    "• 25.12.2025 10:00 - 27.12.2025 18:00\n"
+    "• 25.12.2025 — весь день\n"
+    "• - — без даты (расписание не уходит в архив)"
+)
+
+_DATE = r"(\d{1,2}\.\d{1,2}\.\d{4})"
+_TIME = r"(\d{1,2}:\d{2})"
+_DASH = r"\s*[-–—]\s*"
+_PATTERNS = (
+    # Дата, время начала и окончания в тот же день
+    (re.compile(rf"{_DATE}\s+{_TIME}{_DASH}{_TIME}"), "same_day"),
+    # Полные дата и время начала и окончания
+    (re.compile(rf"{_DATE}\s+{_TIME}{_DASH}{_DATE}\s+{_TIME}"), "range"),
+    (re.compile(rf"{_DATE}\s+{_TIME}"), "start"),
+    (re.compile(_DATE), "day"),
+)
+
+
+def _local(date: str, time: str = "00:00") -> datetime:
+    return datetime.strptime(f"{date} {time}", "%d.%m.%Y %H:%M").replace(tzinfo=TIMEZONE)
+
+
+def parse_period(text: str):
+    """(starts_at, ends_at) в секундах или (None, None) для «-».
+
+    ValueError, если формат не распознан или окончание не позже начала.
+    """
+    text = text.strip()
+    if text == "-":
+        return None, None
+    for pattern, kind in _PATTERNS:
+        match = pattern.fullmatch(text)
+        if match is None:
+            continue
+        groups = match.groups()
+        if kind == "same_day":
+            starts, ends = _local(groups[0], groups[1]), _local(groups[0], groups[2])
+        elif kind == "range":
+            starts, ends = _local(groups[0], groups[1]), _local(groups[2], groups[3])
+        elif kind == "start":
+            starts = _local(groups[0], groups[1])
+            ends = starts + timedelta(hours=settings.DEFAULT_EVENT_HOURS)
+        else:
+            starts = _local(groups[0])
+            ends = starts + timedelta(days=1)
+        if ends <= starts:
+            raise ValueError("Окончание должно быть позже начала")
+        return starts.timestamp(), ends.timestamp()
+    raise ValueError("Не удалось распознать дату")
+
+
+def format_period(starts_at: float, ends_at: float = None) -> str:
+    """«25.12.2025 18:00–20:00» для показа пользователю"""
+    starts = datetime.fromtimestamp(starts_at, TIMEZONE)
+    if ends_at is None:
+        return starts.strftime("%d.%m.%Y %H:%M")
+    ends = datetime.fromtimestamp(ends_at, TIMEZONE)
+    if ends - starts == timedelta(days=1) and starts.hour == starts.minute == 0:
+        return starts.strftime("%d.%m.%Y")
+    if ends.date() == starts.date():
+        return f"{starts:%d.%m.%Y %H:%M}–{ends:%H:%M}"
+    return f"{starts:%d.%m.%Y %H:%M} – {ends:%d.%m.%Y %H:%M}"
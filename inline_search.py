@@ -0,0 +1,83 @@
+"""Поиск расписаний во встроенном режиме (@бот слова).
+
+Слова запроса ищутся в индексе FTS5 schedules_fts (текст и «Подробнее»;
+индекс обновляют триггеры при любой записи в schedules). Набор найденных
+ID кэшируется по нормализованному запросу: «Лекция  СЕМИНАР» и «семинар
+лекция» — одна запись LRU. Любое изменение каталога (новая версия снимка)
+сбрасывает кэш, поэтому удалённое или завершившееся мероприятие не
+останется в выдаче. Страницы (next_offset) режутся из закэшированного
+набора, и пролистывание не ходит в базу.
+
+На запрос берётся не больше max_results самых новых совпадений, они
+упорядочиваются как списки разделов — ближайшие мероприятия первыми. Для
+узких запросов это порядок по всем совпадениям; сортировка по дате всех
+совпадений частого слова на 100 000 расписаний стоила бы до ~20 мс.
+"""
+import re
+import time
+from collections import OrderedDict
+
+import database
+import settings
+from catalog import catalog
+
+# Однобуквенные слова как начало слова совпадают почти со всем индексом
+MIN_WORD_LENGTH = 2
+
+
+def normalize(text: str) -> str:
+    """Ключ кэша: слова в нижнем регистре без повторов, по алфавиту"""
+    words = {word for word in re.findall(r"\w+", text.lower()) if len(word) >= MIN_WORD_LENGTH}
+    return " ".join(sorted(words))
+
+
+class InlineSearch:
+    def __init__(self, cache_size: int = 1000, max_results: int = 100):
+        self.cache_size = cache_size
+        self.max_results = max_results
+        # Нормализованный запрос -> ID расписаний в порядке выдачи
+        self._cache = OrderedDict()
+        self._version = None
+        # Метрики
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def search(self, text: str) -> list:
+        """ID незавершившихся расписаний, в которых есть все слова text"""
+        query = normalize(text)
+        if not query:
+            return []
+        # Закончившиеся мероприятия уходят из снимка и меняют его версию
+        catalog.expire(time.time())
+        version = catalog.version
+        if version != self._version:
+            if self._cache:
+                self.invalidations += 1
+            self._cache.clear()
+            self._version = version
+        found = self._cache.get(query)
+        if found is not None:
+            self.hits += 1
+            self._cache.move_to_end(query)
+            return found
+        self.misses += 1
+        rows = await database.search_schedules(query, database.FIRST_PAGE, self.max_results)
+        found = catalog.arrange(row[0] for row in rows)
+        # Каталог мог измениться за время запроса: такой результат не кэшируем
+        if catalog.version == version:
+            self._cache[query] = found
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return found
+
+    def stats(self) -> dict:
+        return {
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations
+        }
+
+
+inline_search = InlineSearch(settings.INLINE_CACHE_SIZE, settings.INLINE_MAX_RESULTS)
@@ -0,0 +1,136 @@
+"""Клавиатуры бота.
+
+Статические клавиатуры строятся один раз при импорте, параметризованные
+запоминаются: одинаковые аргументы возвращают один и тот же объект, и
+обработчики не пересобирают дерево pydantic-моделей на каждое обновление.
+Возвращаемые объекты общие — изменять их нельзя.
+"""
+from functools import lru_cache
+
+from aiogram.types import (
+    ReplyKeyboardMarkup,
+    KeyboardButton,
+    InlineKeyboardMarkup,
+    InlineKeyboardButton
+)
+
+from callbacks import Op, encode
+from sections import SECTIONS, BY_NAME
+
+SUPPORT_BUTTON_TEXT = "📩 Написать администратору 👨💼"
+
+
+def _build_main_keyboard() -> ReplyKeyboardMarkup:
+    buttons = [KeyboardButton(text=section.title) for section in SECTIONS]
+    buttons.append(KeyboardButton(text=SUPPORT_BUTTON_TEXT))
+    rows = [buttons[i:i + 3] for i in range(0, 9, 3)]
+    rows.append(buttons[9:])
+    return ReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
+
+
+MAIN_KEYBOARD = _build_main_keyboard()
+
+ADMIN_MAIN_KEYBOARD = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="📝 Добавить расписание")],
+        [KeyboardButton(text="✏️ Управление расписаниями")],
+        [KeyboardButton(text="🗑 Удалить расписание")],
+        [KeyboardButton(text="🔎 Найти расписание")],
+        [KeyboardButton(text="🔙 В главное меню")]
+    ],
+    resize_keyboard=True
+)
+
+START_KEYBOARD = ReplyKeyboardMarkup(keyboard=[[KeyboardButton(text="/start")]], resize_keyboard=True)
+
+DETAILS_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🔙 Назад к расписанию", callback_data=encode(Op.BACK_TO_SCHEDULE))]
+])
+
+ADMIN_CANCEL_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🔙 Отмена", callback_data=encode(Op.ADMIN_BACK))]
+])
+
+CONFIRM_DELETE_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="✅ Да", callback_data=encode(Op.ADMIN_CONFIRM_DELETE))],
+    [InlineKeyboardButton(text="❌ Нет", callback_data=encode(Op.ADMIN_BACK))]
+])
+
+
+def get_main_keyboard() -> ReplyKeyboardMarkup:
+    return MAIN_KEYBOARD
+
+
+def get_admin_main_keyboard() -> ReplyKeyboardMarkup:
+    return ADMIN_MAIN_KEYBOARD
+
+
+@lru_cache(maxsize=None)
+def get_section_keyboard(section_name: str) -> InlineKeyboardMarkup:
+    code = BY_NAME[section_name].code
+    buttons = [
+        [InlineKeyboardButton(text="Записаться", callback_data=encode(Op.REGISTER, code))],
+        [InlineKeyboardButton(text="Расписание", callback_data=encode(Op.SCHEDULE, code))],
+        [InlineKeyboardButton(text="🔔 Подписка на новые расписания", callback_data=encode(Op.SUBSCRIBE, code))]
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+@lru_cache(maxsize=None)
+def get_broadcast_keyboard(section_name: str) -> InlineKeyboardMarkup:
+    """Кнопки под сообщением рассылки о новом расписании"""
+    code = BY_NAME[section_name].code
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="📅 Открыть расписание", callback_data=encode(Op.SCHEDULE, code))],
+        [InlineKeyboardButton(text="🔕 Отписаться", callback_data=encode(Op.SUBSCRIBE, code))]
+    ])
+
+
+@lru_cache(maxsize=None)
+def get_sections_keyboard(action: str) -> InlineKeyboardMarkup:
+    """Выбор раздела в админ-панели; action — код операции (Op.ADMIN_ADD, Op.ADMIN_MANAGE)"""
+    buttons = [
+        [InlineKeyboardButton(text=section.title, callback_data=encode(action, section.code))]
+        for section in SECTIONS
+    ]
+    buttons.append([InlineKeyboardButton(text="🔙 Назад", callback_data=encode(Op.ADMIN_BACK))])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+@lru_cache(maxsize=4096)
+def get_schedule_keyboard(
+    section_name: str,
+    index: int,
+    total: int,
+    details_id: int = None,
+    register_id: int = None
+) -> InlineKeyboardMarkup:
+    """Навигация по расписаниям; details_id — ID расписания, если у него есть «Подробнее»,
+    register_id — ID расписания для кнопки записи
+    """
+    code = BY_NAME[section_name].code
+    keyboard_buttons = [
+        [
+            InlineKeyboardButton(text="⬅️", callback_data=encode(Op.PREV, code)),
+            InlineKeyboardButton(text=f"{index + 1}/{total}", callback_data=encode(Op.POSITION)),
+            InlineKeyboardButton(text="➡️", callback_data=encode(Op.NEXT, code))
+        ]
+    ]
+
+    if details_id is not None:
+        keyboard_buttons.append([InlineKeyboardButton(text="🔍 Подробнее", callback_data=encode(Op.DETAILS, details_id))])
+
+    if register_id is not None:
+        keyboard_buttons.append([InlineKeyboardButton(text="✍️ Записаться", callback_data=encode(Op.SIGN_UP, register_id))])
+
+    keyboard_buttons.append([InlineKeyboardButton(text="🔙 Назад", callback_data=encode(Op.BACK_TO_SECTION, code))])
+
+    return InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
+
+
+@lru_cache(maxsize=4096)
+def get_registration_keyboard(schedule_id: int) -> InlineKeyboardMarkup:
+    """Кнопка отмены под сообщением о записи"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="❌ Отменить запись", callback_data=encode(Op.CANCEL_SIGN_UP, schedule_id))]
+    ])
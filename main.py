@@ -1,271 +1,237 @@
 import asyncio
 from aiogram import Bot, Dispatcher, types, F
-from aiogram.types import (
-    FSInputFile, 
-    ReplyKeyboardMarkup, 
-    KeyboardButton,
-    InlineKeyboardMarkup,
-    InlineKeyboardButton
-)
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.dispatcher.event.bases import SkipHandler
 from aiogram.filters import CommandStart, Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from config import BOT_TOKEN
 import os
-from database import get_schedules, get_schedule_by_id
+import database
+from catalog import catalog
+from media import media
+from section_texts import section_texts
+from sections import BY_NAME, BY_TITLE, TITLES, get_section_name
+from callbacks import Op, callback_router
+from keyboards import (
+    get_main_keyboard,
+    get_section_keyboard,
+    get_schedule_keyboard,
+    get_registration_keyboard,
+    DETAILS_KEYBOARD,
+    SUPPORT_BUTTON_TEXT
+)
+from paging import edit_in_place, render_coalescer
+from broadcast import broadcaster
+from registrations import notify_seat_available, close as close_seat_notices
+from reminders import reminders
+from support import support
+from analytics import SCHEDULE, analytics, AnalyticsMiddleware, record_view
+from inline_search import inline_search
+from event_time import format_period
+import metrics
+import settings
+from ratelimit import RateLimiter
+from storage import SQLiteStorage
+from scheduler import UpdateScheduler
+from polling import run_polling
+from webhook import run_webhook
+from cluster import run_cluster
 from admin import admin_router
-bot = Bot(token=BOT_TOKEN)
-dp = Dispatcher()
+
+def create_session() -> AiohttpSession:
+    if settings.BOT_API_URL:
+        return AiohttpSession(
+            api=TelegramAPIServer.from_base(settings.BOT_API_URL),
+            limit=settings.BOT_API_CONNECTIONS
+        )
+    return AiohttpSession(limit=settings.BOT_API_CONNECTIONS)
+
+bot = Bot(token=BOT_TOKEN, session=create_session())
+rate_limiter = RateLimiter(
+    global_rate=settings.RATE_LIMIT_GLOBAL,
+    chat_rate=settings.RATE_LIMIT_CHAT,
+    group_rate=settings.RATE_LIMIT_GROUP
+)
+storage = SQLiteStorage(
+    max_entries=settings.FSM_HOT_ENTRIES,
+    idle_ttl=settings.FSM_IDLE_TTL,
+    flush_interval=settings.FSM_FLUSH_INTERVAL,
+    retention=settings.FSM_RETENTION_DAYS * 24 * 3600
+)
+dp = Dispatcher(storage=storage)
 dp.include_router(admin_router)
+# Все inline-кнопки обрабатываются одной таблицей из callbacks.py
+dp.callback_query.register(callback_router.dispatch)
+metrics.setup(dp, bot)
+dp.update.outer_middleware(AnalyticsMiddleware(analytics))
+bot.session.middleware(rate_limiter)
+scheduler = UpdateScheduler(
+    dp, bot,
+    concurrency=settings.UPDATE_CONCURRENCY,
+    max_pending=settings.UPDATE_QUEUE_LIMIT
+)
+render_coalescer.attach(scheduler.queued)
+metrics.add_collector("scheduler", scheduler.stats)
+metrics.add_collector("ratelimit", rate_limiter.stats)
+metrics.add_collector("catalog", catalog.stats)
+metrics.add_collector("fsm", storage.stats)
+metrics.add_collector("broadcast", broadcaster.stats)
+metrics.add_collector("reminders", reminders.stats)
+metrics.add_collector("support", support.stats)
+metrics.add_collector("analytics", analytics.stats)
+metrics.add_collector("inline", inline_search.stats)
+metrics.add_collector("paging", render_coalescer.stats)
 
 class UserState(StatesGroup):
     WAITING_SECTION = State()
+    WAITING_SUPPORT = State()
 
 def load_section_text(section_name):
-    try:
-        file_path = os.path.join("texts", f"{section_name}.txt")
-        with open(file_path, "r", encoding="utf-8") as file:
-            return file.read()
-    except FileNotFoundError:
+    text = section_texts.get(section_name)
+    if text is None:
         return f"Раздел '{section_name}' временно недоступен."
-
-def get_section_keyboard(section_name):
-    buttons = [
-        [InlineKeyboardButton(text="Записаться", callback_data=f"register_{section_name}")],
-        [InlineKeyboardButton(text="Расписание", callback_data=f"schedule_{section_name}")]
-    ]
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
-
-def get_main_keyboard():
-    buttons = [
-        [
-            KeyboardButton(text="📅 Ближайшие мероприятия"),
-            KeyboardButton(text="🎓 Образовательные программы"),
-            KeyboardButton(text="👥 Группы специалистов")
-        ],
-        [
-            KeyboardButton(text="🏫 Курсы для всех"),
-            KeyboardButton(text="🎤 Лекторий"),
-            KeyboardButton(text="🎬 Киноклуб")
-        ],
-        [
-            KeyboardButton(text="💬 Псих. консультации"),
-            KeyboardButton(text="🌐 Конференции"),
-            KeyboardButton(text="🚀 Проекты академии")
-        ],
-        [
-            KeyboardButton(text="📚 Библиотека материалов"),
-            KeyboardButton(text="📩 Написать администратору 👨💼")
-        ]
-    ]
-    return ReplyKeyboardMarkup(keyboard=buttons, resize_keyboard=True)
+    return text
 
 @dp.message(CommandStart())
 async def start_command(message: types.Message, state: FSMContext):
     await state.clear()
-    photo = FSInputFile("images/logo.jpg")
-    await message.answer_photo(
-        photo,
+    await media.answer_photo(
+        message,
+        "images/logo.jpg",
         caption="""Здравствуйте! Добро пожаловать в Академию Психологического Консультирования — пространство для психологов, стремящихся к росту, поддержке и профессиональному развитию.\n\nЯ — бот Академии.\n\nГотов помочь вам сориентироваться!"""
     )
     await message.answer("Выберите раздел:", reply_markup=get_main_keyboard())
 
-@dp.message(F.text.in_([
-    "📅 Ближайшие мероприятия", "🎓 Образовательные программы",
-    "👥 Группы специалистов", "🏫 Курсы для всех", "🎤 Лекторий",
-    "🎬 Киноклуб", "💬 Псих. консультации", "🌐 Конференции",
-    "🚀 Проекты академии", "📚 Библиотека материалов"
-]))
-async def handle_any_section(message: types.Message, state: FSMContext):
-    section_mapping = {
-        "📅 Ближайшие мероприятия": "ближайшие_мероприятия",
-        "🎓 Образовательные программы": "образовательные_программы",
-        "👥 Группы специалистов": "группы_специалистов",
-        "🏫 Курсы для всех": "курсы_для_всех",
-        "🎤 Лекторий": "лекторий",
-        "🎬 Киноклуб": "киноклуб",
-        "💬 Псих. консультации": "псих_консультации",
-        "🌐 Конференции": "конференции",
-        "🚀 Проекты академии": "проекты_академии",
-        "📚 Библиотека материалов": "библиотека_материалов"
-    }
+@dp.message(F.text == SUPPORT_BUTTON_TEXT)
+async def support_start(message: types.Message, state: FSMContext):
+    await state.set_state(UserState.WAITING_SUPPORT)
+    await message.answer(
+        "✍️ Напишите вопрос одним сообщением, можно с фото или документом. "
+        "Администратор ответит в этот чат."
+    )
+
+@dp.message(UserState.WAITING_SUPPORT)
+async def support_message(message: types.Message, state: FSMContext):
+    if message.text is not None and (message.text in TITLES or message.text.startswith("/")):
+        # Кнопка меню или команда — это не вопрос: выходим из режима обращения
+        # и передаём сообщение обычным обработчикам
+        await state.clear()
+        raise SkipHandler()
+    if not support.accepts(message):
+        await message.answer("Отправьте, пожалуйста, текст, фото, видео или документ.")
+        return
     
-    section_name = section_mapping[message.text]
+    # Пересылка администраторам идёт из очереди, обработчик её не ждёт
+    ticket_id = await support.enqueue(message)
+    await state.clear()
+    await message.answer(
+        f"✅ Сообщение передано администратору (обращение #{ticket_id}). Ответ придёт в этот чат.",
+        reply_markup=get_main_keyboard()
+    )
+
+@dp.message(F.text.in_(TITLES))
+async def handle_any_section(message: types.Message, state: FSMContext):
+    section_name = BY_TITLE[message.text].name
     text = load_section_text(section_name)
     await message.answer(text, reply_markup=get_section_keyboard(section_name))
     
-@dp.callback_query(F.data.startswith("schedule_"))
-async def show_schedule(callback: types.CallbackQuery, state: FSMContext):
-    section_name = callback.data[len("schedule_"):].strip()
-    schedules = get_schedules(section_name)
+@callback_router.handler(Op.SCHEDULE)
+async def show_schedule(callback: types.CallbackQuery, state: FSMContext, section_code: str):
+    section_name = get_section_name(section_code)
+    rendered = await _render_schedule(section_name)
     
-    if not schedules:
+    if rendered is None:
         await callback.answer("Расписания пока не добавлены.")
         return
     
-    # Удаляем предыдущее сообщение с расписанием, если есть
-    try:
-        data = await state.get_data()
-        if "last_schedule_message_id" in data:
-            await bot.delete_message(
-                chat_id=callback.message.chat.id,
-                message_id=data["last_schedule_message_id"]
-            )
-    except:
-        pass
-    
-    # Отправляем новое сообщение
-    new_message = await callback.message.answer(
-        "Загружаю расписание...",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Загрузка...", callback_data="loading")]])
-    )
-    
+    # В состоянии храним только курсор: раздел и ID текущего расписания
+    schedule_id, text, keyboard = rendered
     await state.set_data({
-        "current_index": 0,
-        "schedules": schedules,
         "section_name": section_name,
-        "last_schedule_message_id": new_message.message_id
+        "schedule_id": schedule_id
     })
     
-    await _show_current_schedule(new_message, state)
+    # Расписание показывается в том же сообщении, что и раздел
+    await edit_in_place(callback.message, text, keyboard)
+    record_view(SCHEDULE, schedule_id, callback.from_user.id)
     await callback.answer()
 
-async def _show_current_schedule(message: types.Message, state: FSMContext):
-    data = await state.get_data()
-    current_index = data["current_index"]
-    schedules = data["schedules"]
-    section_name = data["section_name"]
-    
-    schedule_id, schedule_text, details_text = schedules[current_index]
-    total = len(schedules)
-    
-    keyboard_buttons = [
-        [
-            InlineKeyboardButton(text="⬅️", callback_data=f"nav_prev_{section_name}"),
-            InlineKeyboardButton(text=f"{current_index + 1}/{total}", callback_data="nav_current"),
-            InlineKeyboardButton(text="➡️", callback_data=f"nav_next_{section_name}")
-        ]
-    ]
-    
-    if details_text:
-        keyboard_buttons.append([InlineKeyboardButton(text="🔍 Подробнее", callback_data=f"view_details_{schedule_id}")])
-    
-    keyboard_buttons.append([InlineKeyboardButton(text="🔙 Назад", callback_data=f"back_to_{section_name}")])
-    
-    keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
-    
-    # Всегда редактируем сообщение, если это возможно
-    try:
-        await message.edit_text(
-            f"📅 Расписание ({current_index + 1}/{total}):\n\n{schedule_text}",
-            reply_markup=keyboard
-        )
-    except:
-        # Если редактирование невозможно (новое сообщение), создаем новое
-        await message.answer(
-            f"📅 Расписание ({current_index + 1}/{total}):\n\n{schedule_text}",
-            reply_markup=keyboard
-        )
-        
-@dp.callback_query(F.data.startswith("nav_"))
-async def navigate_schedules(callback: types.CallbackQuery, state: FSMContext):
+async def _render_schedule(section_name: str, schedule_id: int = None):
+    """(schedule_id, текст, клавиатура) для расписания под курсором или None"""
+    position = await catalog.locate(section_name, schedule_id)
+    if position is None:
+        return None
+    
+    current_index, total, (schedule_id, schedule_text, details_text) = position
+    keyboard = get_schedule_keyboard(
+        section_name, current_index, total,
+        details_id=schedule_id if details_text else None,
+        register_id=schedule_id
+    )
+    period = catalog.get_period(schedule_id)
+    if period is not None:
+        schedule_text = f"🗓 {format_period(*period)}\n\n{schedule_text}"
+    return schedule_id, f"📅 Расписание ({current_index + 1}/{total}):\n\n{schedule_text}", keyboard
+
+async def _show_current_schedule(message: types.Message, state: FSMContext, user_id: int):
     data = await state.get_data()
     
-    if "current_index" not in data:
-        data["current_index"] = 0
-    if "schedules" not in data:
-        section_name = callback.data.split("_")[-1]
-        schedules = get_schedules(section_name)
-        if not schedules:
-            await callback.answer("Нет доступных расписаний")
-            return
-        data["schedules"] = schedules
     if "section_name" not in data:
-        data["section_name"] = callback.data.split("_")[-1]
-    
-    current_index = data["current_index"]
-    schedules = data["schedules"]
-    section_name = data["section_name"]
-    total = len(schedules)
-    
-    action = callback.data.split("_")[1]
-    
-    if action == "prev":
-        new_index = (current_index - 1) % total
-    elif action == "next":
-        new_index = (current_index + 1) % total
-    else:
-        await callback.answer()
+        await message.answer("Ошибка: раздел не определен")
         return
     
-    # Удаляем предыдущее сообщение с расписанием
-    try:
-        if "last_schedule_message_id" in data:
-            await bot.delete_message(
-                chat_id=callback.message.chat.id,
-                message_id=data["last_schedule_message_id"]
-            )
-    except:
-        pass
-    
-    await state.update_data(current_index=new_index)
-    
-    # Отправляем новое сообщение и сохраняем его ID
-    new_message = await callback.message.answer(
-        "Загружаю расписание...",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Загрузка...", callback_data="loading")]])
-    )
+    rendered = await _render_schedule(data["section_name"], data.get("schedule_id"))
+    if rendered is None:
+        await message.answer("Ошибка: данные расписания не найдены")
+        return
     
-    await state.update_data(last_schedule_message_id=new_message.message_id)
+    schedule_id, text, keyboard = rendered
+    if schedule_id != data.get("schedule_id"):
+        await state.update_data(schedule_id=schedule_id)
     
-    # Показываем текущее расписание
-    await _show_current_schedule(new_message, state)
+    await edit_in_place(message, text, keyboard)
+    record_view(SCHEDULE, schedule_id, user_id)
+
+@callback_router.handler(Op.PREV)
+async def show_previous_schedule(callback: types.CallbackQuery, state: FSMContext, section_code: str):
+    await navigate_schedules(callback, state, section_code, -1)
+
+@callback_router.handler(Op.NEXT)
+async def show_next_schedule(callback: types.CallbackQuery, state: FSMContext, section_code: str):
+    await navigate_schedules(callback, state, section_code, 1)
+
+@callback_router.handler(Op.POSITION)
+async def ignore_button(callback: types.CallbackQuery, state: FSMContext):
     await callback.answer()
 
-async def _show_current_schedule(message: types.Message, state: FSMContext):
+# Кнопки листания: серия их нажатий перерисовывает сообщение один раз
+NAVIGATION_OPS = (Op.PREV, Op.NEXT)
+
+async def navigate_schedules(callback: types.CallbackQuery, state: FSMContext, section_code: str, step: int):
     data = await state.get_data()
-    
-    if "current_index" not in data:
-        data["current_index"] = 0
-    if "schedules" not in data:
-        await message.answer("Ошибка: данные расписания не найдены")
-        return
-    if "section_name" not in data:
-        await message.answer("Ошибка: раздел не определен")
+    # Раздел берётся из кнопки: состояние могло остаться от сообщения другого
+    # раздела, а курсор чужого раздела locate сбрасывает на первое расписание
+    section_name = get_section_name(section_code)
+    position = await catalog.locate(section_name, data.get("schedule_id"), step)
+    if position is None:
+        await callback.answer("Нет доступных расписаний")
         return
     
-    current_index = data["current_index"]
-    schedules = data["schedules"]
-    section_name = data["section_name"]
+    _, _, (schedule_id, _, _) = position
+    await state.update_data(section_name=section_name, schedule_id=schedule_id)
     
-    schedule_id, schedule_text, details_text = schedules[current_index]
-    total = len(schedules)
-    
-    keyboard_buttons = [
-        [
-            InlineKeyboardButton(text="⬅️", callback_data=f"nav_prev_{section_name}"),
-            InlineKeyboardButton(text=f"{current_index + 1}/{total}", callback_data="nav_current"),
-            InlineKeyboardButton(text="➡️", callback_data=f"nav_next_{section_name}")
-        ]
-    ]
-    
-    if details_text:
-        keyboard_buttons.append([InlineKeyboardButton(text="🔍 Подробнее", callback_data=f"view_details_{schedule_id}")])
-    
-    keyboard_buttons.append([InlineKeyboardButton(text="🔙 Назад", callback_data=f"back_to_{section_name}")])
-    
-    keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
-    
-    # Всегда редактируем сообщение
-    await message.edit_text(
-        f"📅 Расписание ({current_index + 1}/{total}):\n\n{schedule_text}",
-        reply_markup=keyboard
-    )
+    # Курсор сдвигается всегда, а при серии быстрых нажатий сообщение
+    # перерисовывает только последнее из них
+    if not render_coalescer.superseded(callback.message, NAVIGATION_OPS):
+        await _show_current_schedule(callback.message, state, callback.from_user.id)
+    await callback.answer()
 
-@dp.callback_query(F.data.startswith("view_details_"))
-async def show_details(callback: types.CallbackQuery, state: FSMContext):
-    schedule_id = int(callback.data[len("view_details_"):])
-    schedule = get_schedule_by_id(schedule_id)
+@callback_router.handler(Op.DETAILS)
+async def show_details(callback: types.CallbackQuery, state: FSMContext, schedule_id: str):
+    schedule_id = int(schedule_id)
+    schedule = await catalog.get_schedule_by_id(schedule_id)
     
     if not schedule or not schedule[1]:
         await callback.answer("Нет дополнительной информации")
@@ -273,91 +239,163 @@ async def show_details(callback: types.CallbackQuery, state: FSMContext):
     
     schedule_text, details_text = schedule
     
-    # Сохраняем schedule_id в state для возврата
-    data = await state.get_data()
-    await state.update_data({
-        "current_schedule_id": schedule_id,
-        "section_name": data.get("section_name", "")
-    })
+    # Курсор указывает на это расписание, чтобы вернуться к нему
+    await state.update_data(schedule_id=schedule_id)
     
-    await callback.message.answer(
-        f"🔍 Подробности:\n\n{details_text}",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🔙 Назад к расписанию", callback_data="back_to_schedule")]
-        ])
-    )
+    await edit_in_place(callback.message, f"🔍 Подробности:\n\n{details_text}", DETAILS_KEYBOARD)
     await callback.answer()
 
-@dp.callback_query(F.data == "back_to_schedule")
+@callback_router.handler(Op.BACK_TO_SCHEDULE)
 async def back_to_schedule(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
-    section_name = data.get("section_name", "")
-    schedules = data.get("schedules", [])
-    current_index = data.get("current_index", 0)
     
-    if not schedules:
+    if "section_name" not in data:
         await callback.answer("Ошибка: данные расписания не найдены")
         return
     
-    schedule_id = data.get("current_schedule_id")
-    if schedule_id:
-        for i, (s_id, _, _) in enumerate(schedules):
-            if s_id == schedule_id:
-                current_index = i
-                break
-    
-    # Удаляем сообщение с подробностями
-    try:
-        await callback.message.delete()
-    except:
-        pass
+    await _show_current_schedule(callback.message, state, callback.from_user.id)
+    await callback.answer()
+
+@callback_router.handler(Op.BACK_TO_SECTION)
+async def back_to_section(callback: types.CallbackQuery, state: FSMContext, section_code: str):
+    section_name = get_section_name(section_code)
+    text = load_section_text(section_name)
+    await edit_in_place(callback.message, text, get_section_keyboard(section_name))
+    await state.clear()
+    await callback.answer()
+
+@callback_router.handler(Op.SUBSCRIBE)
+async def toggle_subscription(callback: types.CallbackQuery, state: FSMContext, section_code: str):
+    section_name = get_section_name(section_code)
+    subscribed = await database.toggle_subscription(callback.from_user.id, section_name)
+    if subscribed:
+        text = "🔔 Вы подписались: бот сообщит о новых расписаниях раздела. Нажмите ещё раз, чтобы отписаться."
+    else:
+        text = "🔕 Вы отписались от новых расписаний раздела."
+    await callback.answer(text, show_alert=True)
+
+@callback_router.handler(Op.REGISTER)
+async def choose_event_to_register(callback: types.CallbackQuery, state: FSMContext, section_code: str):
+    # Записываются на конкретное мероприятие: открываем расписание раздела,
+    # под каждым мероприятием есть кнопка «Записаться»
+    await show_schedule(callback, state, section_code)
+
+@callback_router.handler(Op.SIGN_UP)
+async def sign_up(callback: types.CallbackQuery, state: FSMContext, schedule_id: str):
+    schedule_id = int(schedule_id)
+    result = await database.register(schedule_id, callback.from_user.id)
+    if result is None:
+        await callback.answer("Мероприятие не найдено", show_alert=True)
+        return
     
-    await state.update_data(current_index=current_index)
+    status, position, created = result
+    if created and status == database.CONFIRMED:
+        reminders.track(schedule_id)
+    if not created:
+        if status == database.CONFIRMED:
+            await callback.answer("Вы уже записаны на это мероприятие", show_alert=True)
+        else:
+            await callback.answer(f"Вы уже в листе ожидания, ваш номер: {position}", show_alert=True)
+        return
     
-    # Получаем или создаем новое сообщение для расписания
-    if "last_schedule_message_id" in data:
-        try:
-            msg = await bot.edit_message_text(
-                chat_id=callback.message.chat.id,
-                message_id=data["last_schedule_message_id"],
-                text="Загружаю расписание..."
-            )
-            await _show_current_schedule(msg, state)
-        except:
-            new_message = await callback.message.answer(
-                "Загружаю расписание...",
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Загрузка...", callback_data="loading")]])
-            )
-            await state.update_data(last_schedule_message_id=new_message.message_id)
-            await _show_current_schedule(new_message, state)
+    schedule = await catalog.get_schedule_by_id(schedule_id)
+    schedule_text = schedule[0] if schedule else ""
+    if status == database.CONFIRMED:
+        text = f"✅ Вы записаны!\n\n{schedule_text}"
     else:
-        new_message = await callback.message.answer(
-            "Загружаю расписание...",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Загрузка...", callback_data="loading")]])
-        )
-        await state.update_data(last_schedule_message_id=new_message.message_id)
-        await _show_current_schedule(new_message, state)
-    
+        text = f"⏳ Свободных мест нет. Вы в листе ожидания под номером {position}, мы сообщим, если место освободится.\n\n{schedule_text}"
+    await callback.message.answer(text, reply_markup=get_registration_keyboard(schedule_id))
     await callback.answer()
 
-@dp.callback_query(F.data.startswith("nav_back_"))
-async def back_to_schedule(callback: types.CallbackQuery, state: FSMContext):
-    await _show_current_schedule(callback.message, state)
+@callback_router.handler(Op.CANCEL_SIGN_UP)
+async def cancel_sign_up(callback: types.CallbackQuery, state: FSMContext, schedule_id: str):
+    schedule_id = int(schedule_id)
+    result = await database.cancel_registration(schedule_id, callback.from_user.id)
+    if result is None:
+        await callback.answer("Записи уже нет", show_alert=True)
+        return
+    
+    _, promoted = result
+    await edit_in_place(callback.message, "Запись отменена.", None)
     await callback.answer()
+    notify_seat_available(callback.bot, schedule_id, promoted)
 
-@dp.callback_query(F.data.startswith("back_to_"))
-async def back_to_section(callback: types.CallbackQuery, state: FSMContext):
-    section_name = callback.data[8:]  # Убираем "back_to_"
-    text = load_section_text(section_name)
-    await callback.message.edit_text(text, reply_markup=get_section_keyboard(section_name))
-    await state.clear()
-    await callback.answer()
+def _inline_article(schedule_id: int):
+    """Результат встроенного поиска по расписанию из каталога или None, если его уже нет"""
+    entry = catalog.get_entry(schedule_id)
+    if entry is None:
+        return None
+    section_name, schedule_text, details_text = entry
+    section_title = BY_NAME[section_name].title if section_name in BY_NAME else section_name
+    period = catalog.get_period(schedule_id)
+    when = f"🗓 {format_period(*period)}" if period else ""
+    text = "\n\n".join(part for part in (section_title, when, schedule_text, details_text) if part)
+    return types.InlineQueryResultArticle(
+        id=str(schedule_id),
+        title=schedule_text.split("\n", 1)[0][:100],
+        description=" · ".join(part for part in (when, section_title) if part),
+        input_message_content=types.InputTextMessageContent(message_text=text[:4096])
+    )
 
-async def main():
-    os.makedirs("texts", exist_ok=True)
+@dp.inline_query()
+async def inline_schedule_search(inline_query: types.InlineQuery):
+    offset = int(inline_query.offset) if inline_query.offset.isdigit() else 0
+    found = await inline_search.search(inline_query.query)
+    page = found[offset:offset + settings.INLINE_PAGE_SIZE]
+    results = [article for article in map(_inline_article, page) if article is not None]
+    next_offset = str(offset + len(page)) if offset + len(page) < len(found) else ""
+    await inline_query.answer(results, cache_time=settings.INLINE_CACHE_TIME, next_offset=next_offset)
+
+# Фоновые задачи, которые живут столько же, сколько бот
+_background_tasks = []
+_metrics_runner = None
+
+@dp.startup()
+async def on_startup():
+    global _metrics_runner
+    os.makedirs(settings.TEXTS_DIR, exist_ok=True)
     os.makedirs("images", exist_ok=True)
+    await database.init_db()
+    storage.start()
+    scheduler.start()
+    await catalog.load()
+    await media.preload("images")
+    await section_texts.reload()
+    broadcaster.start(bot)
+    await reminders.start(bot)
+    support.start(bot)
+    analytics.start()
+    _background_tasks.append(asyncio.create_task(section_texts.watch(settings.TEXTS_POLL_INTERVAL)))
+    _background_tasks.append(asyncio.create_task(catalog.archive_loop(settings.ARCHIVE_INTERVAL)))
+    if settings.METRICS_PORT:
+        _metrics_runner = await metrics.start_server(settings.METRICS_HOST, settings.METRICS_PORT)
     print("🤖 Бот запущен!")
-    await dp.start_polling(bot)
+
+@dp.shutdown()
+async def on_shutdown():
+    await scheduler.close()
+    await close_seat_notices()
+    await broadcaster.close()
+    await reminders.close()
+    await support.close()
+    await analytics.close()
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+    if _metrics_runner is not None:
+        await _metrics_runner.cleanup()
+    await storage.close()
+    await database.close()
+
+async def main():
+    if settings.WORKERS > 1:
+        await run_cluster(dp, bot, settings.WORKERS, __name__)
+    elif settings.WEBHOOK_URL:
+        await run_webhook(dp, bot, scheduler)
+    else:
+        # Long polling — для разработки и небольших нагрузок
+        await run_polling(dp, bot, scheduler)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
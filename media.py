@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import os
+
+from aiogram import types
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile
+
+import database
+
+# Поля сообщения, из которых берётся file_id после загрузки
+_MEDIA_FIELDS = ("photo", "video", "animation", "document", "audio", "voice")
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _extract_file_id(message: types.Message) -> str:
+    for field in _MEDIA_FIELDS:
+        value = getattr(message, field, None)
+        if value:
+            # Для фото Telegram возвращает список размеров, берём самый большой
+            return value[-1].file_id if isinstance(value, list) else value.file_id
+    return None
+
+
+class MediaRegistry:
+    """Отправляет файлы из images/ по file_id, загружая каждый только один раз.
+
+    file_id хранится в базе вместе с SHA-256 содержимого файла: если файл
+    на диске изменился, он автоматически загружается заново.
+    """
+
+    def __init__(self):
+        # path -> (mtime_ns, size, sha256), чтобы не пересчитывать хэш на каждую отправку
+        self._digests = {}
+        # path -> (sha256, file_id)
+        self._file_ids = {}
+
+    async def _digest(self, path: str) -> str:
+        stat = os.stat(path)
+        cached = self._digests.get(path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        sha256 = await asyncio.get_running_loop().run_in_executor(None, _file_digest, path)
+        self._digests[path] = (stat.st_mtime_ns, stat.st_size, sha256)
+        return sha256
+
+    async def _cached_file_id(self, path: str, sha256: str) -> str:
+        entry = self._file_ids.get(path)
+        if entry is None:
+            entry = await database.get_media_file(path)
+            if entry is not None:
+                self._file_ids[path] = entry
+        if entry and entry[0] == sha256:
+            return entry[1]
+        return None
+
+    async def preload(self, directory: str = "images"):
+        """Заранее считает хэши файлов, чтобы первая отправка не ждала диск"""
+        for entry in os.scandir(directory):
+            if entry.is_file():
+                await self._digest(entry.path)
+
+    async def answer(self, message: types.Message, kind: str, path: str, **kwargs) -> types.Message:
+        """Отвечает медиа-сообщением: kind — "photo", "document", "video" и т.д."""
+        send = getattr(message, f"answer_{kind}")
+        sha256 = await self._digest(path)
+
+        file_id = await self._cached_file_id(path, sha256)
+        if file_id:
+            try:
+                return await send(**{kind: file_id}, **kwargs)
+            except TelegramBadRequest:
+                # file_id мог стать недействительным (например, сменился бот)
+                self._file_ids.pop(path, None)
+
+        sent = await send(**{kind: FSInputFile(path)}, **kwargs)
+        file_id = _extract_file_id(sent)
+        if file_id:
+            self._file_ids[path] = (sha256, file_id)
+            await database.save_media_file(path, sha256, file_id)
+        return sent
+
+    async def answer_photo(self, message: types.Message, path: str, **kwargs) -> types.Message:
+        return await self.answer(message, "photo", path, **kwargs)
+
+
+media = MediaRegistry()
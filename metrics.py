@@ -0,0 +1,238 @@
+"""Счётчики пользовательских действий и исходящих запросов к Bot API.
+
+Действие — это одно входящее обновление, названное по обработчику, который
+его обработал. Каждый запрос к Bot API, сделанный во время действия (в том
+числе из отложенной задачи, запущенной обработчиком), засчитывается ему.
+
+Для каждого обработчика копятся число вызовов, ошибок и гистограмма
+задержки; задержка делится на время в database.py, в запросах к Bot API и
+в собственном коде. render_prometheus() отдаёт всё в текстовом формате
+Prometheus, а start_server() поднимает для этого HTTP-эндпоинт.
+"""
+import logging
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+
+from aiohttp import web
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+logger = logging.getLogger(__name__)
+
+# Верхние границы корзин гистограммы задержки, секунды
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Action:
+    __slots__ = ("name", "db", "api")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.db = 0.0
+        self.api = 0.0
+
+
+class HandlerStats:
+    __slots__ = ("count", "errors", "total", "db", "api", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.db = 0.0
+        self.api = 0.0
+        # Последняя корзина — всё, что дольше BUCKETS[-1]
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def record(self, elapsed: float, db: float, api: float, failed: bool):
+        self.count += 1
+        self.errors += failed
+        self.total += elapsed
+        self.db += db
+        self.api += api
+        self.buckets[bisect_left(BUCKETS, elapsed)] += 1
+
+    @property
+    def own(self) -> float:
+        return max(0.0, self.total - self.db - self.api)
+
+    def quantile(self, fraction: float) -> float:
+        """Оценка квантиля по гистограмме: верхняя граница нужной корзины"""
+        rank = self.count * fraction
+        seen = 0
+        for bound, hits in zip(BUCKETS, self.buckets):
+            seen += hits
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+_current_action = ContextVar("current_action", default=None)
+
+actions = Counter()
+api_calls = Counter()
+api_calls_by_method = Counter()
+handlers = {}
+swallowed = Counter()
+# Дополнительные показатели: имя -> функция, возвращающая словарь чисел
+_collectors = {}
+started_at = time.time()
+
+
+def name_action(name: str):
+    """Уточняет название текущего действия (например, из таблицы callback-кнопок)"""
+    action = _current_action.get()
+    if action is not None:
+        action.name = name
+
+
+def api_calls_per_action() -> dict:
+    return {
+        name: api_calls[name] / count
+        for name, count in actions.items()
+    }
+
+
+def add_db_time(elapsed: float):
+    """Засчитывает текущему действию время ожидания database.py"""
+    action = _current_action.get()
+    if action is not None:
+        action.db += elapsed
+
+
+def swallowed_exception(where: str):
+    """Вызывается из except, который намеренно глушит исключение: оно не теряется бесследно"""
+    swallowed[where] += 1
+    logger.debug("Проглочено исключение в %s", where, exc_info=True)
+
+
+def add_collector(name: str, collect):
+    _collectors[name] = collect
+
+
+def reset():
+    actions.clear()
+    api_calls.clear()
+    api_calls_by_method.clear()
+    handlers.clear()
+    swallowed.clear()
+
+
+class ActionMiddleware(BaseMiddleware):
+    """Внешний middleware для dp.update: открывает действие и засчитывает его"""
+
+    async def __call__(self, handler, event, data):
+        action = _Action(event.event_type)
+        token = _current_action.set(action)
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await handler(event, data)
+            failed = False
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            actions[action.name] += 1
+            stats = handlers.get(action.name)
+            if stats is None:
+                stats = handlers[action.name] = HandlerStats()
+            stats.record(elapsed, action.db, action.api, failed)
+            _current_action.reset(token)
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Внутренний middleware: называет действие по выбранному обработчику"""
+
+    async def __call__(self, handler, event, data):
+        handler_object = data.get("handler")
+        if handler_object is not None:
+            name_action(getattr(handler_object.callback, "__name__", "unknown"))
+        return await handler(event, data)
+
+
+class ApiCallCounter(BaseRequestMiddleware):
+    """Middleware сессии бота: считает запросы к Bot API по действиям и методам"""
+
+    async def __call__(self, make_request, bot, method):
+        action = _current_action.get()
+        api_calls[action.name if action else "background"] += 1
+        api_calls_by_method[method.__api_method__] += 1
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            if action is not None:
+                action.api += time.perf_counter() - started
+
+
+def setup(dp, bot):
+    dp.update.outer_middleware(ActionMiddleware())
+    dp.message.middleware(HandlerNameMiddleware())
+    dp.callback_query.middleware(HandlerNameMiddleware())
+    bot.session.middleware(ApiCallCounter())
+
+
+def collect() -> dict:
+    """{источник: {показатель: число}} от зарегистрированных add_collector"""
+    result = {}
+    for name, collect_stats in _collectors.items():
+        result[name] = {
+            key: value for key, value in collect_stats().items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        }
+    return result
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def render_prometheus() -> str:
+    lines = [
+        "# TYPE psyacademy_handler_calls_total counter",
+        "# TYPE psyacademy_handler_errors_total counter",
+        "# TYPE psyacademy_handler_seconds histogram",
+        "# TYPE psyacademy_handler_part_seconds_total counter"
+    ]
+    for name, stats in sorted(handlers.items()):
+        label = f'handler="{_label(name)}"'
+        lines.append(f"psyacademy_handler_calls_total{{{label}}} {stats.count}")
+        lines.append(f"psyacademy_handler_errors_total{{{label}}} {stats.errors}")
+        cumulative = 0
+        for bound, hits in zip(BUCKETS, stats.buckets):
+            cumulative += hits
+            lines.append(f'psyacademy_handler_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f'psyacademy_handler_seconds_bucket{{{label},le="+Inf"}} {stats.count}')
+        lines.append(f"psyacademy_handler_seconds_sum{{{label}}} {stats.total}")
+        lines.append(f"psyacademy_handler_seconds_count{{{label}}} {stats.count}")
+        for part, value in (("db", stats.db), ("api", stats.api), ("own", stats.own)):
+            lines.append(f'psyacademy_handler_part_seconds_total{{{label},part="{part}"}} {value}')
+
+    lines.append("# TYPE psyacademy_api_calls_total counter")
+    for method, count in sorted(api_calls_by_method.items()):
+        lines.append(f'psyacademy_api_calls_total{{method="{_label(method)}"}} {count}')
+    lines.append("# TYPE psyacademy_swallowed_exceptions_total counter")
+    for where, count in sorted(swallowed.items()):
+        lines.append(f'psyacademy_swallowed_exceptions_total{{where="{_label(where)}"}} {count}')
+
+    for source, values in collect().items():
+        for key, value in values.items():
+            lines.append(f"psyacademy_{source}_{key} {value}")
+    lines.append(f"psyacademy_start_time_seconds {started_at}")
+    return "\n".join(lines) + "\n"
+
+
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=render_prometheus(), content_type="text/plain", charset="utf-8")
+
+
+async def start_server(host: str, port: int) -> web.AppRunner:
+    """HTTP-эндпоинт /metrics для Prometheus; остановка — runner.cleanup()"""
+    app = web.Application()
+    app.router.add_get("/metrics", _handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,88 @@
+"""Отрисовка страниц редактированием одного сообщения."""
+import logging
+from collections import OrderedDict
+
+from aiogram import types
+from aiogram.exceptions import TelegramBadRequest
+
+from callbacks import decode
+
+logger = logging.getLogger(__name__)
+
+# Сколько сообщений помнить в кэше последней отрисовки
+RENDERED_CACHE_SIZE = 10000
+
+# (chat_id, message_id) -> (текст, клавиатура), которые бот показал последними.
+# Копия сообщения в callback — снимок на момент нажатия, она отстаёт от
+# правок, сделанных после него
+_rendered = OrderedDict()
+
+
+def _remember(message: types.Message, text: str, reply_markup):
+    key = (message.chat.id, message.message_id)
+    _rendered[key] = (text, reply_markup)
+    _rendered.move_to_end(key)
+    if len(_rendered) > RENDERED_CACHE_SIZE:
+        _rendered.popitem(last=False)
+
+
+async def edit_in_place(message: types.Message, text: str, reply_markup=None) -> types.Message:
+    """Показывает text в том же сообщении за один запрос.
+
+    Если текст и клавиатура совпадают с последней отрисовкой этого сообщения,
+    запрос не отправляется вовсе. Если сообщение нельзя отредактировать,
+    отправляется новое.
+    """
+    shown = _rendered.get((message.chat.id, message.message_id), (message.text, message.reply_markup))
+    if shown == (text, reply_markup):
+        return message
+    try:
+        edited = await message.edit_text(text, reply_markup=reply_markup)
+    except TelegramBadRequest as error:
+        if "message is not modified" in error.message:
+            _remember(message, text, reply_markup)
+            return message
+        sent = await message.answer(text, reply_markup=reply_markup)
+        _remember(sent, text, reply_markup)
+        return sent
+    _remember(message, text, reply_markup)
+    return edited if isinstance(edited, types.Message) else message
+
+
+class RenderCoalescer:
+    """Схлопывает перерисовки одного сообщения при серии быстрых нажатий.
+
+    Обновления чата обрабатываются строго по очереди (UpdateScheduler), и
+    перерисовка идёт внутри своего обновления, поэтому не обгоняет
+    «Подробнее» или возврат в раздел. Если в очереди чата уже ждёт следующее
+    нажатие листания того же сообщения, текущее обновление только сдвигает
+    курсор, а сообщение перерисует последнее из них.
+    """
+
+    def __init__(self):
+        self._queued = None
+        self.skipped = 0
+
+    def attach(self, queued):
+        """queued(chat_id) — обновления чата, ещё ждущие обработки"""
+        self._queued = queued
+
+    def superseded(self, message: types.Message, ops) -> bool:
+        """Ждёт ли в очереди нажатие одной из кнопок ops на этом же сообщении"""
+        if self._queued is None:
+            return False
+        for update in self._queued(message.chat.id):
+            callback = update.callback_query
+            if callback is None or callback.message is None or callback.message.message_id != message.message_id:
+                continue
+            decoded = decode(callback.data or "")
+            if decoded is not None and decoded.op in ops:
+                self.skipped += 1
+                return True
+        return False
+
+    def stats(self) -> dict:
+        return {"skipped": self.skipped, "rendered_cached": len(_rendered)}
+
+
+render_coalescer = RenderCoalescer()
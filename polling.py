@@ -0,0 +1,65 @@
+"""Long polling, который передаёт обновления в UpdateScheduler.
+
+Следующий getUpdates уходит, только когда планировщик принял всю пачку,
+поэтому при переполненной очереди бот просто реже забирает обновления,
+а не копит их в памяти.
+"""
+import asyncio
+import logging
+import signal
+
+from aiogram import Bot, Dispatcher
+from aiogram.exceptions import TelegramNetworkError, TelegramServerError
+
+from scheduler import UpdateScheduler
+
+logger = logging.getLogger(__name__)
+
+
+async def _poll(dp: Dispatcher, bot: Bot, scheduler: UpdateScheduler, timeout: int, limit: int):
+    allowed_updates = dp.resolve_used_update_types()
+    offset = None
+    backoff = 1.0
+    while True:
+        try:
+            updates = await bot.get_updates(
+                offset=offset,
+                timeout=timeout,
+                limit=limit,
+                allowed_updates=allowed_updates,
+                request_timeout=timeout + 10
+            )
+        except (TelegramNetworkError, TelegramServerError) as error:
+            logger.warning("getUpdates: %s, повтор через %.0f с", error, backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+            continue
+        backoff = 1.0
+        for update in updates:
+            await scheduler.submit(update)
+            offset = update.update_id + 1
+
+
+async def run_polling(dp: Dispatcher, bot: Bot, scheduler: UpdateScheduler, timeout: int = 30, limit: int = 100):
+    """Запускает бота в режиме long polling и работает до SIGINT/SIGTERM"""
+    workflow_data = {"dispatcher": dp, "bot": bot, "bots": [bot], **dp.workflow_data}
+    await bot.delete_webhook()
+    await dp.emit_startup(**workflow_data)
+
+    poller = asyncio.create_task(_poll(dp, bot, scheduler, timeout, limit))
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, poller.cancel)
+        except NotImplementedError:
+            # Windows: остановка по KeyboardInterrupt
+            pass
+    try:
+        await poller
+    except asyncio.CancelledError:
+        pass
+    finally:
+        # Принятые обновления обрабатываются до закрытия хранилища и сессии
+        await scheduler.close()
+        await dp.emit_shutdown(**workflow_data)
+        await bot.session.close()
@@ -0,0 +1,190 @@
+"""Ограничение исходящих запросов к Bot API.
+
+Telegram допускает около 30 сообщений в секунду на бота, около одного
+сообщения в секунду в личный чат и 20 сообщений в минуту в группу. Все
+запросы с chat_id проходят через общий лимит и лимит своего чата.
+Общий лимит раздаётся по приоритету: ответы пользователям идут раньше
+массовых рассылок. Ответ 429 выдерживается (retry_after плюс нарастающая
+пауза), после чего запрос повторяется.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BULK = 1
+
+_priority = ContextVar("request_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def bulk_priority():
+    """Запросы внутри блока уступают общий лимит ответам пользователям"""
+    token = _priority.set(BULK)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Корзина токенов в виде "времени следующего токена" (GCRA).
+
+    reserve() сразу закрепляет за вызывающим слот и возвращает, сколько до
+    него ждать, поэтому одновременные запросы не занимают один и тот же токен.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.interval = 1.0 / rate
+        self.burst = burst
+        self._next = 0.0
+
+    def delay(self, now: float) -> float:
+        allowed_at = max(self._next, now) - (self.burst - 1) * self.interval
+        return max(0.0, allowed_at - now)
+
+    def reserve(self, now: float) -> float:
+        delay = self.delay(now)
+        self._next = max(self._next, now) + self.interval
+        return delay
+
+    def hold(self, until: float):
+        """Не выдавать токены до момента until (после ответа 429)"""
+        self._next = max(self._next, until + (self.burst - 1) * self.interval)
+
+    def idle(self, now: float) -> bool:
+        return self._next <= now
+
+
+class _PriorityGate:
+    """Выдаёт токены общей корзины ожидающим в порядке приоритета"""
+
+    def __init__(self, bucket: TokenBucket):
+        self._bucket = bucket
+        self._waiters = []
+        self._order = itertools.count()
+        self._pump = None
+
+    def __len__(self):
+        return len(self._waiters)
+
+    async def acquire(self, priority: int):
+        loop = asyncio.get_running_loop()
+        if not self._waiters and self._bucket.delay(loop.time()) == 0:
+            self._bucket.reserve(loop.time())
+            return
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), future))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run())
+        await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._waiters:
+            delay = self._bucket.reserve(loop.time())
+            if delay:
+                await asyncio.sleep(delay)
+            while self._waiters:
+                _, _, future = heapq.heappop(self._waiters)
+                if not future.done():
+                    future.set_result(None)
+                    break
+
+
+class RateLimiter(BaseRequestMiddleware):
+    """Middleware сессии бота, через который проходят все запросы к Bot API"""
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        group_rate: float = 20 / 60,
+        chat_burst: int = 3,
+        max_retries: int = 3,
+        backoff: float = 0.5
+    ):
+        self._global = _PriorityGate(TokenBucket(global_rate))
+        self._chats = {}
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # Метрики
+        self.waiting = 0
+        self.requests = 0
+        self.retries = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def set_global_rate(self, rate: float):
+        """Меняет общий лимит; вызывать до первых запросов"""
+        self._global = _PriorityGate(TokenBucket(rate))
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 10000:
+                self._prune()
+            # Отрицательные ID — группы и каналы, у них лимит строже
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            bucket = TokenBucket(self.group_rate if is_group else self.chat_rate, self.chat_burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _prune(self):
+        now = asyncio.get_running_loop().time()
+        self._chats = {chat_id: bucket for chat_id, bucket in self._chats.items() if not bucket.idle(now)}
+
+    async def _acquire(self, chat_id):
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            delay = self._chat_bucket(chat_id).reserve(asyncio.get_running_loop().time())
+            if delay:
+                await asyncio.sleep(delay)
+            await self._global.acquire(_priority.get())
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - started
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, "chat_id", None)
+        for attempt in range(self.max_retries + 1):
+            if chat_id is not None:
+                await self._acquire(chat_id)
+            self.requests += 1
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as error:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                pause = error.retry_after + self.backoff * 2 ** attempt
+                logger.warning("429 для %s в чате %s, повтор через %.1f с", method.__api_method__, chat_id, pause)
+                if chat_id is not None:
+                    self._chat_bucket(chat_id).hold(asyncio.get_running_loop().time() + pause)
+                else:
+                    await asyncio.sleep(pause)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.waiting,
+            "global_queue_depth": len(self._global),
+            "requests": self.requests,
+            "retries": self.retries,
+            "wait_seconds_total": self.wait_total,
+            "wait_seconds_max": self.wait_max
+        }
@@ -0,0 +1,64 @@
+"""Уведомления о записи на мероприятия.
+
+Сама запись (места, лист ожидания, отмена) — атомарные транзакции в
+database.py; здесь то, что нужно и пользовательским обработчикам, и админке.
+Сообщения получившим место уходят фоновой задачей с низким приоритетом:
+при увеличении вместимости из очереди может пройти весь лист ожидания, и
+обработчик администратора не должен ждать эту рассылку, а ответы другим
+пользователям — стоять за ней в лимитере.
+"""
+import asyncio
+import logging
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+
+import metrics
+from catalog import catalog
+from keyboards import get_registration_keyboard
+from ratelimit import bulk_priority
+from reminders import reminders
+
+logger = logging.getLogger(__name__)
+
+# Незавершённые фоновые рассылки: ссылка не даёт сборщику мусора их прервать
+_tasks = set()
+
+
+def notify_seat_available(bot: Bot, schedule_id: int, user_ids: list):
+    """Сообщает пользователям из листа ожидания, что им досталось место, не дожидаясь отправки"""
+    if not user_ids:
+        return
+    # Получившим место нужны и напоминания о начале
+    reminders.track(schedule_id)
+    task = asyncio.create_task(_send_seat_notices(bot, schedule_id, list(user_ids)))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def _send_seat_notices(bot: Bot, schedule_id: int, user_ids: list):
+    schedule = await catalog.get_schedule_by_id(schedule_id)
+    text = f"🎉 Освободилось место — вы записаны!\n\n{schedule[0] if schedule else ''}"
+    keyboard = get_registration_keyboard(schedule_id)
+
+    async def send(user_id: int):
+        try:
+            await bot.send_message(user_id, text, reply_markup=keyboard)
+        except TelegramAPIError:
+            # Пользователь мог заблокировать бота: место за ним всё равно сохраняется
+            metrics.swallowed_exception("notify_seat_available")
+
+    # Темп задаёт RateLimiter; с низким приоритетом ответы пользователям идут вперёд
+    with bulk_priority():
+        await asyncio.gather(*(send(user_id) for user_id in user_ids))
+
+
+async def close(timeout: float = 10.0):
+    """Дожидается отправки уже начатых уведомлений"""
+    if not _tasks:
+        return
+    done, pending = await asyncio.wait(set(_tasks), timeout=timeout)
+    if pending:
+        logger.warning("Не дождались отправки уведомлений о местах: %s", len(pending))
+        for task in pending:
+            task.cancel()
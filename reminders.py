@@ -0,0 +1,208 @@
+"""Напоминания участникам перед началом мероприятия.
+
+Напоминания хранятся в базе по строке на пользователя и срок (за сутки, за
+час — settings.REMINDER_OFFSETS). В памяти лежит только min-куча групп
+(срок, ID расписания): у всех участников мероприятия напоминание за час
+наступает одновременно, поэтому куча растёт с числом мероприятий, а не
+участников. Цикл спит до вершины кучи и не перебирает таблицу; при запуске
+куча строится из базы заново.
+
+Наступившая группа отправляется пачками с низким приоритетом, после каждой
+пачки отправленные строки удаляются, поэтому после падения повторно может
+прийти не больше одной пачки. Строки, которые не удалось отправить из-за
+сбоя Bot API, остаются и отправляются повторно через poll_interval (если
+мероприятие к тому времени ещё не началось); заблокировавшие бота
+пользователи удаляются сразу. Перенос мероприятия пересчитывает строки
+одним запросом в базе и кладёт в кучу несколько новых групп; устаревшие
+группы при наступлении просто не находят строк. Напоминания, поставленные
+другими процессами, подхватываются раз в poll_interval выборкой по индексу
+due_at — только ставших срочными строк.
+"""
+import asyncio
+import heapq
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError
+
+import database
+import settings
+from catalog import catalog
+from event_time import format_period
+from ratelimit import bulk_priority
+
+logger = logging.getLogger(__name__)
+
+
+def _lead_time_text(lead_time: int) -> str:
+    if lead_time % 86400 == 0:
+        days = lead_time // 86400
+        return "завтра" if days == 1 else f"через {days} дн."
+    if lead_time % 3600 == 0:
+        return f"через {lead_time // 3600} ч."
+    return f"через {lead_time // 60} мин."
+
+
+class ReminderScheduler:
+    def __init__(self, batch_size: int = 100, poll_interval: float = 30.0):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        # В режиме нескольких процессов напоминания отправляет только один воркер
+        self.runner_enabled = True
+        self.bot = None
+        self._heap = []
+        # Группы, уже лежащие в куче: повторная запись не плодит дубликатов
+        self._queued = set()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        # Метрики
+        self.sent = 0
+        self.failed = 0
+        self.blocked = 0
+        self.dropped = 0
+        self.lag_max = 0.0
+
+    async def start(self, bot: Bot):
+        self.bot = bot
+        if self.runner_enabled and self._task is None:
+            await self.load()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def load(self):
+        """Строит кучу заново по ожидающим напоминаниям в базе"""
+        rows = await database.get_reminder_queue()
+        self._heap = [(due_at, schedule_id) for schedule_id, due_at in rows]
+        heapq.heapify(self._heap)
+        self._queued = set(self._heap)
+        self._wakeup.set()
+
+    def track(self, schedule_id: int):
+        """Кладёт в кучу сроки напоминаний мероприятия после записи или переноса.
+
+        Дешёвая операция: не больше len(REMINDER_OFFSETS) групп, база не читается.
+        """
+        period = catalog.get_period(schedule_id)
+        if self._task is None or period is None:
+            # В воркерах без отправки сроки подхватит проверка в отправляющем
+            return
+        now = time.time()
+        for lead_time in settings.REMINDER_OFFSETS:
+            due_at = period[0] - lead_time
+            if due_at > now:
+                self._push(due_at, schedule_id)
+
+    def _push(self, due_at: float, schedule_id: int):
+        item = (due_at, schedule_id)
+        if item in self._queued:
+            return
+        self._queued.add(item)
+        heapq.heappush(self._heap, item)
+        if self._heap[0] is item:
+            # Новая вершина раньше той, до которой спит цикл
+            self._wakeup.set()
+
+    async def _run(self):
+        next_probe = time.monotonic() + self.poll_interval
+        while True:
+            now = time.time()
+            if self._heap and self._heap[0][0] <= now:
+                item = heapq.heappop(self._heap)
+                self._queued.discard(item)
+                try:
+                    kept = await self._fire(item[1], now)
+                except Exception:
+                    logger.exception("Напоминания мероприятия %s не отправлены, повтор через %s с",
+                                     item[1], self.poll_interval)
+                    self._push(now + self.poll_interval, item[1])
+                    continue
+                if kept:
+                    logger.warning("Напоминаний мероприятия %s не отправлено: %s, повтор через %s с",
+                                   item[1], kept, self.poll_interval)
+                    self._push(now + self.poll_interval, item[1])
+                continue
+
+            timeout = max(0.0, next_probe - time.monotonic())
+            if self._heap:
+                timeout = min(timeout, self._heap[0][0] - now)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            if time.monotonic() >= next_probe:
+                next_probe = time.monotonic() + self.poll_interval
+                try:
+                    await self._probe()
+                except Exception:
+                    logger.exception("Не удалось проверить новые напоминания")
+
+    async def _probe(self):
+        """Подхватывает группы, поставленные другими процессами и наступающие до следующей проверки"""
+        for schedule_id, due_at in await database.get_reminders_due_before(time.time() + self.poll_interval):
+            self._push(due_at, schedule_id)
+
+    async def _fire(self, schedule_id: int, now: float) -> int:
+        """Отправляет наступившие напоминания; возвращает, сколько осталось для повтора"""
+        entry = catalog.get_entry(schedule_id)
+        period = catalog.get_period(schedule_id)
+        if entry is None or period is None or period[0] <= now:
+            # Мероприятие удалено, лишилось даты или уже началось
+            self.dropped += await database.drop_due_reminders(schedule_id, now)
+            return 0
+        # Группа проходится один раз по курсору (user_id, lead_time): неотправленные
+        # строки остаются в базе до повтора группы и не мешают дойти до следующих
+        kept = 0
+        cursor = (-1, -1)
+        while True:
+            reminders = await database.get_due_reminders(schedule_id, now, self.batch_size, cursor)
+            if not reminders:
+                return kept
+            cursor = reminders[-1]
+            self.lag_max = max(self.lag_max, time.time() - (period[0] - reminders[0][1]))
+            delivered = await asyncio.gather(*(
+                self._send(user_id, lead_time, entry[1], period) for user_id, lead_time in reminders
+            ))
+            # Удаляются отправленные и заблокировавшие бота; остальные ждут повтора
+            done = [reminder for reminder, ok in zip(reminders, delivered) if ok]
+            await database.delete_reminders(schedule_id, done)
+            kept += len(reminders) - len(done)
+
+    async def _send(self, user_id: int, lead_time: int, schedule_text: str, period: tuple) -> bool:
+        """False, если отправка не удалась и напоминание стоит повторить"""
+        text = (
+            f"⏰ Напоминание: мероприятие начнётся {_lead_time_text(lead_time)}\n"
+            f"🗓 {format_period(*period)}\n\n{schedule_text}"
+        )
+        with bulk_priority():
+            try:
+                await self.bot.send_message(user_id, text[:4096])
+            except TelegramForbiddenError:
+                self.blocked += 1
+                return True
+            except TelegramAPIError as error:
+                logger.warning("Напоминание пользователю %s: %s", user_id, error)
+                self.failed += 1
+                return False
+        self.sent += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._heap),
+            "next_due_in": max(0.0, self._heap[0][0] - time.time()) if self._heap else 0.0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "dropped": self.dropped,
+            "lag_max": self.lag_max
+        }
+
+
+reminders = ReminderScheduler(settings.REMINDER_BATCH, settings.REMINDER_POLL_INTERVAL)
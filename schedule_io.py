@@ -0,0 +1,180 @@
+"""Загрузка расписаний из CSV, JSON Lines или массива JSON и выгрузка в CSV и JSON Lines.
+
+CSV и JSON Lines читаются построчно: проверенные строки сразу уходят в
+executemany внутри одной транзакции, поэтому ни файл, ни список строк
+целиком в памяти не держатся. Массив JSON (файл начинается с «[») так не
+разобрать, он читается целиком — размер файла ограничен MAX_FILE_SIZE. Если хоть одна строка не прошла проверку, транзакция
+откатывается и в базу не попадает ничего.
+
+Колонки (или ключи JSON): section — имя, код или кнопка раздела,
+schedule_text, details_text (необязательно), date — дата в формате ввода
+админ-панели (event_time.INPUT_HINT), пусто или «-» — без даты.
+"""
+import csv
+import io
+import json
+import time
+
+import database
+from catalog import catalog
+from event_time import format_period, parse_period
+from sections import BY_CODE, BY_NAME, BY_TITLE, SECTIONS
+
+FIELDS = ("section", "schedule_text", "details_text", "date")
+# Больше Bot API не даёт боту скачать
+MAX_FILE_SIZE = 20 * 1024 * 1024
+# Ограничение Telegram на длину текста сообщения
+MAX_TEXT_LENGTH = 4096
+# Сколько ошибок показывать администратору
+ERRORS_SHOWN = 10
+
+
+def _section_name(value: str):
+    value = value.strip()
+    section = BY_NAME.get(value) or BY_CODE.get(value) or BY_TITLE.get(value)
+    return section.name if section else None
+
+
+def detect_format(file_name: str) -> str:
+    """«json» для .json/.jsonl, иначе «csv»"""
+    return "json" if (file_name or "").lower().endswith((".json", ".jsonl")) else "csv"
+
+
+class ScheduleReader:
+    """Итератор проверенных строк (section_name, schedule_text, details_text, starts_at, ends_at).
+
+    Ошибки копятся в errors как (номер строки, причина); после последней
+    строки, если ошибки были, итератор бросает ValueError — executemany
+    передаёт его наружу, и транзакция откатывается.
+    """
+
+    def __init__(self, stream, file_format: str = "csv"):
+        self.stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        self.file_format = file_format
+        self.now = time.time()
+        self.errors = []
+        self.total = 0
+        # В массиве JSON ошибки указываются номером записи, а не строки
+        self.unit = "строка"
+
+    def __iter__(self):
+        for line_number, record in self._records():
+            try:
+                yield self._validate(record)
+            except ValueError as error:
+                self.errors.append((line_number, str(error)))
+        if self.errors:
+            raise ValueError(f"Ошибок в файле: {len(self.errors)}")
+
+    def _records(self):
+        if self.file_format == "json":
+            for line_number, line in enumerate(self.stream, 1):
+                if not line.strip():
+                    continue
+                if self.total == 0 and line.lstrip().startswith("["):
+                    yield from self._array(line + self.stream.read())
+                    return
+                self.total += 1
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as error:
+                    self.errors.append((line_number, f"некорректный JSON: {error.msg}"))
+                    continue
+                if not isinstance(record, dict):
+                    self.errors.append((line_number, "ожидается объект JSON"))
+                    continue
+                yield line_number, record
+            return
+        header = self.stream.readline()
+        try:
+            # Excel с русской локалью сохраняет CSV через «;»
+            dialect = csv.Sniffer().sniff(header, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        columns = [column.strip() for column in next(csv.reader([header], dialect), [])]
+        missing = {"section", "schedule_text"} - set(columns)
+        if missing:
+            self.errors.append((1, f"нет колонок: {', '.join(sorted(missing))}"))
+            return
+        reader = csv.DictReader(self.stream, columns, dialect=dialect)
+        for record in reader:
+            if any(value for value in record.values() if isinstance(value, str)):
+                self.total += 1
+                yield reader.line_num + 1, record
+
+    def _array(self, text: str):
+        """Записи массива JSON: [{...}, {...}]"""
+        self.unit = "запись"
+        try:
+            records = json.loads(text)
+        except json.JSONDecodeError as error:
+            self.unit = "строка"
+            self.errors.append((error.lineno, f"некорректный JSON: {error.msg}"))
+            return
+        for index, record in enumerate(records, 1):
+            self.total += 1
+            if not isinstance(record, dict):
+                self.errors.append((index, "ожидается объект JSON"))
+                continue
+            yield index, record
+
+    def _validate(self, record: dict) -> tuple:
+        section_name = _section_name(str(record.get("section") or ""))
+        if section_name is None:
+            raise ValueError(f"неизвестный раздел «{record.get('section')}»")
+        schedule_text = str(record.get("schedule_text") or "").strip()
+        if not schedule_text:
+            raise ValueError("пустой текст расписания")
+        details_text = str(record.get("details_text") or "").strip() or None
+        if len(schedule_text) > MAX_TEXT_LENGTH or len(details_text or "") > MAX_TEXT_LENGTH:
+            raise ValueError(f"текст длиннее {MAX_TEXT_LENGTH} символов")
+        starts_at, ends_at = parse_period(str(record.get("date") or "-"))
+        if ends_at is not None and ends_at <= self.now:
+            raise ValueError("мероприятие уже закончилось")
+        return section_name, schedule_text, details_text, starts_at, ends_at
+
+    def report(self) -> str:
+        lines = [f"⚠️ Файл не загружен: ошибок {len(self.errors)} (проверено записей: {self.total})."]
+        lines += [f"• {self.unit} {line_number}: {reason}" for line_number, reason in self.errors[:ERRORS_SHOWN]]
+        if len(self.errors) > ERRORS_SHOWN:
+            lines.append("…")
+        return "\n".join(lines)
+
+
+async def import_schedules(reader: ScheduleReader) -> int:
+    """Загружает расписания из reader и возвращает их число.
+
+    Каталог перечитывается один раз на весь файл; ValueError, если файл
+    не прошёл проверку (подробности в reader.report()).
+    """
+    return await catalog.import_schedules(reader, [section.name for section in SECTIONS])
+
+
+def _date(starts_at, ends_at) -> str:
+    return format_period(starts_at, ends_at) if starts_at is not None else "-"
+
+
+async def export_schedules(stream, file_format: str = "csv") -> int:
+    """Записывает незавершившиеся расписания в бинарный поток в формате загрузки и возвращает их число"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig" if file_format == "csv" else "utf-8", newline="")
+
+    def write(rows) -> int:
+        count = 0
+        if file_format == "csv":
+            writer = csv.writer(text)
+            writer.writerow(FIELDS)
+        for section_name, schedule_text, details_text, starts_at, ends_at in rows:
+            values = (section_name, schedule_text, details_text or "", _date(starts_at, ends_at))
+            if file_format == "csv":
+                writer.writerow(values)
+            else:
+                text.write(json.dumps(dict(zip(FIELDS, values)), ensure_ascii=False) + "\n")
+            count += 1
+        text.flush()
+        return count
+
+    try:
+        return await database.export_schedules(write)
+    finally:
+        # Поток остаётся открытым для отправки файла
+        text.detach()
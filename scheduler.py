@@ -0,0 +1,137 @@
+"""Параллельная обработка обновлений с сохранением порядка внутри чата.
+
+Обновления разных чатов обрабатываются одновременно, но не больше
+concurrency штук сразу. Обновления одного чата идут строго по очереди,
+поэтому два быстрых нажатия «➡️» не гоняются за курсор в FSM. Если в
+очереди накопилось max_pending обновлений, submit() ждёт, пока она
+разгрузится, — так перегрузка доходит до источника (polling или webhook).
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+
+logger = logging.getLogger(__name__)
+
+
+def chat_key(update: Update):
+    """Ключ очереди: ID чата, а если чата нет — ID пользователя"""
+    event = update.event
+    chat = getattr(event, "chat", None)
+    if chat is None and getattr(event, "message", None) is not None:
+        chat = event.message.chat
+    if chat is not None:
+        return chat.id
+    user = getattr(event, "from_user", None)
+    if user is not None:
+        return user.id
+    # Обновления без чата и пользователя упорядочивать не нужно
+    return ("update", update.update_id)
+
+
+class UpdateScheduler:
+    def __init__(self, dp: Dispatcher, bot: Bot, concurrency: int = 64, max_pending: int = 10000):
+        self.dp = dp
+        self.bot = bot
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        # chat -> deque[(время постановки, update)]
+        self._queues = {}
+        # Чаты, у которых есть работа и которые сейчас никто не обрабатывает
+        self._ready = asyncio.Queue()
+        self._has_space = asyncio.Event()
+        self._has_space.set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._workers = []
+        self.pending = 0
+        # Метрики
+        self.processed = 0
+        self.failed = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.backpressure_waits = 0
+
+    def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def submit(self, update: Update):
+        """Ставит обновление в очередь своего чата; ждёт, если очередь переполнена"""
+        if self.pending >= self.max_pending:
+            self.backpressure_waits += 1
+        while self.pending >= self.max_pending:
+            self._has_space.clear()
+            await self._has_space.wait()
+
+        key = chat_key(update)
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+            self._ready.put_nowait(key)
+        queue.append((time.monotonic(), update))
+        self.pending += 1
+        self._idle.clear()
+
+    async def _worker(self):
+        while True:
+            key = await self._ready.get()
+            queue = self._queues[key]
+            enqueued_at, update = queue.popleft()
+            lag = time.monotonic() - enqueued_at
+            self.lag_total += lag
+            self.lag_max = max(self.lag_max, lag)
+            try:
+                result = await self.dp.feed_update(self.bot, update)
+                if isinstance(result, TelegramMethod):
+                    await self.dp.silent_call_request(self.bot, result)
+            except Exception:
+                self.failed += 1
+                logger.exception("Ошибка при обработке обновления %s", update.update_id)
+            finally:
+                self.processed += 1
+                self.pending -= 1
+                if queue:
+                    # Чат встаёт в конец очереди, чтобы не занимать обработчик целиком
+                    self._ready.put_nowait(key)
+                else:
+                    del self._queues[key]
+                if self.pending < self.max_pending:
+                    self._has_space.set()
+                if not self.pending:
+                    self._idle.set()
+
+    def queued(self, key) -> list:
+        """Обновления чата, ещё ждущие обработки, в порядке поступления"""
+        return [update for _, update in self._queues.get(key, ())]
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "queue_length": self.pending,
+            "chats_waiting": len(self._queues),
+            "processed": self.processed,
+            "failed": self.failed,
+            "lag_avg": self.lag_total / self.processed if self.processed else 0.0,
+            "lag_max": self.lag_max,
+            # Сколько секунд сейчас ждёт самое старое обновление самого отстающего чата
+            "chat_lag_max": max((now - queue[0][0] for queue in self._queues.values() if queue), default=0.0),
+            "backpressure_waits": self.backpressure_waits
+        }
+
+    async def close(self, timeout: float = 10.0):
+        """Дожидается обработки принятых обновлений и останавливает обработчики"""
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Не дождались обработки %s обновлений", self.pending)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
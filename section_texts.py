@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import os
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _scan(directory: str) -> dict:
+    """Имя раздела -> mtime_ns для всех .txt в каталоге"""
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return {}
+    with entries:
+        return {
+            entry.name[:-len(".txt")]: entry.stat().st_mtime_ns
+            for entry in entries
+            if entry.is_file() and entry.name.endswith(".txt")
+        }
+
+
+def _read(directory: str, names: list) -> dict:
+    texts = {}
+    for name in names:
+        try:
+            with open(os.path.join(directory, f"{name}.txt"), "r", encoding="utf-8") as file:
+                texts[name] = file.read()
+        except FileNotFoundError:
+            pass
+    return texts
+
+
+class SectionTextCache:
+    """Тексты разделов из каталога texts/, загруженные в память.
+
+    Каталог читается целиком при запуске, а затем периодически сверяется
+    по mtime: перечитываются только изменённые файлы. Раздела, которого нет
+    на диске, нет и в кэше — get() для него не обращается к файловой системе.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._texts = {}
+        self._mtimes = {}
+
+    def get(self, section_name: str):
+        """Текст раздела или None, если файла нет"""
+        return self._texts.get(section_name)
+
+    async def reload(self) -> list:
+        """Перечитывает изменившиеся файлы и возвращает имена обновлённых разделов"""
+        loop = asyncio.get_running_loop()
+        mtimes = await loop.run_in_executor(None, _scan, self.directory)
+        changed = [name for name, mtime in mtimes.items() if self._mtimes.get(name) != mtime]
+        removed = [name for name in self._mtimes if name not in mtimes]
+        if not changed and not removed:
+            return []
+
+        loaded = await loop.run_in_executor(None, _read, self.directory, changed)
+        texts = dict(self._texts)
+        texts.update(loaded)
+        for name in removed:
+            texts.pop(name, None)
+        # Файл мог исчезнуть между сканированием и чтением
+        for name in changed:
+            if name not in loaded:
+                mtimes.pop(name, None)
+        self._texts = texts
+        self._mtimes = mtimes
+        return changed + removed
+
+    async def watch(self, interval: float):
+        """Фоновая задача: подхватывает правки текстов без перезапуска бота"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                updated = await self.reload()
+            except OSError:
+                logger.exception("Не удалось перечитать тексты разделов")
+                continue
+            if updated:
+                logger.info("Обновлены тексты разделов: %s", ", ".join(updated))
+
+
+section_texts = SectionTextCache(settings.TEXTS_DIR)
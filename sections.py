@@ -0,0 +1,38 @@
+"""Единый реестр разделов бота.
+
+Раздел описывается кодом (короткий идентификатор для callback_data),
+названием кнопки в главном меню и именем, под которым раздел хранится
+в базе и в texts/<имя>.txt.
+"""
+from typing import NamedTuple
+
+
+class Section(NamedTuple):
+    code: str
+    title: str
+    name: str
+
+
+SECTIONS = (
+    Section("events", "📅 Ближайшие мероприятия", "ближайшие_мероприятия"),
+    Section("edu", "🎓 Образовательные программы", "образовательные_программы"),
+    Section("groups", "👥 Группы специалистов", "группы_специалистов"),
+    Section("courses", "🏫 Курсы для всех", "курсы_для_всех"),
+    Section("lectures", "🎤 Лекторий", "лекторий"),
+    Section("films", "🎬 Киноклуб", "киноклуб"),
+    Section("consult", "💬 Псих. консультации", "псих_консультации"),
+    Section("conf", "🌐 Конференции", "конференции"),
+    Section("projects", "🚀 Проекты академии", "проекты_академии"),
+    Section("library", "📚 Библиотека материалов", "библиотека_материалов"),
+)
+
+BY_CODE = {section.code: section for section in SECTIONS}
+BY_TITLE = {section.title: section for section in SECTIONS}
+BY_NAME = {section.name: section for section in SECTIONS}
+
+TITLES = tuple(BY_TITLE)
+
+
+def get_section_name(section_code: str) -> str:
+    section = BY_CODE.get(section_code)
+    return section.name if section else section_code
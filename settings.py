@@ -0,0 +1,99 @@
+"""Необязательные параметры бота.
+
+Обязательные значения (BOT_TOKEN, ADMINS, DATABASE_NAME) по-прежнему берутся
+из config.py напрямую, остальные можно переопределить там же.
+"""
+import config
+
+# Каталог с текстами разделов и период проверки изменений в нём (секунды)
+TEXTS_DIR = getattr(config, "TEXTS_DIR", "texts")
+TEXTS_POLL_INTERVAL = getattr(config, "TEXTS_POLL_INTERVAL", 5.0)
+
+# Адрес сервера Bot API; None — официальный api.telegram.org.
+# Для локальных прогонов: python -m benchmarks.fake_bot_api
+BOT_API_URL = getattr(config, "BOT_API_URL", None)
+# Размер пула соединений к Bot API (соединения переиспользуются между запросами)
+BOT_API_CONNECTIONS = getattr(config, "BOT_API_CONNECTIONS", 100)
+
+# Лимиты исходящих запросов: сообщений в секунду на бота, в личный чат и в группу
+RATE_LIMIT_GLOBAL = getattr(config, "RATE_LIMIT_GLOBAL", 30)
+RATE_LIMIT_CHAT = getattr(config, "RATE_LIMIT_CHAT", 1)
+RATE_LIMIT_GROUP = getattr(config, "RATE_LIMIT_GROUP", 20 / 60)
+
+# FSM-хранилище: сколько пользователей держать в памяти, через сколько секунд
+# простоя вытеснять запись из памяти, как часто сбрасывать изменения в базу
+# и сколько дней хранить неактивные состояния
+FSM_HOT_ENTRIES = getattr(config, "FSM_HOT_ENTRIES", 10000)
+FSM_IDLE_TTL = getattr(config, "FSM_IDLE_TTL", 600)
+FSM_FLUSH_INTERVAL = getattr(config, "FSM_FLUSH_INTERVAL", 1.0)
+FSM_RETENTION_DAYS = getattr(config, "FSM_RETENTION_DAYS", 30)
+
+# Webhook: если WEBHOOK_URL задан (например, "https://bot.example.com"), бот
+# принимает обновления по адресу WEBHOOK_URL + WEBHOOK_PATH вместо long polling.
+# WEBHOOK_SECRET проверяется в заголовке X-Telegram-Bot-Api-Secret-Token;
+# если он не задан, при каждом запуске генерируется случайный.
+WEBHOOK_URL = getattr(config, "WEBHOOK_URL", None)
+WEBHOOK_PATH = getattr(config, "WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = getattr(config, "WEBHOOK_SECRET", None)
+WEBAPP_HOST = getattr(config, "WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = getattr(config, "WEBAPP_PORT", 8080)
+
+# Обработка обновлений: сколько обновлений (из разных чатов) обрабатывается
+# одновременно и сколько может ждать в очереди, прежде чем бот перестанет
+# принимать новые. Обновления одного чата всегда обрабатываются по порядку.
+UPDATE_CONCURRENCY = getattr(config, "UPDATE_CONCURRENCY", 64)
+UPDATE_QUEUE_LIMIT = getattr(config, "UPDATE_QUEUE_LIMIT", 10000)
+
+# Сколько процессов обрабатывают обновления. Больше одного — только вместе с
+# WEBHOOK_URL: приёмник распределяет обновления по воркерам по chat_id.
+WORKERS = getattr(config, "WORKERS", 1)
+
+# Эндпоинт /metrics для Prometheus; None — не поднимать. В режиме с
+# несколькими воркерами воркер N слушает порт METRICS_PORT + N + 1.
+METRICS_HOST = getattr(config, "METRICS_HOST", "127.0.0.1")
+METRICS_PORT = getattr(config, "METRICS_PORT", None)
+
+# Рассылки подписчикам: сколько сообщений отправляется одной пачкой (после
+# каждой пачки прогресс сохраняется в базу) и как часто проверять задания,
+# созданные другими процессами
+BROADCAST_BATCH = getattr(config, "BROADCAST_BATCH", 100)
+BROADCAST_POLL_INTERVAL = getattr(config, "BROADCAST_POLL_INTERVAL", 5.0)
+
+# Даты мероприятий: часовой пояс, в котором администратор их вводит и
+# пользователи видят, длительность по умолчанию (часы), как часто переносить
+# завершившиеся мероприятия в архив (секунды)
+TIMEZONE = getattr(config, "TIMEZONE", "Europe/Moscow")
+DEFAULT_EVENT_HOURS = getattr(config, "DEFAULT_EVENT_HOURS", 2)
+ARCHIVE_INTERVAL = getattr(config, "ARCHIVE_INTERVAL", 300)
+
+# Напоминания участникам: за сколько секунд до начала мероприятия (по
+# умолчанию за сутки и за час), размер пачки отправки и как часто проверять
+# напоминания, поставленные другими процессами (секунды)
+REMINDER_OFFSETS = getattr(config, "REMINDER_OFFSETS", (24 * 3600, 3600))
+REMINDER_BATCH = getattr(config, "REMINDER_BATCH", 100)
+REMINDER_POLL_INTERVAL = getattr(config, "REMINDER_POLL_INTERVAL", 30.0)
+
+# Сколько расписаний показывать на одной странице списков админ-панели
+ADMIN_PAGE_SIZE = getattr(config, "ADMIN_PAGE_SIZE", 10)
+
+# Обращения к администраторам: сколько сообщений из очереди пересылается
+# одной пачкой и как часто проверять сообщения, принятые другими процессами
+SUPPORT_BATCH = getattr(config, "SUPPORT_BATCH", 20)
+SUPPORT_POLL_INTERVAL = getattr(config, "SUPPORT_POLL_INTERVAL", 2.0)
+
+# Статистика просмотров: сколько событий держать в памяти до записи, при
+# скольких событиях записывать пачку досрочно, как часто записывать (секунды),
+# сколько дней хранить события и дневные суммы, сколько строк в отчёте /top
+ANALYTICS_BUFFER = getattr(config, "ANALYTICS_BUFFER", 10000)
+ANALYTICS_BATCH = getattr(config, "ANALYTICS_BATCH", 500)
+ANALYTICS_FLUSH_INTERVAL = getattr(config, "ANALYTICS_FLUSH_INTERVAL", 5.0)
+ANALYTICS_RETENTION_DAYS = getattr(config, "ANALYTICS_RETENTION_DAYS", 90)
+ANALYTICS_TOP = getattr(config, "ANALYTICS_TOP", 10)
+
+# Встроенный режим (@бот слова): результатов на странице (Telegram — до 50),
+# сколько совпадений брать на запрос, сколько запросов держать в кэше и
+# сколько секунд Telegram может кэшировать ответ у себя
+INLINE_PAGE_SIZE = getattr(config, "INLINE_PAGE_SIZE", 20)
+INLINE_MAX_RESULTS = getattr(config, "INLINE_MAX_RESULTS", 100)
+INLINE_CACHE_SIZE = getattr(config, "INLINE_CACHE_SIZE", 1000)
+INLINE_CACHE_TIME = getattr(config, "INLINE_CACHE_TIME", 30)
@@ -0,0 +1,186 @@
+import asyncio
+import copy
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+import database
+
+logger = logging.getLogger(__name__)
+
+
+class _Record:
+    __slots__ = ("state", "data", "touched")
+
+    def __init__(self, state: Optional[str], data: dict):
+        self.state = state
+        self.data = data
+        self.touched = time.monotonic()
+
+
+def _key(key: StorageKey) -> str:
+    return ":".join(str(part) if part is not None else "" for part in (
+        key.bot_id, key.chat_id, key.user_id, key.thread_id, key.business_connection_id, key.destiny
+    ))
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM-хранилище в SQLite с горячим LRU-кэшем в памяти.
+
+    В памяти держится не больше max_entries недавно активных пользователей,
+    запись простаивающих дольше idle_ttl секунд вытесняется. Изменения
+    копятся и раз в flush_interval секунд (или при накоплении flush_batch
+    штук) пишутся в базу одной транзакцией. Состояния, не менявшиеся
+    дольше retention секунд, удаляются из базы.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        idle_ttl: float = 600,
+        flush_interval: float = 1.0,
+        flush_batch: int = 500,
+        retention: float = 30 * 24 * 3600
+    ):
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.retention = retention
+        self._hot = OrderedDict()
+        # Изменения, ещё не записанные в базу, и пачка, которая пишется сейчас
+        self._dirty = {}
+        self._flushing = {}
+        self._flush_requested = asyncio.Event()
+        self._flusher = None
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        """Запускает фоновую запись изменений; вызывать внутри работающего loop"""
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def _load(self, key: str) -> _Record:
+        record = self._hot.get(key)
+        if record is not None:
+            self.hits += 1
+            self._hot.move_to_end(key)
+            record.touched = time.monotonic()
+            return record
+
+        self.misses += 1
+        pending = self._dirty.get(key) or self._flushing.get(key)
+        if pending is not None:
+            state, data = pending
+        else:
+            row = await database.get_fsm_record(key)
+            # Пока шёл запрос, запись могли создать или изменить
+            if key in self._hot:
+                return await self._load(key)
+            state, data = (row[0], json.loads(row[1])) if row else (None, {})
+        record = _Record(state, data)
+        self._remember(key, record)
+        return record
+
+    def _remember(self, key: str, record: _Record):
+        self._hot[key] = record
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.max_entries:
+            # Несохранённые изменения живут в _dirty, вытеснение их не теряет
+            self._hot.popitem(last=False)
+
+    def _mark_dirty(self, key: str, record: _Record):
+        record.touched = time.monotonic()
+        self._dirty[key] = (record.state, copy.deepcopy(record.data))
+        if len(self._dirty) >= self.flush_batch:
+            self._flush_requested.set()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key = _key(key)
+        record = await self._load(storage_key)
+        record.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(storage_key, record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._load(_key(key))).state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        storage_key = _key(key)
+        record = await self._load(storage_key)
+        record.data = copy.deepcopy(data)
+        self._mark_dirty(storage_key, record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return copy.deepcopy((await self._load(_key(key))).data)
+
+    async def flush(self):
+        """Записывает накопленные изменения в базу одной транзакцией"""
+        if not self._dirty:
+            return
+        self._flushing, self._dirty = self._dirty, {}
+        now = time.time()
+        upserts = []
+        deletes = []
+        for key, (state, data) in self._flushing.items():
+            if state is None and not data:
+                deletes.append(key)
+            else:
+                upserts.append((key, state, json.dumps(data, ensure_ascii=False), now))
+        try:
+            await database.save_fsm_records(upserts, deletes)
+        except Exception:
+            # Вернём изменения в очередь, не затирая более свежие
+            for key, value in self._flushing.items():
+                self._dirty.setdefault(key, value)
+            raise
+        finally:
+            self._flushing = {}
+
+    def _evict_idle(self):
+        deadline = time.monotonic() - self.idle_ttl
+        while self._hot:
+            key, record = next(iter(self._hot.items()))
+            if record.touched > deadline:
+                break
+            del self._hot[key]
+
+    async def _flush_loop(self):
+        last_purge = 0.0
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+                self._evict_idle()
+                if time.monotonic() - last_purge > 3600:
+                    last_purge = time.monotonic()
+                    await database.purge_fsm_records(time.time() - self.retention)
+            except Exception:
+                logger.exception("Не удалось сохранить состояния FSM")
+
+    def stats(self) -> dict:
+        return {
+            "hot_entries": len(self._hot),
+            "dirty": len(self._dirty),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
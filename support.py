@@ -0,0 +1,180 @@
+"""Обращения пользователей к администраторам («Написать администратору»).
+
+Сообщение пользователя сначала записывается в очередь в базе: обработчик
+отвечает «передано» сразу и не ждёт пересылки администраторам. Очередь
+разбирает фоновая задача: пачка сообщений пересылается всем ADMINS
+параллельно, темп задаёт RateLimiter. После пачки в одной транзакции
+сохраняются ID копий у администраторов и сообщения удаляются из очереди,
+поэтому после перезапуска очередь дочитывается с того же места, а повторно
+может прийти не больше одной пачки. Сообщение уходит из очереди, только
+если его копию получил хотя бы один администратор или все администраторы
+заблокировали бота; при сбое Bot API оно остаётся и пересылается повторно
+с нарастающей паузой. Администратор отвечает на копию, и ответ находит чат
+пользователя по индексу (admin_id, message_id).
+"""
+import asyncio
+import logging
+import time
+
+from aiogram import Bot, types
+from aiogram.enums import ContentType
+from aiogram.exceptions import TelegramForbiddenError
+
+import database
+import settings
+from config import ADMINS
+from ratelimit import bulk_priority
+
+logger = logging.getLogger(__name__)
+
+# Предельная пауза между повторами, когда Bot API не принимает сообщения
+MAX_RETRY_DELAY = 60.0
+
+# Вложения, которые можно переслать копией с подписью
+MEDIA_WITH_CAPTION = {
+    ContentType.PHOTO, ContentType.VIDEO, ContentType.DOCUMENT,
+    ContentType.AUDIO, ContentType.VOICE, ContentType.ANIMATION
+}
+
+
+def _sender(user: types.User) -> str:
+    username = f"@{user.username}, " if user.username else ""
+    return f"от {user.full_name} ({username}id {user.id})"
+
+
+async def send_reply(bot: Bot, chat_id: int, message: types.Message):
+    """Передаёт пользователю ответ администратора"""
+    prefix = "💬 Ответ администратора"
+    if message.text is not None:
+        await bot.send_message(chat_id, f"{prefix}:\n\n{message.text}"[:4096])
+    elif message.content_type in MEDIA_WITH_CAPTION:
+        caption = f"{prefix}:\n\n{message.caption}" if message.caption else prefix
+        await bot.copy_message(chat_id, message.chat.id, message.message_id, caption=caption[:1024])
+    else:
+        await bot.copy_message(chat_id, message.chat.id, message.message_id)
+
+
+class SupportRelay:
+    def __init__(self, admins: list, batch_size: int = 20, poll_interval: float = 2.0):
+        self.admins = list(admins)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        # В режиме нескольких процессов очередь разбирает только один воркер
+        self.runner_enabled = True
+        self.bot = None
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._retry_delay = poll_interval
+        # Метрики
+        self.received = 0
+        self.forwarded = 0
+        self.failed = 0
+        self.blocked = 0
+        self.retrying = 0
+        self.lag_max = 0.0
+
+    def start(self, bot: Bot):
+        self.bot = bot
+        if self.runner_enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def accepts(self, message: types.Message) -> bool:
+        """Можно ли переслать сообщение: текст или вложение с подписью"""
+        return message.text is not None or message.content_type in MEDIA_WITH_CAPTION
+
+    async def enqueue(self, message: types.Message) -> int:
+        """Ставит сообщение пользователя в очередь и возвращает номер обращения"""
+        ticket_id = await database.enqueue_support_message(
+            message.chat.id, message.from_user.id, message.message_id,
+            _sender(message.from_user),
+            message.text if message.text is not None else message.caption,
+            message.text is None
+        )
+        self.received += 1
+        self._wakeup.set()
+        return ticket_id
+
+    async def _run(self):
+        while True:
+            batch = await database.get_support_batch(self.batch_size)
+            if not batch:
+                self._wakeup.clear()
+                try:
+                    # Сообщения, принятые другими процессами, подхватываются по таймауту
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                kept = await self._deliver(batch)
+            except Exception:
+                logger.exception("Пересылка обращений прервана, повтор через %s с", self.poll_interval)
+                await asyncio.sleep(self.poll_interval)
+                continue
+            self.retrying = kept
+            if kept:
+                logger.warning("Не переслано обращений: %s, повтор через %.1f с", kept, self._retry_delay)
+                await asyncio.sleep(self._retry_delay)
+                self._retry_delay = min(self._retry_delay * 2, MAX_RETRY_DELAY)
+            else:
+                self._retry_delay = self.poll_interval
+
+    async def _deliver(self, batch: list) -> int:
+        """Пересылает пачку и возвращает, сколько сообщений осталось в очереди для повтора"""
+        targets = [(row, admin_id) for row in batch for admin_id in self.admins]
+        results = await asyncio.gather(
+            *(self._forward(admin_id, *row[1:7]) for row, admin_id in targets),
+            return_exceptions=True
+        )
+        forwards = []
+        # ID строк очереди: дошла хотя бы одна копия / был сбой, который стоит повторить
+        delivered = set()
+        retry = set()
+        for (row, admin_id), result in zip(targets, results):
+            if isinstance(result, TelegramForbiddenError):
+                self.blocked += 1
+            elif isinstance(result, Exception):
+                logger.warning("Обращение #%s администратору %s: %s", row[1], admin_id, result)
+                self.failed += 1
+                retry.add(row[0])
+            else:
+                self.forwarded += 1
+                delivered.add(row[0])
+                forwards.append((admin_id, result, row[1]))
+        # Хотя бы одна копия дошла или все администраторы заблокировали бота
+        done = [row[0] for row in batch if row[0] in delivered or row[0] not in retry]
+        await database.finish_support_batch(done, forwards)
+        if done:
+            self.lag_max = max(self.lag_max, time.time() - batch[0][7])
+        return len(batch) - len(done)
+
+    async def _forward(self, admin_id: int, ticket_id: int, chat_id: int, message_id: int,
+                       header: str, text: str, media: int) -> int:
+        """Пересылает сообщение одному администратору и возвращает ID копии"""
+        caption = f"📩 Обращение #{ticket_id} {header}\n↩️ Ответьте на это сообщение, чтобы написать пользователю"
+        with bulk_priority():
+            if media:
+                body = f"{caption}\n\n{text}" if text else caption
+                sent = await self.bot.copy_message(admin_id, chat_id, message_id, caption=body[:1024])
+            else:
+                sent = await self.bot.send_message(admin_id, f"{caption}\n\n{text}"[:4096])
+        return sent.message_id
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "forwarded": self.forwarded,
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "retrying": self.retrying,
+            "lag_max": self.lag_max
+        }
+
+
+support = SupportRelay(ADMINS, settings.SUPPORT_BATCH, settings.SUPPORT_POLL_INTERVAL)
@@ -0,0 +1,77 @@
+"""Запись на мероприятия: места, очередь ожидания и изменение вместимости.
+
+Запуск: python -m unittest discover tests
+"""
+import os
+import sqlite3
+import sys
+import time
+import types
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if "config" not in sys.modules:
+    # Боевой config.py тестам не нужен: база у каждого теста своя, в памяти
+    config = types.ModuleType("config")
+    config.BOT_TOKEN = "123456:TEST-TOKEN"
+    config.ADMINS = [1]
+    config.DATABASE_NAME = ":memory:"
+    sys.modules["config"] = config
+
+import database  # noqa: E402
+
+
+class CapacityTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        database.migrate(self.conn)
+        self.conn.execute("INSERT INTO sections (name) VALUES ('лекторий')")
+        self.schedule_id = self.conn.execute(
+            "INSERT INTO schedules (section_id, schedule_text) VALUES (1, 'Лекция')"
+        ).lastrowid
+
+    def tearDown(self):
+        self.conn.close()
+
+    def register(self, user_id: int) -> str:
+        return database._register(self.conn, self.schedule_id, user_id, time.time())[0]
+
+    def seats(self) -> tuple:
+        return self.conn.execute(
+            "SELECT capacity, booked FROM schedules WHERE id = ?", (self.schedule_id,)
+        ).fetchone()
+
+    def statuses(self) -> dict:
+        return dict(self.conn.execute(
+            "SELECT user_id, status FROM registrations WHERE schedule_id = ?", (self.schedule_id,)
+        ))
+
+    def test_cancel_promotes_first_waiting(self):
+        database._set_capacity(self.conn, self.schedule_id, 2)
+        for user_id in (1, 2, 3):
+            self.register(user_id)
+        _, promoted = database._cancel_registration(self.conn, self.schedule_id, 1)
+        self.assertEqual(promoted, [3])
+        self.assertEqual(self.seats(), (2, 2))
+
+    def test_cancel_after_capacity_lowered_does_not_promote(self):
+        database._set_capacity(self.conn, self.schedule_id, 3)
+        for user_id in (1, 2, 3, 4, 5):
+            self.register(user_id)
+        database._set_capacity(self.conn, self.schedule_id, 1)
+
+        _, promoted = database._cancel_registration(self.conn, self.schedule_id, 1)
+        self.assertEqual(promoted, [])
+        self.assertEqual(self.seats(), (1, 2))
+        _, promoted = database._cancel_registration(self.conn, self.schedule_id, 2)
+        self.assertEqual(promoted, [])
+        self.assertEqual(self.seats(), (1, 1))
+        # Записей снова не больше мест: следующее освободившееся место уходит очереди
+        _, promoted = database._cancel_registration(self.conn, self.schedule_id, 3)
+        self.assertEqual(promoted, [4])
+        self.assertEqual(self.seats(), (1, 1))
+        self.assertEqual(self.statuses(), {4: database.CONFIRMED, 5: database.WAITLIST})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Отправка напоминаний: неудачные строки не задерживают остальную группу.
+
+Запуск: python -m unittest discover tests
+"""
+import os
+import sqlite3
+import sys
+import time
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if "config" not in sys.modules:
+    # Боевой config.py тестам не нужен: база у каждого теста своя, в памяти
+    config = types.ModuleType("config")
+    config.BOT_TOKEN = "123456:TEST-TOKEN"
+    config.ADMINS = [1]
+    config.DATABASE_NAME = ":memory:"
+    sys.modules["config"] = config
+
+import database  # noqa: E402
+import reminders  # noqa: E402
+
+
+class FireTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.now = time.time()
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        database.migrate(conn)
+        conn.execute("INSERT INTO sections (name) VALUES ('лекторий')")
+        self.schedule_id = conn.execute(
+            "INSERT INTO schedules (section_id, schedule_text, starts_at, ends_at) VALUES (1, 'Лекция', ?, ?)",
+            (self.now + 3600, self.now + 7200)
+        ).lastrowid
+        for user_id in range(1, 8):
+            conn.execute(
+                "INSERT INTO registrations (schedule_id, user_id, status, created_at) VALUES (?, ?, ?, ?)",
+                (self.schedule_id, user_id, database.CONFIRMED, self.now)
+            )
+            conn.execute(
+                "INSERT INTO reminders (schedule_id, user_id, lead_time, due_at) VALUES (?, ?, 3600, ?)",
+                (self.schedule_id, user_id, self.now - 1)
+            )
+        conn.commit()
+        self.conn = database._connection = conn
+        patch_catalog = mock.patch.multiple(
+            reminders.catalog,
+            get_entry=lambda schedule_id: ("лекторий", "Лекция", None),
+            get_period=lambda schedule_id: (self.now + 3600, self.now + 7200)
+        )
+        patch_catalog.start()
+        self.addCleanup(patch_catalog.stop)
+
+    async def asyncTearDown(self):
+        database._connection = None
+        self.conn.close()
+
+    def pending(self) -> list:
+        return [user_id for (user_id,) in self.conn.execute("SELECT user_id FROM reminders ORDER BY user_id")]
+
+    async def test_failed_rows_do_not_block_the_rest_of_the_group(self):
+        scheduler = reminders.ReminderScheduler(batch_size=2)
+        attempts = []
+
+        async def send(user_id, lead_time, schedule_text, period):
+            attempts.append(user_id)
+            # Первая пачка целиком не уходит, остальные — кроме пятого пользователя
+            return user_id not in (1, 2, 5)
+
+        scheduler._send = send
+        kept = await scheduler._fire(self.schedule_id, self.now)
+        self.assertEqual(kept, 3)
+        self.assertEqual(attempts, [1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(self.pending(), [1, 2, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Приём обновлений через webhook на aiohttp."""
+import asyncio
+import logging
+import secrets
+import signal
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+import settings
+from scheduler import UpdateScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookHandler(SimpleRequestHandler):
+    """Ставит обновление в очередь планировщика и сразу отвечает Telegram.
+
+    Если очередь переполнена, ответ задерживается до появления места, и
+    Telegram сам притормаживает доставку. При остановке дожидается обработки
+    уже принятых обновлений.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret_token: str, scheduler: UpdateScheduler):
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, secret_token=secret_token)
+        self.scheduler = scheduler
+
+    @property
+    def in_flight(self) -> int:
+        return self.scheduler.pending
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        data = await request.json(loads=bot.session.json_loads)
+        await self.scheduler.submit(Update.model_validate(data, context={"bot": bot}))
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def close(self) -> None:
+        if self.scheduler.pending:
+            logger.info("Дожидаемся обработки %s обновлений", self.in_flight)
+        await self.scheduler.close()
+        await super().close()
+
+
+def create_app(dp: Dispatcher, bot: Bot, secret_token: str, scheduler: UpdateScheduler) -> web.Application:
+    app = web.Application()
+    WebhookHandler(dp, bot, secret_token, scheduler).register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+def set_webhook_on_startup(app: web.Application, dp: Dispatcher, bot: Bot, secret_token: str):
+    """Регистрирует webhook в Telegram при запуске сервера"""
+    async def set_webhook(app: web.Application):
+        await bot.set_webhook(
+            url=settings.WEBHOOK_URL.rstrip("/") + settings.WEBHOOK_PATH,
+            secret_token=secret_token,
+            allowed_updates=dp.resolve_used_update_types()
+        )
+
+    app.on_startup.append(set_webhook)
+
+
+async def serve(app: web.Application):
+    """Держит HTTP-сервер на WEBAPP_HOST:WEBAPP_PORT до SIGINT/SIGTERM"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows: остановка по KeyboardInterrupt
+            pass
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.WEBAPP_HOST, settings.WEBAPP_PORT)
+    await site.start()
+    logger.info("Webhook слушает %s:%s%s", settings.WEBAPP_HOST, settings.WEBAPP_PORT, settings.WEBHOOK_PATH)
+    try:
+        await stop.wait()
+    finally:
+        await runner.cleanup()
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, scheduler: UpdateScheduler):
+    """Поднимает HTTP-сервер, регистрирует webhook и работает до SIGINT/SIGTERM"""
+    secret_token = settings.WEBHOOK_SECRET or secrets.token_urlsafe(32)
+    app = create_app(dp, bot, secret_token, scheduler)
+    set_webhook_on_startup(app, dp, bot, secret_token)
+    await serve(app)